@@ -1,29 +1,42 @@
 import os
-import json
-import re
+import asyncio
 import audioop
-from typing import Optional
+import concurrent.futures
+from typing import Callable, Optional, TYPE_CHECKING
 
-from PyQt5.QtCore import pyqtSignal, QObject, QTimer, QIODevice, QUrl
-from PyQt5.QtMultimedia import QAudioFormat, QAudioOutput, QAudioDeviceInfo, QAudio, QSoundEffect
-from live2d.utils.lipsync import WavHandler
-from dotenv import load_dotenv
-from openai import OpenAI
+from PyQt5.QtCore import pyqtSignal, QObject, QTimer, QIODevice, QElapsedTimer
+from PyQt5.QtMultimedia import QAudioFormat, QAudioOutput, QAudioDeviceInfo, QAudio
 
+from engine.core import ConversationEngine
+from engine.runtime import run_warmup, runtime
+from engine.session import Reply, TurnListener
+from engine.tts import AudioFormat
 from utils import resources
+from utils.sound_bank import SoundBank, SoundClip, VoicePool, model_tap_sounds
+from utils.lazy_import import lazy_import
 from utils.logger_setup import get_logger
-from workers.llm_worker import LLMWorker
-from workers.tts_worker import TTSWorker
-from workers.asr_worker_ifly import ASRWorker
+from utils.startup import timeline
+from utils.subtitle_timeline import SubtitleTimeline
+from utils.turn_trace import TurnTrace, tracer
 
 from canvas_live2d import Live2DSignals
 
-load_dotenv()
+if TYPE_CHECKING:  # 两个 ASR 后端的接口一致
+    from workers.asr_worker_ifly import ASRWorker
+
 logger = get_logger("AIControl")
 
+# ASR 后端按配置选择，只导入被选中的模块 (讯飞依赖 pyaudio，本地 Qwen 依赖 sounddevice；两者都使用 websockets 的 asyncio 客户端)
+ASR_BACKENDS = {
+    "ifly": "workers.asr_worker_ifly",
+    "qwen": "workers.asr_worker",
+}
+ASR_BACKEND = os.getenv("ASR_BACKEND", "ifly")
+if ASR_BACKEND not in ASR_BACKENDS:
+    logger.warning(f"Unknown ASR_BACKEND '{ASR_BACKEND}', falling back to 'ifly'")
+    ASR_BACKEND = "ifly"
+asr_backend = lazy_import(ASR_BACKENDS[ASR_BACKEND])
 
-TTS_REF_AUDIO_PATH = os.getenv("REF_AUDIO_PATH")
-TTS_REF_PROMPT_TEXT = os.getenv("REF_PROMPT_TEXT")
 
 class Controller(QObject):
     """Controller class to emit signals for Live2D model control."""
@@ -33,34 +46,87 @@ class Controller(QObject):
     lip_sync_state_changed = pyqtSignal(float, float)
     audio_output_stopped = pyqtSignal()
 
+
+class EngineEvents(QObject, TurnListener):
+    """
+    对话引擎的回合事件 (在 asyncio 线程中回调) 转为 Qt 信号，排队到主线程处理。
+    每个信号的第一个参数都是回合号，用于丢弃旧回合的迟到事件。
+    """
+    reply_ready = pyqtSignal(int, object, list)   # turn_id, Reply, text_ends
+    segment_started = pyqtSignal(int, int)        # turn_id, index
+    audio_setup = pyqtSignal(int, int, int, int)  # turn_id, sample_rate, channels, sample_size
+    audio_data = pyqtSignal(int, bytes)
+    audio_finished = pyqtSignal(int)
+    turn_failed = pyqtSignal(int, str, str)       # turn_id, stage ("llm" / "tts"), message
+
+    def on_reply(self, turn_id: int, reply: Reply, text_ends: list[int]):
+        self.reply_ready.emit(turn_id, reply, text_ends)
+
+    def on_segment(self, turn_id: int, index: int):
+        self.segment_started.emit(turn_id, index)
+
+    def on_audio_format(self, turn_id: int, audio_format: AudioFormat):
+        self.audio_setup.emit(turn_id, *audio_format)
+
+    def on_audio(self, turn_id: int, data: bytes):
+        self.audio_data.emit(turn_id, data)
+
+    def on_audio_end(self, turn_id: int):
+        self.audio_finished.emit(turn_id)
+
+    def on_failed(self, turn_id: int, stage: str, message: str):
+        self.turn_failed.emit(turn_id, stage, message)
+
+
+def create_audio_output(audio_format: QAudioFormat, parent: QObject) -> QAudioOutput:
+    """默认的 TTS 音频输出: 系统默认声卡，不支持的格式退回最接近的格式"""
+    info = QAudioDeviceInfo.defaultOutputDevice()
+    if not info.isFormatSupported(audio_format):
+        audio_format = info.nearestFormat(audio_format)
+    return QAudioOutput(audio_format, parent)
+
+
 class AIManager(QObject):
     """Manager class to handle AI logic: LLM, TTS, ASR, and Audio."""
 
     # Signals to update UI
     response_ready = pyqtSignal(str)          # Full response text available
-    typing_update = pyqtSignal(str)           # Current text for typewriter effect
+    typing_progress = pyqtSignal(int)         # Number of characters revealed by the typewriter
     typing_finished = pyqtSignal()
     status_update = pyqtSignal(str)           # Status update (KEY)
     asr_partial_update = pyqtSignal(str)      # ASR partial/final result to update input box
     listening_state_changed = pyqtSignal(bool)# True if recording started, False if stopped
+    warmup_task_finished = pyqtSignal(str, bool, float)  # 名称, 是否成功, 耗时(秒)；从 asyncio 线程发出
 
     def __init__(self,
                  controller: Controller,
                  live2dSignals: Live2DSignals,
+                 audio_output_factory: Callable[[QAudioFormat, QObject], QAudioOutput] = create_audio_output,
                  ):
+        """audio_output_factory: 创建 TTS 音频输出 (需提供 QAudioOutput 的推模式接口)，无声卡环境可传入 NullAudioOutput"""
         super().__init__()
         self.controller = controller
         self.live2dSignals = live2dSignals
+        self.audio_output_factory = audio_output_factory
 
         self.Expressions = ["normal", "panic", "scowl", "shy", "umbrella_close", "cry"]
 
-        # Worker placeholders
-        self.client: Optional[OpenAI] = None
-        self.LLMWorker: Optional[LLMWorker] = None
-        self.TTSWorker: Optional[TTSWorker] = None
-        self.ASRWorker: Optional[ASRWorker] = None
-
-        self.tts_init_info = {"ref_sound_path": "", "prompt_text": "", "text_lang": "zh", "prompt_lang": "zh" }
+        # 对话引擎: LLM/TTS 回合流程运行在后台 asyncio 线程中，这里只负责界面、播放与口型
+        self.engine = ConversationEngine()
+        self.session = self.engine.session("local")
+        self.engine_events = EngineEvents(self)
+        self.turn_future: Optional[concurrent.futures.Future] = None
+        self.ASRWorker: Optional["ASRWorker"] = None
+        # 后端连接预热，构造时即登记到启动时间线，start_background_init() 时在 asyncio 运行时中并行执行
+        self.warmup_tasks = {
+            "warmup.llm": lambda: self.engine.llm.warmup(),
+            "warmup.tts": lambda: self.engine.tts.warmup(),
+            "warmup.asr": lambda: asr_backend.warmup(),
+            "sounds.preload": lambda: asyncio.to_thread(
+                self.sound_bank.preload, model_tap_sounds(resources.MODEL_JSON_PATH)),
+        }
+        timeline.expect(*self.warmup_tasks)
+        self.warmup_task_finished.connect(self.on_warmup_task_finished)
 
         # Audio
         self.audio_output: Optional[QAudioOutput] = None
@@ -68,6 +134,7 @@ class AIManager(QObject):
         self.audio_buffer = bytearray()
         self.sample_width = 2
         self.is_tts_fully_downloaded = False
+        self.turn_audio_format: Optional[tuple[int, int, int]] = None
         self.audio_timer = QTimer(self)
         self.lip_sync = 1.5
 
@@ -77,18 +144,31 @@ class AIManager(QObject):
         self.emotion_from_response: str = "normal"
         self.current_typing_text: str = ""
 
-        # Typewriter
-        self.typewriter_timer: Optional[QTimer] = None
-        self.typing_index: int = 0
-        self.typing_speed_map: dict = {"zh": 100, "en": 50, "ja": 80}
+        # 回合: 每次提问开启新回合，旧回合在引擎中取消 (LLM 流与 TTS 下载)，迟到的事件按回合号丢弃
+        self.turn_id: int = 0
+        # 延迟追踪: 文字发送或松开语音键时创建，随回合传给 ASR 与对话引擎，播放完毕或中止时结束
+        self.trace: Optional[TurnTrace] = None
+        self.asr_trace: Optional[TurnTrace] = None
 
-        # Tap Sound
-        self._tap_sound = QSoundEffect(self)
-        self.wav_handler = WavHandler()
+        # Typewriter: 单个定时器按音频时钟计算应显示的字符数，只发出字符数，由气泡按预排版的文本裁剪显示
+        self.typewriter_timer = QTimer(self)
+        self.typing_clock = QElapsedTimer()
+        self.typing_index: int = 0
+        self.typing_for_tap = False
+        self.subtitles: Optional[SubtitleTimeline] = None  # 当前回合显示文本与 TTS 音频时间轴的对应关系
+        self.typing_subtitles: Optional[SubtitleTimeline] = None  # 打字机正在跟随的时间线 (回合或点击台词)
+        self.typing_speed_map: dict = {"zh": 100, "en": 50, "ja": 80}  # 无音频时的每字毫秒数
+
+        # Tap Sound: 启动时预解码，点击时从内存直接播放，口型按预计算的 RMS 包络查表
+        self.sound_bank = SoundBank(resources.RESOURCES_DIRECTORY)
+        self.tap_voices = VoicePool(parent=self)
+        self.tap_voice = None
         self.wav_timer = QTimer(self)
 
         self.status = {
             "idle": "薇薇安正在拉电线>_<",
+            "model-loading": "薇薇安正在醒来. . .",
+            "model-error": "薇薇安的模型加载失败了QAQ (╥﹏╥)",
             "asr-listening": "薇薇安正在收集语音信息. . . (松开按钮结束) (•̀ᴗ•́)و",
             "asr-recognizing": "薇薇安正在尝试大语音识别术>_<",
             "asr-invalid": "薇薇安没有听清呢 (っ °Д °;)っ",
@@ -102,38 +182,65 @@ class AIManager(QObject):
         }
         self.directly_send = False
 
-        self.initAPI()
+        # ASR 与各后端连接在窗口显示后由 start_background_init() 启动
         self.initTimers()
         self.connect_signals()
 
     def connect_signals(self):
         # Internal signals
         self.live2dSignals.tap_signal.connect(self.tap_handler)
+        self.engine_events.reply_ready.connect(self.for_turn(self.call_success_handler))
+        self.engine_events.segment_started.connect(self.for_turn(self.on_segment_started))
+        self.engine_events.audio_setup.connect(self.for_turn(self.on_segment_audio_setup))
+        self.engine_events.audio_data.connect(self.for_turn(self.feed_audio_data))
+        self.engine_events.audio_finished.connect(self.for_turn(self.on_tts_stream_finished))
+        self.engine_events.turn_failed.connect(self.for_turn(self.on_turn_failed))
 
     def initAPI(self):
         """Initialize Workers"""
-        self.tts_init_info["ref_sound_path"] = TTS_REF_AUDIO_PATH
-        self.tts_init_info["prompt_text"] = TTS_REF_PROMPT_TEXT
-
         try:
-            self.ASRWorker = ASRWorker()
+            self.ASRWorker = asr_backend.ASRWorker()
             self.ASRWorker.recording_started.connect(self.on_recording_started)
             self.ASRWorker.recording_stopped.connect(self.on_recording_stopped)
             self.ASRWorker.speech_recognized.connect(self.on_speech_recognized)
             self.ASRWorker.recognition_failed.connect(lambda e: logger.error(f"ASR Error: {e}"))
             self.ASRWorker.recognition_failed.connect(lambda : self.status_update.emit("asr-error"))
+            self.ASRWorker.recognition_failed.connect(lambda : self.finish_asr_trace("asr-error"))
             self.ASRWorker.start()
         except Exception as e:
             logger.error(f"Failed to start ASR Worker: {e}")
 
+    def start_background_init(self):
+        """窗口显示后调用：启动 ASR，并行预热 LLM/TTS/ASR 连接"""
+        with timeline.span("ai.asr_worker_started"):
+            self.initAPI()
+        runtime.submit(run_warmup(self.warmup_tasks, self.warmup_task_finished.emit))
+
+    def shutdown(self):
+        """程序退出时调用：中止回合与录音，关闭连接池并停止 asyncio 运行时"""
+        self.cancel_turn()
+        if self.ASRWorker:
+            self.ASRWorker.stop()
+        try:
+            runtime.submit(self.engine.aclose()).result(timeout=2)
+        except Exception as e:
+            logger.warning(f"Engine shutdown: {e!r}")
+        runtime.stop()
+
+    def on_warmup_task_finished(self, name: str, ok: bool, duration: float):
+        if not ok:
+            logger.warning(f"{name} not ready after {duration:.2f}s, will retry on first use.")
+
     def initTimers(self):
         self.audio_timer.setInterval(20)
         self.audio_timer.timeout.connect(self.process_audio_queue)
+        self.typewriter_timer.setInterval(30)
+        self.typewriter_timer.timeout.connect(self.typewriteEffect)
         self.wav_timer.setInterval(30)
         self.wav_timer.timeout.connect(self.process_wav_lipsync)
 
-    def process_input_text(self, text: str):
-        """Process text input from UI (Send button)"""
+    def process_input_text(self, text: str, trace: Optional[TurnTrace] = None):
+        """Process text input from UI (Send button); trace 为语音输入时已开始的回合追踪"""
         question = text.strip()
         if not question:
             return
@@ -142,24 +249,67 @@ class AIManager(QObject):
         self.current_waiting_state = 0
         self.status_update.emit("llm-waiting")
         self.controller.call_state_changed.emit("normal")
-        # Stop previous audio
-        self.stop_audio_playback()
+        # Abort previous turn (LLM stream, TTS downloads, queued audio)
+        turn_id = self.begin_turn()
+        self.trace = trace or tracer.start("text")
+        self.trace.turn_id = turn_id
 
         self.is_tts_fully_downloaded = False
-        self.LLMWorker = LLMWorker(question)
-        self.LLMWorker.finished.connect(self.call_success_handler)
-        self.LLMWorker.error.connect(self.call_error_handler)
-        self.LLMWorker.start()
+        self.turn_audio_format = None
+        self.subtitles = None
+        self.turn_future = runtime.submit(self.session.run_turn(question, self.engine_events, self.trace, turn_id))
+
+    def begin_turn(self) -> int:
+        self.cancel_turn()
+        self.turn_id += 1
+        return self.turn_id
+
+    def cancel_turn(self):
+        """中止当前回合：关闭 LLM 流与 TTS 下载，丢弃排队音频并停止打字机"""
+        if self.turn_future is not None and not self.turn_future.done():
+            runtime.call_soon(self.session.cancel)
+        self.turn_future = None
+        self.stop_audio_playback()
+        self.typewriter_timer.stop()
+        self.finish_trace("cancelled")
+
+    def finish_trace(self, outcome: str):
+        tracer.finish(self.trace, outcome)
+        self.trace = None
+
+    def finish_asr_trace(self, outcome: str):
+        tracer.finish(self.asr_trace, outcome)
+        self.asr_trace = None
+
+    def is_turn_in_progress(self) -> bool:
+        engine_busy = self.turn_future is not None and not self.turn_future.done()
+        audio_busy = self.audio_output is not None and self.audio_output.state() == QAudio.ActiveState
+        return engine_busy or audio_busy
+
+    def for_turn(self, slot):
+        """包装引擎事件的槽函数：第一个参数为回合号，只有仍处于该回合时才执行，丢弃旧回合的迟到事件"""
+        def guarded(turn_id: int, *args):
+            if turn_id == self.turn_id:
+                slot(*args)
+        return guarded
 
     def start_voice_input(self):
         """Start ASR recording"""
+        # Barge-in: 用户开始说话时立即放弃正在进行的回答，释放网络与推理资源
+        if self.is_turn_in_progress():
+            logger.info(f"Barge-in, cancelling turn {self.turn_id}")
+            self.cancel_turn()
+            self.controller.audio_output_stopped.emit()
         if self.ASRWorker:
             self.ASRWorker.start_recording()
 
     def stop_voice_input(self):
         """Stop ASR recording"""
         if self.ASRWorker:
-            self.ASRWorker.stop_recording()
+            # 松开按键即为语音回合的起点，识别、LLM、TTS 的延迟都相对这一刻计算
+            self.finish_asr_trace("superseded")
+            self.asr_trace = tracer.start("voice")
+            self.ASRWorker.stop_recording(self.asr_trace)
 
     def on_recording_started(self):
         self.status_update.emit("asr-listening")
@@ -176,13 +326,16 @@ class AIManager(QObject):
     def on_speech_recognized(self, text: str):
         if not text:
             self.status_update.emit("asr-invalid")
+            self.finish_asr_trace("asr-invalid")
             return
         logger.info(f"User said: {text}")
         self.asr_partial_update.emit(text)
         if self.directly_send:
-            self.process_input_text(text)
+            trace, self.asr_trace = self.asr_trace, None
+            self.process_input_text(text, trace)
         else:
             self.status_update.emit("asr-success")
+            self.finish_asr_trace("asr-only")
 
     def set_voice_directly_mode(self, enabled: bool):
         self.directly_send = enabled
@@ -195,59 +348,51 @@ class AIManager(QObject):
             self.audio_device = None
         self.audio_buffer.clear()
 
-    def call_success_handler(self, content: str):
-        emotion = "normal"
-        text_content = content
-        text_lang = "zh"
-        self.is_tts_fully_downloaded = False
-        try:
-            # Attempt to clean potential markdown wrappers
-            clean_content = content.replace("```json", "").replace("```", "").strip()
-            # Try to find JSON object if there's extra text
-            json_match = re.search(r'\{.*\}', clean_content, re.DOTALL)
-            if json_match:
-                clean_content = json_match.group(0)
-
-            data = json.loads(clean_content)
-            if isinstance(data, dict):
-                emotion = data.get("emotion", "shy")
-                logger.info(f"Parsed emotion: {emotion}")
-                text_content = data.get("text", content)
-                text_lang = data.get("text_lang")
-        except Exception as e:
-            logger.error(f"JSON Parse Error: {e}, using raw content.")
-
-        self.emotion_from_response = emotion if (emotion in self.Expressions) else "normal"
-        # Filter out text in brackets for TTS
-        # Matches (text) or （text）
-        tts_text = re.sub(r'[（\(].*?[）\)]', '', text_content)
-        # Start typewriter effect
-        self.typing_index = 0
-        self.text_response_lang = text_lang
-        self.text_response = text_content
-
+    def create_subtitles(self, text: str, text_ends: Optional[list[int]] = None) -> SubtitleTimeline:
+        ms_per_char = self.typing_speed_map.get(self.text_response_lang, 100)
+        return SubtitleTimeline(text, text_ends or [len(text)], chars_per_second=1000 / ms_per_char)
+
+    def on_segment_started(self, index: int):
+        """引擎开始输出下一段 TTS 音频，字幕时间线进入下一段"""
+        if self.subtitles is not None:
+            self.subtitles.next_cue()
+
+    def on_segment_audio_setup(self, sample_rate: int, channels: int, sample_size: int):
+        audio_format = (sample_rate, channels, sample_size)
+        if self.turn_audio_format is None:
+            self.turn_audio_format = audio_format
+            self.init_audio_output(sample_rate, channels, sample_size)
+        elif audio_format != self.turn_audio_format:
+            logger.warning(f"TTS segment format {audio_format} differs from {self.turn_audio_format}")
+
+    def on_turn_failed(self, stage: str, message: str):
+        if stage == "llm":
+            self.call_error_handler(message)
+        else:
+            self.on_tts_error(message)
 
-        # Start TTS
-        ref_path = self.tts_init_info.get("ref_sound_path")
-        prompt_text = self.tts_init_info.get("prompt_text")
+    def on_tts_error(self, error_msg: str):
+        """还没有任何音频开始播放时 TTS 失败：与原先一致，只显示文字"""
+        logger.error(f"TTS Error: {error_msg}")
+        self.status_update.emit("tts-error")
+        self.finish_trace("tts-error")
+        self.startTypingEffect()
 
-        try:
+    def call_success_handler(self, reply: Reply, text_ends: list[int]):
+        """引擎已解析出回复 (或命中缓存)，随后按段到达 TTS 音频"""
+        self.emotion_from_response = reply.emotion if (reply.emotion in self.Expressions) else "normal"
+        self.typing_index = 0
+        self.text_response_lang = reply.text_lang
+        self.text_response = reply.text
+        self.is_tts_fully_downloaded = False
+        if not reply.cached:
             self.status_update.emit("tts-synthesizing")
-            self.TTSWorker = TTSWorker(tts_text, ref_path, prompt_text, text_lang)
-            self.TTSWorker.audio_setup.connect(self.init_audio_output)
-            self.TTSWorker.audio_data.connect(self.feed_audio_data)
-            self.TTSWorker.stream_finished.connect(self.on_tts_stream_finished)
-            self.TTSWorker.error.connect(lambda e: logger.error(f"TTS Error: {e}"))
-            self.TTSWorker.error.connect(lambda : self.status_update.emit("tts-error"))
-            self.TTSWorker.error.connect(lambda : self.startTypingEffect())
-            self.TTSWorker.start()
-        except Exception:
-            logger.error("TTS Starting error, only output response.")
-
+        self.subtitles = self.create_subtitles(reply.text, text_ends)
 
     def call_error_handler(self, error_msg: str):
         logger.error(f"LLM Call Error:{error_msg}")
         self.status_update.emit("llm-error")
+        self.finish_trace("llm-error")
         if len(self.Expressions) > 4:
             self.controller.call_state_changed.emit(self.Expressions[4]) # 'umbrella_close' or error exp
 
@@ -266,11 +411,7 @@ class AIManager(QObject):
         format.setByteOrder(QAudioFormat.LittleEndian)
         format.setSampleType(QAudioFormat.SignedInt)
 
-        info = QAudioDeviceInfo.defaultOutputDevice()
-        if not info.isFormatSupported(format):
-            format = info.nearestFormat(format)
-
-        self.audio_output = QAudioOutput(format, self)
+        self.audio_output = self.audio_output_factory(format, self)
         self.audio_output.stateChanged.connect(self.on_audio_state_changed)
 
         buffer_duration = 0.2
@@ -278,26 +419,27 @@ class AIManager(QObject):
         self.audio_output.setBufferSize(buffer_size)
 
         self.audio_device = self.audio_output.start()
+        if self.trace:
+            self.trace.mark("audio.start")
 
         self.audio_buffer.clear()
         self.audio_timer.start()
         self.startTypingEffect()
 
-    def startTypingEffect(self, text: str = None):
-        """开始打字机效果"""
+    def startTypingEffect(self, text: str = None, subtitles: Optional[SubtitleTimeline] = None):
+        """开始打字机效果 (text 不为 None 时为点击台词，跟随点击音效的时钟)"""
         target_text = text if text is not None else self.text_response
-        typing_speed = self.typing_speed_map.get(self.text_response_lang, 100) # zh 100 en 50 ja 80
         self.current_typing_text = target_text
         self.typing_index = 0
+        self.typing_for_tap = text is not None
+        self.typing_subtitles = subtitles if subtitles is not None else self.subtitles
 
         self.response_ready.emit(target_text)
+        if text is None and self.trace:
+            self.trace.mark("text.shown")
 
-        if self.typewriter_timer:
-            self.typewriter_timer.stop()
-
-        self.typewriter_timer = QTimer(self)
-        self.typewriter_timer.timeout.connect(self.typewriteEffect)
-        self.typewriter_timer.start(typing_speed)
+        self.typing_clock.start()
+        self.typewriter_timer.start()
 
         # Only trigger emotion change if using internal LLM response (text is None)
         if text is None:
@@ -306,18 +448,25 @@ class AIManager(QObject):
     def on_tts_stream_finished(self):
         logger.info("AIManager: TTS Data Stream Download Complete.")
         self.is_tts_fully_downloaded = True
+        if self.subtitles is not None:
+            self.subtitles.finish()
         if self.audio_output and self.audio_output.state() == QAudio.IdleState and len(self.audio_buffer) == 0:
             self.status_update.emit("idle")
             self.controller.audio_output_stopped.emit()
+            self.finish_trace("ok")
 
     def on_audio_state_changed(self, state):
         if state == QAudio.IdleState and len(self.audio_buffer) == 0:
             if self.is_tts_fully_downloaded:
                 self.status_update.emit("idle")
                 self.controller.audio_output_stopped.emit()
+                self.finish_trace("ok")
             self.controller.lip_sync_state_changed.emit(0.0, self.lip_sync)
 
     def feed_audio_data(self, data: bytes):
+        if self.subtitles is not None and self.turn_audio_format is not None:
+            sample_rate, channels, sample_size = self.turn_audio_format
+            self.subtitles.add_audio(len(data) / (sample_rate * channels * (sample_size // 8)))
         self.audio_buffer.extend(data)
         self.process_audio_queue()
 
@@ -335,46 +484,74 @@ class AIManager(QObject):
                 rms = audioop.rms(data_to_write, self.sample_width)
                 mouth_open = min(1.0, rms / 10000.0)
                 self.controller.lip_sync_state_changed.emit(mouth_open, self.lip_sync)
+                if self.trace and mouth_open > 0:
+                    self.trace.mark("lipsync.first")
             except Exception:
                 pass
 
             written = self.audio_device.write(bytes(data_to_write))
             if written > 0:
                 del self.audio_buffer[:written]
+                if self.trace:
+                    self.trace.mark("audio.first_write")
+
+    def audio_clock(self) -> Optional[float]:
+        """打字机跟随的音频已播放的秒数，没有音频时返回 None"""
+        if self.typing_for_tap:
+            voice = self.tap_voice
+            if voice is None or voice.clip is None:
+                return None
+            # 音效已播完 (或被打断) 时直接显示全文
+            return voice.position() if voice.is_active() else voice.clip.duration
+        if self.audio_output is None or self.turn_audio_format is None or self.typing_subtitles is None:
+            return None
+        if self.is_tts_fully_downloaded and self.audio_output.state() != QAudio.ActiveState \
+                and len(self.audio_buffer) == 0:
+            return self.typing_subtitles.received
+        return self.audio_output.processedUSecs() / 1_000_000
+
+    def typing_target(self) -> int:
+        """按字幕时间线把播放时钟换算为应显示的字符数；没有音频 (TTS 失败等) 时按 typing_speed_map 的字速"""
+        played = self.audio_clock()
+        if played is None or self.typing_subtitles is None:
+            ms_per_char = self.typing_speed_map.get(self.text_response_lang, 100)  # zh 100 en 50 ja 80
+            return self.typing_clock.elapsed() // ms_per_char
+        return self.typing_subtitles.chars_at(played)
 
     def typewriteEffect(self):
-        if self.typing_index <= len(self.current_typing_text):
-            # Emit just the substring to display
-            current_text = self.current_typing_text[: self.typing_index]
-            self.typing_update.emit(current_text)
-            self.typing_index += 1
-        else:
-            if self.typewriter_timer:
-                self.typewriter_timer.stop()
+        total = len(self.current_typing_text)
+        target = min(total, self.typing_target())
+        if target > self.typing_index:
+            self.typing_index = target
+            self.typing_progress.emit(target)
+        if self.typing_index >= total:
+            self.typewriter_timer.stop()
             self.typing_finished.emit()
 
     def tap_handler(self, sound_path: str, text: str):
         if not sound_path:
             return
-        sound_path = os.path.join(resources.RESOURCES_DIRECTORY, sound_path)
-        if not os.path.exists(sound_path):
-            logger.error(f"Tap sound not found: {sound_path}")
+        clip: Optional[SoundClip] = self.sound_bank.get(sound_path)
+        if clip is None:
             return
-        self._tap_sound.setSource(QUrl.fromLocalFile(sound_path))
-        self._tap_sound.setLoopCount(1)
-        self._tap_sound.setVolume(1.0)
-        self._tap_sound.play()
-        self.wav_handler.Start(sound_path)
+        self.tap_voice = self.tap_voices.play(clip)
         self.wav_timer.start()
         self.status_update.emit("tts-success")
-        self.startTypingEffect(text)
+        # 点击台词只有一段，音频时长已知
+        subtitles = self.create_subtitles(text)
+        subtitles.next_cue()
+        subtitles.add_audio(clip.duration)
+        subtitles.finish()
+        self.startTypingEffect(text, subtitles)
 
 
     def process_wav_lipsync(self):
-        if self.wav_handler.Update():
-            rms = self.wav_handler.GetRms()
+        voice = self.tap_voice
+        if voice is not None and voice.is_active():
+            rms = voice.clip.rms_at(voice.position())
             self.controller.lip_sync_state_changed.emit(rms, self.lip_sync * 2)
         else:
+            self.tap_voice = None
             self.wav_timer.stop()
             self.status_update.emit("idle")
             self.controller.audio_output_stopped.emit()
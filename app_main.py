@@ -1,12 +1,15 @@
+from utils.startup import timeline  # 尽早导入，作为冷启动计时起点
+from utils import import_profiler
+IMPORT_PROFILING = import_profiler.install_if_enabled()  # IMPORT_PROFILE=1 或 --profile-imports
 import sys
 import os
 import traceback
 from PyQt5.QtWidgets import QApplication, QMessageBox
 from PyQt5.QtGui import QIcon
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QTimer
 import live2d.v3 as live2d
-from mainwindow import MainWindow
 from utils.resources import RESOURCES_DIRECTORY, ENV_PATH # Import ENV_PATH
+from utils.logger_setup import configure_logging
 from dotenv import load_dotenv # Import load_dotenv
 
 # App入口
@@ -37,6 +40,10 @@ def exception_hook(exctype, value, tb):
 
 def main():
     sys.excepthook = exception_hook
+    timeline.mark("app.imports_done")
+    if IMPORT_PROFILING:
+        # 启动完成时 (含后台线程中的延迟导入) 输出按子系统汇总的导入耗时
+        timeline.on_complete(lambda: print(import_profiler.profiler.report()))
 
     # Load environment variables explicitly
     if ENV_PATH:
@@ -44,10 +51,17 @@ def main():
         load_dotenv(ENV_PATH)
     else:
         print("Warning: .env file not found!")
+    configure_logging()  # 日志级别、JSONL 输出等取自 .env
+    timeline.mark("app.env_loaded")
+
+    # 各模块在导入时读取环境变量，必须在 .env 加载之后再导入
+    with timeline.span("app.import_mainwindow"):
+        from mainwindow import MainWindow
 
     # live2d init might fail if dll missing
     try:
-        live2d.init()
+        with timeline.span("app.live2d_init"):
+            live2d.init()
     except Exception as e:
         print(f"Failed to init Live2D: {e}")
         # Let the hook catch it or handle gracefully
@@ -64,6 +78,9 @@ def main():
         QApplication.setHighDpiScaleFactorRoundingPolicy(
             Qt.HighDpiScaleFactorRoundingPolicy.PassThrough)
 
+    # 多个 GL 画布共享一个上下文组，合成着色器只编译一次
+    QApplication.setAttribute(Qt.AA_ShareOpenGLContexts)
+
     app = QApplication(sys.argv)
 
     # 设置应用图标 (任务栏图标)
@@ -71,12 +88,18 @@ def main():
     if os.path.exists(icon_path):
         app.setWindowIcon(QIcon(icon_path))
 
-    main_window = MainWindow()
+    with timeline.span("app.mainwindow_built"):
+        main_window = MainWindow()
     main_window.show()
+    timeline.mark("app.window_shown")
+    import_profiler.profiler.checkpoint("window_shown")
+    # 先让窗口外壳完成首次绘制，再启动 ASR 与后端预热
+    QTimer.singleShot(0, main_window.ai_manager.start_background_init)
 
     try:
         app.exec()
     finally:
+        main_window.ai_manager.shutdown()
         live2d.dispose()
 
 
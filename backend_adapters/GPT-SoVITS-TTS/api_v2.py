@@ -7,6 +7,9 @@
     `-a` - `绑定地址, 默认"127.0.0.1"`
     `-p` - `绑定端口, 默认9880`
     `-c` - `TTS配置文件路径, 默认"GPT_SoVITS/configs/tts_infer.yaml"`
+    `--weight_pool_size` - `常驻内存的权重组数量(LRU淘汰), 默认2`
+    `--workers` - `推理进程数量, 默认1; 大于1时本进程作为监督者, 只负责监听端口并把请求转发给负载最低的推理进程`
+    `--threads_per_worker` - `每个推理进程的 CPU 线程数, 默认按 CPU 核数均分`
 
 ## 调用:
 
@@ -44,6 +47,8 @@ POST:
     "streaming_mode": False,      # bool or int. return audio chunk by chunk.T he available options are: 0,1,2,3 or True/False (0/False: Disabled | 1/True: Best Quality, Slowest response speed (old version streaming_mode) | 2: Medium Quality, Slow response speed | 3: Lower Quality, Faster response speed )
     "overlap_length": 2,          # int. overlap length of semantic tokens for streaming mode.
     "min_chunk_length": 16,       # int. The minimum chunk length of semantic tokens for streaming mode. (affects audio chunk size)
+    "gpt_weights_path": "",       # str.(optional) GPT weights used for this request, defaults to the current default weights
+    "sovits_weights_path": "",    # str.(optional) SoVITS weights used for this request, defaults to the current default weights
 }
 ```
 
@@ -51,12 +56,14 @@ RESP:
 成功: 直接返回 wav 音频流， http code 200
 失败: 返回包含错误信息的 json, http code 400
 
+注: 请求指定的权重组合若不在权重池中，会先加载(不影响其他请求)，池满时按 LRU 淘汰非默认权重。
+
 ### 命令控制
 
 endpoint: `/control`
 
 command:
-"restart": 重新运行
+"restart": 重新运行 (多进程模式下逐个滚动重启推理进程，监听端口不中断)
 "exit": 结束运行
 
 GET:
@@ -99,25 +106,58 @@ RESP:
 成功: 返回"success", http code 200
 失败: 返回包含错误信息的 json, http code 400
 
+注: 切换权重会先在后台预加载到权重池，加载完成后原子替换默认权重；加载期间合成不受阻塞，进行中的请求继续使用旧权重。
+
+### 预加载权重
+
+endpoint: `/preload_weights`
+
+GET:
+```
+http://127.0.0.1:9880/preload_weights?gpt_weights_path=xxx.ckpt&sovits_weights_path=xxx.pth
+```
+RESP:
+成功: 返回"success", http code 200 (权重进入权重池，但不改变默认权重)
+失败: 返回包含错误信息的 json, http code 400
+
+### 运行指标
+
+endpoint: `/metrics`
+
+GET:
+```
+http://127.0.0.1:9880/metrics
+```
+RESP: Prometheus 文本格式，包括请求数 (按结果)、进行中/排队中的请求数、排队等待时间、推理耗时、
+首个音频块延迟 (流式)、合成的音频时长、实时率 (推理耗时/音频时长) 以及模型与权重加载耗时。
+多进程模式下由监督进程汇总各推理进程的指标，并附加 `worker` 标签。
+
 """
 
 import os
 import sys
 import traceback
-from typing import Generator, Union
+import copy
+from collections import OrderedDict
+from typing import Generator, Optional, Tuple, Union
 
 now_dir = os.getcwd()
 sys.path.append(now_dir)
 sys.path.append("%s/GPT_SoVITS" % (now_dir))
 
 import argparse
+import asyncio
+import bisect
 import subprocess
+import time
 import wave
 import signal
 import numpy as np
 import soundfile as sf
-from fastapi import FastAPI, Response
+from fastapi import FastAPI, Request, Response
 from fastapi.responses import StreamingResponse, JSONResponse
+from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
 import uvicorn
 from io import BytesIO
 from tools.i18n.i18n import I18nAuto
@@ -126,6 +166,118 @@ from GPT_SoVITS.TTS_infer_pack.text_segmentation_method import get_method_names
 from pydantic import BaseModel
 import threading
 
+# ---- /metrics: Prometheus 文本格式的运行指标 ----
+# 适配器会被单独复制到后端项目中运行，因此不依赖 prometheus_client，这里只实现用到的三种指标。
+# 每个指标自带一把锁，更新只是几次加法；渲染时复制快照，不阻塞请求路径。
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0)
+RTF_BUCKETS = (0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 1.5, 2.0, 5.0)
+
+
+def _label_text(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in sorted(labels.items())) + "}"
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self._lock = threading.Lock()
+        self._values: dict = {}
+
+    def header(self) -> list:
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, value: float = 1.0, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + value
+
+    def render(self) -> list:
+        with self._lock:
+            values = dict(self._values)
+        return self.header() + [f"{self.name}{_label_text(dict(k))} {v:g}" for k, v in values.items()]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[tuple(sorted(labels.items()))] = value
+
+    def dec(self, value: float = 1.0, **labels):
+        self.inc(-value, **labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, **labels):
+        index = bisect.bisect_left(self.buckets, value)
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def render(self) -> list:
+        with self._lock:
+            values = {k: (list(counts), total, count) for k, (counts, total, count) in self._values.items()}
+        lines = self.header()
+        for key, (counts, total, count) in values.items():
+            labels = dict(key)
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += bucket_count
+                lines.append(f"{self.name}_bucket{_label_text({**labels, 'le': bound})} {cumulative}")
+            lines.append(f"{self.name}_sum{_label_text(labels)} {total:g}")
+            lines.append(f"{self.name}_count{_label_text(labels)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics: list = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+METRICS = MetricsRegistry()
+tts_requests = METRICS.register(Counter("tts_requests_total", "TTS requests by result"))
+tts_in_flight = METRICS.register(Gauge("tts_requests_in_flight", "Requests currently generating audio"))
+tts_queued = METRICS.register(Gauge("tts_requests_queued", "Requests waiting for weights or an inference thread"))
+tts_queue_wait = METRICS.register(Histogram("tts_queue_wait_seconds", "Request arrival to start of inference"))
+tts_inference = METRICS.register(Histogram("tts_inference_seconds", "Time spent generating audio per request"))
+tts_first_chunk = METRICS.register(Histogram("tts_first_chunk_seconds", "Request arrival to first audio chunk (streaming)"))
+tts_audio_seconds = METRICS.register(Counter("tts_audio_seconds_total", "Seconds of audio synthesized"))
+tts_rtf = METRICS.register(Histogram("tts_real_time_factor", "Inference time / audio duration per request", RTF_BUCKETS))
+tts_model_load = METRICS.register(Gauge("tts_model_load_seconds", "Duration of the last model/weights load"))
+tts_weight_loads = METRICS.register(Counter("tts_weight_loads_total", "Weight sets loaded into the pool"))
+
 # print(sys.path)
 i18n = I18nAuto()
 cut_method_names = get_cut_method_names()
@@ -134,6 +286,10 @@ parser = argparse.ArgumentParser(description="GPT-SoVITS api")
 parser.add_argument("-c", "--tts_config", type=str, default="GPT_SoVITS/configs/tts_infer.yaml", help="tts_infer路径")
 parser.add_argument("-a", "--bind_addr", type=str, default="127.0.0.1", help="default: 127.0.0.1")
 parser.add_argument("-p", "--port", type=int, default="9980", help="default: 9980")
+parser.add_argument("--weight_pool_size", type=int, default=2, help="常驻内存的权重组数量, default: 2")
+parser.add_argument("--workers", type=int, default=1, help="推理进程数量, default: 1")
+parser.add_argument("--threads_per_worker", type=int, default=0, help="每个推理进程的CPU线程数, default: 按核数均分")
+parser.add_argument("--worker_mode", action="store_true", help=argparse.SUPPRESS)  # 由监督进程启动推理进程时使用
 args = parser.parse_args()
 config_path = args.tts_config
 # device = args.device
@@ -144,9 +300,129 @@ argv = sys.argv
 if config_path in [None, ""]:
     config_path = "GPT-SoVITS/configs/tts_infer.yaml"
 
+SUPERVISOR_MODE = args.workers > 1 and not args.worker_mode
+
 tts_config = TTS_Config(config_path)
 print(tts_config)
-tts_pipeline = TTS(tts_config)
+if args.worker_mode and args.threads_per_worker > 0:
+    import torch
+
+    torch.set_num_threads(args.threads_per_worker)
+_load_start = time.perf_counter()
+tts_pipeline = None if SUPERVISOR_MODE else TTS(tts_config)
+if tts_pipeline is not None:
+    tts_model_load.set(time.perf_counter() - _load_start, stage="pipeline")
+
+
+class TTSWeightPool:
+    """
+    常驻内存的 T2S/VITS 权重池，按 LRU 淘汰。
+    每组权重对应一个浅拷贝的 TTS 管线：BERT/CNHuBERT 等公共模型共享，只替换 t2s_model 与 vits_model。
+    管线一旦交给请求便不再修改，切换默认权重只是原子地替换默认键，进行中的请求继续使用旧管线。
+    """
+
+    def __init__(self, base: TTS, capacity: int = 2):
+        self.capacity = max(1, capacity)
+        self._lock = threading.Lock()
+        self._pipelines: "OrderedDict[Tuple[str, str], TTS]" = OrderedDict()
+        self._loading: dict = {}
+        self._default_key = self._key_of(base)
+        self._pipelines[self._default_key] = base
+
+    @staticmethod
+    def _key_of(pipeline: TTS) -> Tuple[str, str]:
+        return pipeline.configs.t2s_weights_path, pipeline.configs.vits_weights_path
+
+    def resolve_key(self, gpt_weights_path: Optional[str] = None, sovits_weights_path: Optional[str] = None):
+        default_gpt, default_sovits = self._default_key
+        return gpt_weights_path or default_gpt, sovits_weights_path or default_sovits
+
+    def default(self) -> TTS:
+        with self._lock:
+            return self._pipelines[self._default_key]
+
+    def resident_keys(self) -> list:
+        with self._lock:
+            return list(self._pipelines.keys())
+
+    def get(self, gpt_weights_path: Optional[str] = None, sovits_weights_path: Optional[str] = None) -> TTS:
+        """获取指定权重组合的管线，不在池中时加载。会阻塞，需在线程池中调用。"""
+        key = self.resolve_key(gpt_weights_path, sovits_weights_path)
+        while True:
+            with self._lock:
+                pipeline = self._pipelines.get(key)
+                if pipeline is not None:
+                    self._pipelines.move_to_end(key)
+                    return pipeline
+                event = self._loading.get(key)
+                is_owner = event is None
+                if is_owner:
+                    event = threading.Event()
+                    self._loading[key] = event
+                    base = self._closest_locked(key)
+            if not is_owner:
+                # 同一组权重正在被其他请求加载，等待后重新检查 (加载失败时会由本请求重试并抛出异常)
+                event.wait()
+                continue
+            try:
+                pipeline = self._load(base, key)
+                with self._lock:
+                    self._pipelines[key] = pipeline
+                    self._evict_locked(protect=key)
+                return pipeline
+            finally:
+                with self._lock:
+                    self._loading.pop(key, None)
+                event.set()
+
+    def switch_default(self, gpt_weights_path: Optional[str] = None, sovits_weights_path: Optional[str] = None):
+        """预加载新的权重组合，完成后原子替换默认权重。"""
+        key = self.resolve_key(gpt_weights_path, sovits_weights_path)
+        pipeline = self.get(*key)
+        with self._lock:
+            self._pipelines[key] = pipeline
+            self._pipelines.move_to_end(key)
+            self._default_key = key
+            self._evict_locked()
+
+    def _closest_locked(self, key: Tuple[str, str]) -> TTS:
+        """选择与目标权重重合最多的常驻管线作为拷贝基础，减少需要加载的权重。"""
+        best = self._pipelines[self._default_key]
+        best_score = -1
+        for resident_key, pipeline in self._pipelines.items():
+            score = (resident_key[0] == key[0]) + (resident_key[1] == key[1])
+            if score > best_score:
+                best, best_score = pipeline, score
+        return best
+
+    def _evict_locked(self, protect: Optional[Tuple[str, str]] = None):
+        while len(self._pipelines) > self.capacity:
+            victim = next((k for k in self._pipelines if k not in (self._default_key, protect)), None)
+            if victim is None:
+                break
+            self._pipelines.pop(victim)
+            print(f"[WeightPool] evicted {victim}")
+
+    @staticmethod
+    def _load(base: TTS, key: Tuple[str, str]) -> TTS:
+        gpt_weights_path, sovits_weights_path = key
+        print(f"[WeightPool] loading gpt={gpt_weights_path}, sovits={sovits_weights_path}")
+        start = time.perf_counter()
+        pipeline = copy.copy(base)
+        pipeline.configs = copy.copy(base.configs)
+        pipeline.prompt_cache = copy.deepcopy(base.prompt_cache)
+        if gpt_weights_path != base.configs.t2s_weights_path:
+            pipeline.init_t2s_weights(gpt_weights_path)
+        if sovits_weights_path != base.configs.vits_weights_path:
+            pipeline.init_vits_weights(sovits_weights_path)
+            # 参考音频特征与 VITS 版本相关，强制下次推理时重新提取
+            pipeline.prompt_cache["ref_audio_path"] = None
+        tts_model_load.set(time.perf_counter() - start, stage="weights")
+        tts_weight_loads.inc()
+        return pipeline
+
+
+weight_pool = None if SUPERVISOR_MODE else TTSWeightPool(tts_pipeline, args.weight_pool_size)
 
 APP = FastAPI()
 
@@ -176,6 +452,8 @@ class TTS_Request(BaseModel):
     super_sampling: bool = False
     overlap_length: int = 2
     min_chunk_length: int = 16
+    gpt_weights_path: str = None
+    sovits_weights_path: str = None
 
 
 def pack_ogg(io_buffer: BytesIO, data: np.ndarray, rate: int):
@@ -345,6 +623,84 @@ def check_params(req: dict):
     return None
 
 
+class QueueTicket:
+    """tts_queued 中的一个名额；开始推理或请求以任何方式结束时离开队列，多次调用 leave 只减一次。"""
+
+    def __init__(self):
+        self.waiting = True
+        tts_queued.inc()
+
+    def leave(self):
+        if self.waiting:
+            self.waiting = False
+            tts_queued.dec()
+
+
+class GuardedStreamingResponse(StreamingResponse):
+    """
+    流式响应结束后必定调用 release (异步函数)：正常发送完毕、客户端提前断开、
+    甚至还没开始迭代 body 就失败时都会调用，用于释放生成器之外持有的资源和计数。
+    """
+
+    def __init__(self, content, release, **kwargs):
+        super().__init__(content, **kwargs)
+        self.release = release
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            if hasattr(self.body_iterator, "aclose"):
+                await self.body_iterator.aclose()
+            await self.release()
+
+
+def measured_generator(tts_generator: Generator, arrived: float, streaming_mode: bool, ticket: QueueTicket):
+    """
+    包装推理生成器，统计排队时间、推理耗时、首块延迟、音频时长与实时率。
+    推理在 starlette 的线程池中逐块进行，只累计 next() 内的耗时，不含客户端读取的时间。
+    排队名额由调用方持有: 生成器可能一次都没被迭代 (客户端在响应开始前断开)，此时这里的代码不会运行。
+    """
+    queued = True
+    inference = 0.0
+    audio = 0.0
+    status = "cancelled"  # 生成器未跑完就被关闭: 客户端断开 (打断/取消)
+    tts_in_flight.inc()
+    try:
+        while True:
+            start = time.perf_counter()
+            if queued:
+                queued = False
+                ticket.leave()
+                tts_queue_wait.observe(start - arrived)
+            try:
+                sr, chunk = next(tts_generator)
+            except StopIteration:
+                status = "ok"
+                break
+            now = time.perf_counter()
+            inference += now - start
+            if streaming_mode and audio == 0.0:
+                tts_first_chunk.observe(now - arrived)
+            audio += len(chunk) / sr
+            if not streaming_mode:
+                status = "ok"  # 非流式只产出一次完整音频
+            yield sr, chunk
+    except Exception:
+        status = "error"
+        raise
+    finally:
+        # 提前关闭时同时结束推理生成器，释放 GPU
+        tts_generator.close()
+        ticket.leave()
+        tts_in_flight.dec()
+        tts_requests.inc(status=status)
+        if audio > 0:
+            tts_inference.observe(inference)
+            tts_audio_seconds.inc(audio)
+            tts_rtf.observe(inference / audio)
+
+
 async def tts_handle(req: dict):
     """
     Text to speech handler.
@@ -375,6 +731,8 @@ async def tts_handle(req: dict):
                 "streaming_mode": False,      # bool or int. return audio chunk by chunk.T he available options are: 0,1,2,3 or True/False (0/False: Disabled | 1/True: Best Quality, Slowest response speed (old version streaming_mode) | 2: Medium Quality, Slow response speed | 3: Lower Quality, Faster response speed )
                 "overlap_length": 2,          # int. overlap length of semantic tokens for streaming mode.
                 "min_chunk_length": 16,       # int. The minimum chunk length of semantic tokens for streaming mode. (affects audio chunk size)
+                "gpt_weights_path": "",       # str.(optional) GPT weights for this request.
+                "sovits_weights_path": "",    # str.(optional) SoVITS weights for this request.
             }
     returns:
         StreamingResponse: audio stream response.
@@ -384,8 +742,10 @@ async def tts_handle(req: dict):
     return_fragment = req.get("return_fragment", False)
     media_type = req.get("media_type", "wav")
 
+    arrived = time.perf_counter()
     check_res = check_params(req)
     if check_res is not None:
+        tts_requests.inc(status="bad_request")
         return check_res
     
     if streaming_mode == 0:
@@ -406,6 +766,7 @@ async def tts_handle(req: dict):
         fixed_length_chunk = True
 
     else:
+        tts_requests.inc(status="bad_request")
         return JSONResponse(status_code=400, content={"message": f"the value of streaming_mode must be 0, 1, 2, 3(int) or true/false(bool)"})
 
     req["streaming_mode"] = streaming_mode
@@ -417,37 +778,69 @@ async def tts_handle(req: dict):
     streaming_mode = streaming_mode or return_fragment
 
 
+    ticket = QueueTicket()
+    try:
+        pipeline = await run_in_threadpool(
+            weight_pool.get, req.get("gpt_weights_path"), req.get("sovits_weights_path")
+        )
+    except Exception as e:
+        ticket.leave()
+        tts_requests.inc(status="error")
+        return JSONResponse(status_code=400, content={"message": "load weights failed", "Exception": str(e)})
+
     try:
-        tts_generator = tts_pipeline.run(req)
+        tts_generator = measured_generator(pipeline.run(req), arrived, streaming_mode, ticket)
 
         if streaming_mode:
 
             def streaming_generator(tts_generator: Generator, media_type: str):
                 if_frist_chunk = True
-                for sr, chunk in tts_generator:
-                    if if_frist_chunk and media_type == "wav":
-                        yield wave_header_chunk(sample_rate=sr)
-                        media_type = "raw"
-                        if_frist_chunk = False
-                    yield pack_audio(BytesIO(), chunk, sr, media_type).getvalue()
+                try:
+                    for sr, chunk in tts_generator:
+                        if if_frist_chunk and media_type == "wav":
+                            yield wave_header_chunk(sample_rate=sr)
+                            media_type = "raw"
+                            if_frist_chunk = False
+                        yield pack_audio(BytesIO(), chunk, sr, media_type).getvalue()
+                finally:
+                    # 客户端断开 (取消/打断) 时立即结束推理生成器，释放 GPU
+                    tts_generator.close()
+
+            async def release():
+                if ticket.waiting:
+                    tts_requests.inc(status="cancelled")  # 推理还没开始客户端就断开了
+                ticket.leave()
 
             # _media_type = f"audio/{media_type}" if not (streaming_mode and media_type in ["wav", "raw"]) else f"audio/x-{media_type}"
-            return StreamingResponse(
+            return GuardedStreamingResponse(
                 streaming_generator(
                     tts_generator,
                     media_type,
                 ),
+                release,
                 media_type=f"audio/{media_type}",
             )
 
         else:
             sr, audio_data = next(tts_generator)
+            tts_generator.close()
             audio_data = pack_audio(BytesIO(), audio_data, sr, media_type).getvalue()
             return Response(audio_data, media_type=f"audio/{media_type}")
     except Exception as e:
+        ticket.leave()
         return JSONResponse(status_code=400, content={"message": "tts failed", "Exception": str(e)})
 
 
+@APP.get("/health")
+async def health():
+    return JSONResponse(status_code=200, content={"status": "ok"})
+
+
+@APP.get("/metrics")
+async def metrics():
+    return Response(METRICS.render(), media_type="text/plain; version=0.0.4")
+
+
 @APP.get("/control")
 async def control(command: str = None):
     if command is None:
@@ -481,6 +874,8 @@ async def tts_get_endpoint(
     streaming_mode: Union[bool, int] = False,
     overlap_length: int = 2,
     min_chunk_length: int = 16,
+    gpt_weights_path: str = None,
+    sovits_weights_path: str = None,
 ):
     req = {
         "text": text,
@@ -507,6 +902,8 @@ async def tts_get_endpoint(
         "super_sampling": super_sampling,
         "overlap_length": int(overlap_length),
         "min_chunk_length": int(min_chunk_length),
+        "gpt_weights_path": gpt_weights_path,
+        "sovits_weights_path": sovits_weights_path,
     }
     return await tts_handle(req)
 
@@ -520,7 +917,7 @@ async def tts_post_endpoint(request: TTS_Request):
 @APP.get("/set_refer_audio")
 async def set_refer_aduio(refer_audio_path: str = None):
     try:
-        tts_pipeline.set_ref_audio(refer_audio_path)
+        weight_pool.default().set_ref_audio(refer_audio_path)
     except Exception as e:
         return JSONResponse(status_code=400, content={"message": "set refer audio failed", "Exception": str(e)})
     return JSONResponse(status_code=200, content={"message": "success"})
@@ -550,7 +947,7 @@ async def set_gpt_weights(weights_path: str = None):
     try:
         if weights_path in ["", None]:
             return JSONResponse(status_code=400, content={"message": "gpt weight path is required"})
-        tts_pipeline.init_t2s_weights(weights_path)
+        await run_in_threadpool(weight_pool.switch_default, gpt_weights_path=weights_path)
     except Exception as e:
         return JSONResponse(status_code=400, content={"message": "change gpt weight failed", "Exception": str(e)})
 
@@ -562,17 +959,355 @@ async def set_sovits_weights(weights_path: str = None):
     try:
         if weights_path in ["", None]:
             return JSONResponse(status_code=400, content={"message": "sovits weight path is required"})
-        tts_pipeline.init_vits_weights(weights_path)
+        await run_in_threadpool(weight_pool.switch_default, sovits_weights_path=weights_path)
     except Exception as e:
         return JSONResponse(status_code=400, content={"message": "change sovits weight failed", "Exception": str(e)})
     return JSONResponse(status_code=200, content={"message": "success"})
 
 
+@APP.get("/preload_weights")
+async def preload_weights(gpt_weights_path: str = None, sovits_weights_path: str = None):
+    try:
+        if gpt_weights_path in ["", None] and sovits_weights_path in ["", None]:
+            return JSONResponse(status_code=400, content={"message": "gpt or sovits weight path is required"})
+        await run_in_threadpool(weight_pool.get, gpt_weights_path, sovits_weights_path)
+    except Exception as e:
+        return JSONResponse(status_code=400, content={"message": "preload weights failed", "Exception": str(e)})
+    return JSONResponse(status_code=200, content={"message": "success", "resident": weight_pool.resident_keys()})
+
+
+def merge_worker_metrics(worker_texts: list) -> str:
+    """把各推理进程的 /metrics 加上 worker 标签后合并，同名指标的 HELP/TYPE 只保留一份"""
+    families: "OrderedDict[str, Tuple[list, list]]" = OrderedDict()
+    for index, text in worker_texts:
+        family = None
+        for line in text.splitlines():
+            if not line:
+                continue
+            if line.startswith("# "):
+                family = families.setdefault(line.split(" ", 3)[2], ([], []))
+                if line not in family[0]:
+                    family[0].append(line)
+                continue
+            if family is None:
+                continue
+            sample, _, value = line.rpartition(" ")
+            if "{" in sample:
+                sample = sample.replace("{", f'{{worker="{index}",', 1)
+            else:
+                sample = f'{sample}{{worker="{index}"}}'
+            family[1].append(f"{sample} {value}")
+    lines = []
+    for header, samples in families.values():
+        lines.extend(header)
+        lines.extend(samples)
+    return "\n".join(lines) + "\n" if lines else ""
+
+
+class TTSWorkerProcess:
+    """监督模式下的单个推理进程：独立的 TTS 实例、固定的线程数和仅本机可见的端口。"""
+
+    RESPAWN_BACKOFF_BASE = 1.0  # 连续崩溃时的重启等待: 1s, 2s, 4s ... 上限 RESPAWN_BACKOFF_MAX
+    RESPAWN_BACKOFF_MAX = 60.0
+    STABLE_SECONDS = 60.0  # 运行超过该时长后再崩溃，重新从最短等待开始计算
+
+    def __init__(self, index: int, worker_port: int, threads: int):
+        self.index = index
+        self.port = worker_port
+        self.threads = threads
+        self.base_url = f"http://127.0.0.1:{worker_port}"
+        self.process: Optional[subprocess.Popen] = None
+        self.in_flight = 0
+        self.healthy = False
+        self.draining = False
+        self.restarting = False
+        self.started_at = 0.0
+        self.crashes = 0
+        self.respawn_at: Optional[float] = None
+
+    def next_respawn_delay(self, now: float) -> float:
+        """记录一次崩溃，返回重启前应等待的秒数 (首次崩溃立即重启)"""
+        if now - self.started_at > self.STABLE_SECONDS:
+            self.crashes = 0
+        delay = 0.0 if self.crashes == 0 else min(self.RESPAWN_BACKOFF_MAX,
+                                                    self.RESPAWN_BACKOFF_BASE * 2 ** (self.crashes - 1))
+        self.crashes += 1
+        return delay
+
+    def spawn(self):
+        cmd = [
+            sys.executable, os.path.abspath(argv[0]),
+            "-c", config_path,
+            "-a", "127.0.0.1",
+            "-p", str(self.port),
+            "--weight_pool_size", str(args.weight_pool_size),
+            "--threads_per_worker", str(self.threads),
+            "--worker_mode",
+        ]
+        env = dict(os.environ)
+        env["OMP_NUM_THREADS"] = str(self.threads)
+        env["MKL_NUM_THREADS"] = str(self.threads)
+        self.healthy = False
+        self.started_at = time.monotonic()
+        self.process = subprocess.Popen(cmd, cwd=now_dir, env=env)
+        print(f"[Supervisor] worker {self.index} started, pid={self.process.pid}, port={self.port}")
+
+    def is_alive(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def terminate(self, timeout: float = 10.0):
+        self.healthy = False
+        if not self.is_alive():
+            return
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+
+    def snapshot(self) -> dict:
+        return {
+            "index": self.index,
+            "port": self.port,
+            "pid": self.process.pid if self.process else None,
+            "alive": self.is_alive(),
+            "healthy": self.healthy,
+            "draining": self.draining,
+            "in_flight": self.in_flight,
+        }
+
+
+def create_router_app() -> FastAPI:
+    """
+    监督模式：本进程持有监听端口，启动 N 个推理进程，并把 /tts 转发给当前进行中请求最少的进程。
+    推理进程崩溃或收到 restart 指令时只重启推理进程，监听端口保持不变。
+    """
+    import httpx
+
+    worker_count = args.workers
+    threads = args.threads_per_worker or max(1, (os.cpu_count() or worker_count) // worker_count)
+    workers = [TTSWorkerProcess(i, port + 1 + i, threads) for i in range(worker_count)]
+    router = FastAPI()
+    state = {"client": None, "monitor": None, "restart": None}
+    background_tasks = set()  # 事件循环只弱引用任务，这里持有引用直到结束
+    router_metrics = MetricsRegistry()
+    forwarded = router_metrics.register(Counter("tts_router_requests_total", "Requests handled by the supervisor"))
+    worker_in_flight = router_metrics.register(Gauge("tts_router_worker_in_flight", "In-flight requests per worker"))
+    worker_healthy = router_metrics.register(Gauge("tts_router_worker_healthy", "1 if the worker passes health checks"))
+
+    async def wait_healthy(worker: TTSWorkerProcess, timeout: float = 600.0) -> bool:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if not worker.is_alive():
+                return False
+            try:
+                resp = await state["client"].get(f"{worker.base_url}/health", timeout=2.0)
+                if resp.status_code == 200:
+                    worker.healthy = True
+                    print(f"[Supervisor] worker {worker.index} ready")
+                    return True
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(1.0)
+        return False
+
+    async def restart_worker(worker: TTSWorkerProcess, drain_timeout: float = 60.0):
+        worker.restarting = True
+        worker.draining = True
+        try:
+            deadline = time.monotonic() + drain_timeout
+            while worker.in_flight > 0 and time.monotonic() < deadline:
+                await asyncio.sleep(0.1)
+            await asyncio.to_thread(worker.terminate)
+            worker.spawn()
+            await wait_healthy(worker)
+        finally:
+            worker.draining = False
+            worker.restarting = False
+
+    async def rolling_restart():
+        for worker in workers:
+            while worker.restarting:  # 正在进行崩溃重启，等它完成后再轮到它
+                await asyncio.sleep(0.1)
+            await restart_worker(worker)
+
+    def track(task: asyncio.Task, name: str) -> asyncio.Task:
+        """持有后台任务的引用，结束时记录结果 (否则异常不会被取回)"""
+        background_tasks.add(task)
+
+        def done(t: asyncio.Task):
+            background_tasks.discard(t)
+            if t.cancelled():
+                print(f"[Supervisor] {name} cancelled")
+            elif t.exception() is not None:
+                print(f"[Supervisor] {name} failed: {t.exception()!r}")
+            else:
+                print(f"[Supervisor] {name} finished")
+
+        task.add_done_callback(done)
+        return task
+
+    def restart_in_progress() -> bool:
+        return state["restart"] is not None and not state["restart"].done()
+
+    async def monitor():
+        while True:
+            await asyncio.sleep(1.0)
+            now = time.monotonic()
+            for worker in workers:
+                if worker.restarting or worker.is_alive():
+                    continue
+                if worker.respawn_at is None:
+                    delay = worker.next_respawn_delay(now)
+                    worker.respawn_at = now + delay
+                    print(f"[Supervisor] worker {worker.index} exited unexpectedly "
+                          f"(crash #{worker.crashes}), respawning in {delay:.0f}s")
+                if now >= worker.respawn_at:
+                    worker.respawn_at = None
+                    track(asyncio.create_task(restart_worker(worker, drain_timeout=0)),
+                          f"respawn of worker {worker.index}")
+
+    def pick_worker() -> Optional[TTSWorkerProcess]:
+        candidates = [w for w in workers if w.healthy and not w.draining and w.is_alive()]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda w: w.in_flight)
+
+    @router.on_event("startup")
+    async def start_workers():
+        state["client"] = httpx.AsyncClient(timeout=httpx.Timeout(None, connect=5.0))
+        for worker in workers:
+            worker.spawn()
+        for worker in workers:
+            track(asyncio.create_task(wait_healthy(worker)), f"startup of worker {worker.index}")
+        state["monitor"] = asyncio.create_task(monitor())
+
+    @router.on_event("shutdown")
+    async def stop_workers():
+        if state["monitor"]:
+            state["monitor"].cancel()
+        for task in list(background_tasks):
+            task.cancel()
+        for worker in workers:
+            worker.restarting = True
+            await asyncio.to_thread(worker.terminate)
+        await state["client"].aclose()
+
+    async def forward_tts(request):
+        worker = pick_worker()
+        if worker is None:
+            forwarded.inc(status="no_worker")
+            return JSONResponse(status_code=503, content={"message": "no tts worker is ready"})
+        forwarded.inc(status="forwarded", worker=worker.index)
+        worker.in_flight += 1
+        try:
+            upstream_req = state["client"].build_request(
+                request.method,
+                f"{worker.base_url}/tts",
+                params=request.query_params,
+                content=await request.body(),
+                headers={"content-type": request.headers.get("content-type", "application/json")},
+            )
+            upstream = await state["client"].send(upstream_req, stream=True)
+        except Exception as e:
+            worker.in_flight -= 1
+            forwarded.inc(status="worker_error", worker=worker.index)
+            return JSONResponse(status_code=502, content={"message": "tts worker unavailable", "Exception": str(e)})
+
+        async def release():
+            await upstream.aclose()
+            worker.in_flight -= 1
+
+        return GuardedStreamingResponse(
+            upstream.aiter_raw(),
+            release,
+            status_code=upstream.status_code,
+            media_type=upstream.headers.get("content-type"),
+        )
+
+    async def broadcast(path: str, params) -> JSONResponse:
+        """权重/参考音频等设置需要同步到所有推理进程。"""
+        results = await asyncio.gather(
+            *[state["client"].get(f"{w.base_url}{path}", params=params) for w in workers if w.is_alive()],
+            return_exceptions=True,
+        )
+        for result in results:
+            if isinstance(result, Exception):
+                return JSONResponse(status_code=502, content={"message": "broadcast failed", "Exception": str(result)})
+            if result.status_code != 200:
+                return JSONResponse(status_code=result.status_code, content=result.json())
+        return JSONResponse(status_code=200, content={"message": "success"})
+
+    @router.get("/tts")
+    async def router_tts_get(request: Request):
+        return await forward_tts(request)
+
+    @router.post("/tts")
+    async def router_tts_post(request: Request):
+        return await forward_tts(request)
+
+    @router.get("/set_refer_audio")
+    async def router_set_refer_audio(request: Request):
+        return await broadcast("/set_refer_audio", request.query_params)
+
+    @router.get("/set_gpt_weights")
+    async def router_set_gpt_weights(request: Request):
+        return await broadcast("/set_gpt_weights", request.query_params)
+
+    @router.get("/set_sovits_weights")
+    async def router_set_sovits_weights(request: Request):
+        return await broadcast("/set_sovits_weights", request.query_params)
+
+    @router.get("/preload_weights")
+    async def router_preload_weights(request: Request):
+        return await broadcast("/preload_weights", request.query_params)
+
+    @router.get("/health")
+    async def router_health():
+        return JSONResponse(status_code=200, content={"status": "ok", "workers": [w.snapshot() for w in workers]})
+
+    @router.get("/metrics")
+    async def router_metrics_endpoint():
+        for worker in workers:
+            worker_in_flight.set(worker.in_flight, worker=worker.index)
+            worker_healthy.set(1 if worker.healthy else 0, worker=worker.index)
+        alive = [w for w in workers if w.healthy and w.is_alive()]
+        results = await asyncio.gather(
+            *[state["client"].get(f"{w.base_url}/metrics", timeout=2.0) for w in alive],
+            return_exceptions=True,
+        )
+        worker_texts = [(w.index, r.text) for w, r in zip(alive, results)
+                        if not isinstance(r, Exception) and r.status_code == 200]
+        return Response(router_metrics.render() + merge_worker_metrics(worker_texts),
+                        media_type="text/plain; version=0.0.4")
+
+    @router.get("/control")
+    async def router_control(command: str = None):
+        if command is None:
+            return JSONResponse(status_code=400, content={"message": "command is required"})
+        if command in ("restart", "exit") and restart_in_progress():
+            return JSONResponse(status_code=409, content={"message": "rolling restart in progress"})
+        if command == "restart":
+            state["restart"] = track(asyncio.create_task(rolling_restart()), "rolling restart")
+            return JSONResponse(status_code=200, content={"message": "rolling restart started"})
+        if command == "exit":
+            async def shutdown():
+                await stop_workers()
+                os.kill(os.getpid(), signal.SIGTERM)
+
+            # 先返回响应，再停止推理进程并退出
+            return JSONResponse(status_code=200, content={"message": "exiting"}, background=BackgroundTask(shutdown))
+        return JSONResponse(status_code=400, content={"message": f"unknown command: {command}"})
+
+    return router
+
+
 if __name__ == "__main__":
     try:
         if host == "None":  # 在调用时使用 -a None 参数，可以让api监听双栈
             host = None
-        uvicorn.run(app=APP, host=host, port=port, workers=1)
+        uvicorn.run(app=create_router_app() if SUPERVISOR_MODE else APP, host=host, port=port, workers=1)
     except Exception:
         traceback.print_exc()
         os.kill(os.getpid(), signal.SIGTERM)
@@ -1,4 +1,5 @@
 ﻿from fastapi import FastAPI, UploadFile, File, Form, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.responses import Response
 import uvicorn
 import torch
 import shutil
@@ -8,6 +9,10 @@ import sys
 import uuid
 import asyncio
 import argparse  # 新增引用
+import bisect
+import struct
+import threading
+import time
 
 # Append current path to sys.path to ensure local modules can be found
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
@@ -36,6 +41,154 @@ try:
 except ImportError:
     print("Warning: could not import 'qwen_asr'. Please ensure it is installed.")
 
+# ---- /metrics: Prometheus 文本格式的运行指标 ----
+# 适配器会被单独复制到后端项目中运行，因此不依赖 prometheus_client，这里只实现用到的三种指标。
+# 每个指标自带一把锁，更新只是几次加法；渲染时复制快照，不阻塞请求路径。
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0)
+RTF_BUCKETS = (0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 1.5, 2.0, 5.0)
+
+
+def _label_text(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in sorted(labels.items())) + "}"
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self._lock = threading.Lock()
+        self._values: dict = {}
+
+    def header(self) -> list:
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, value: float = 1.0, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + value
+
+    def render(self) -> list:
+        with self._lock:
+            values = dict(self._values)
+        return self.header() + [f"{self.name}{_label_text(dict(k))} {v:g}" for k, v in values.items()]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[tuple(sorted(labels.items()))] = value
+
+    def dec(self, value: float = 1.0, **labels):
+        self.inc(-value, **labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, **labels):
+        index = bisect.bisect_left(self.buckets, value)
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def render(self) -> list:
+        with self._lock:
+            values = {k: (list(counts), total, count) for k, (counts, total, count) in self._values.items()}
+        lines = self.header()
+        for key, (counts, total, count) in values.items():
+            labels = dict(key)
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += bucket_count
+                lines.append(f"{self.name}_bucket{_label_text({**labels, 'le': bound})} {cumulative}")
+            lines.append(f"{self.name}_sum{_label_text(labels)} {total:g}")
+            lines.append(f"{self.name}_count{_label_text(labels)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics: list = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+METRICS = MetricsRegistry()
+asr_requests = METRICS.register(Counter("asr_requests_total", "Recognition requests by endpoint and result"))
+asr_connections = METRICS.register(Gauge("asr_ws_connections", "Open WebSocket sessions (uploading or waiting)"))
+asr_in_flight = METRICS.register(Gauge("asr_requests_in_flight", "Requests currently running inference"))
+asr_queued = METRICS.register(Gauge("asr_requests_queued", "Requests waiting for an inference thread"))
+asr_queue_wait = METRICS.register(Histogram("asr_queue_wait_seconds", "End of upload to start of inference"))
+asr_inference = METRICS.register(Histogram("asr_inference_seconds", "Inference time per request"))
+asr_audio_seconds = METRICS.register(Counter("asr_audio_seconds_total", "Seconds of audio recognized"))
+asr_rtf = METRICS.register(Histogram("asr_real_time_factor", "Inference time / audio duration per request", RTF_BUCKETS))
+asr_model_load = METRICS.register(Gauge("asr_model_load_seconds", "Model load duration at startup"))
+
+
+def audio_duration(path: str) -> float:
+    """音频时长 (秒)。客户端推流的 WAV 头里数据长度是占位值，PCM WAV 按文件大小计算"""
+    try:
+        with open(path, "rb") as f:
+            header = f.read(44)
+        if len(header) == 44 and header[:4] == b"RIFF" and header[8:12] == b"WAVE":
+            channels = struct.unpack_from("<H", header, 22)[0]
+            sample_rate = struct.unpack_from("<I", header, 24)[0]
+            bits = struct.unpack_from("<H", header, 34)[0]
+            bytes_per_second = sample_rate * channels * bits // 8
+            if bytes_per_second > 0:
+                return max(0, os.path.getsize(path) - 44) / bytes_per_second
+        import soundfile
+        return soundfile.info(path).duration
+    except Exception:
+        return 0.0
+
+
+def run_inference(audio_path: str, language, submitted: float):
+    """执行一次识别并记录排队、推理耗时与实时率。会阻塞，WebSocket 路径在线程中调用"""
+    start = time.perf_counter()
+    asr_queued.dec()
+    asr_queue_wait.observe(start - submitted)
+    asr_in_flight.inc()
+    try:
+        return model.transcribe(audio=audio_path, language=language, context=["薇薇安"])
+    finally:
+        elapsed = time.perf_counter() - start
+        asr_in_flight.dec()
+        asr_inference.observe(elapsed)
+        audio = audio_duration(audio_path)
+        if audio > 0:
+            asr_audio_seconds.inc(audio)
+            asr_rtf.observe(elapsed / audio)
+
+
 app = FastAPI(title="Qwen3 ASR API")
 model = None
 
@@ -48,6 +201,7 @@ async def load_model():
             print(f"Warning: Model path '{MODEL_PATH}' seems to be missing relative to CWD.")
 
         print(f"Loading Qwen3-ASR model from {MODEL_PATH} on {DEVICE}...")
+        load_start = time.perf_counter()
         # Load model using Qwen3ASRModel (non-vllm or wrapper)
         model = Qwen3ASRModel.from_pretrained(
             MODEL_PATH,
@@ -56,14 +210,21 @@ async def load_model():
             max_inference_batch_size=32,
             max_new_tokens=256,
         )
+        asr_model_load.set(time.perf_counter() - load_start)
         print("Model loaded successfully!")
     except Exception as e:
         print(f"FATAL ERROR: Failed to load model. {e}")
 
 
+@app.get("/metrics")
+async def metrics():
+    return Response(METRICS.render(), media_type="text/plain; version=0.0.4")
+
+
 @app.post("/asr")
 async def transcribe_audio(file: UploadFile = File(...), language: str = Form(None)):
     if model is None:
+        asr_requests.inc(endpoint="http", status="model_not_loaded")
         raise HTTPException(status_code=503, detail="Model is not loaded.")
     filename = file.filename or "audio.wav"
     _, ext = os.path.splitext(filename)
@@ -75,13 +236,17 @@ async def transcribe_audio(file: UploadFile = File(...), language: str = Form(No
         lang_param = language if language and language.strip() != "" else None
         print(f"Transcribing {filename}, Language: {lang_param}...")
         # Call model
-        results = model.transcribe(audio=tmp_path, language=lang_param, context=["薇薇安"])
+        asr_queued.inc()
+        results = run_inference(tmp_path, lang_param, time.perf_counter())
         if results and len(results) > 0:
             res = results[0]
+            asr_requests.inc(endpoint="http", status="success")
             return {"status": "success", "language": res.language, "text": res.text}
         else:
+            asr_requests.inc(endpoint="http", status="empty")
             return {"status": "success", "language": "unknown", "text": ""}
     except Exception as e:
+        asr_requests.inc(endpoint="http", status="error")
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
@@ -105,6 +270,7 @@ async def websocket_asr(websocket: WebSocket):
     5. Server runs inference and returns JSON result.
     """
     await websocket.accept()
+    asr_connections.inc()
     print("WebSocket connected.")
 
     # Create a unique temp file
@@ -140,31 +306,32 @@ async def websocket_asr(websocket: WebSocket):
         print(f"WS Audio received: {tmp_path}. Starting inference...")
 
         if model is None:
+            asr_requests.inc(endpoint="ws", status="model_not_loaded")
             await websocket.send_json({"status": "error", "message": "Model not loaded"})
             return
 
         # Use asyncio.to_thread to run the blocking inference in a separate thread
         # This prevents blocking the asyncio event loop, allowing pings/pongs to be processed.
-        results = await asyncio.to_thread(
-            model.transcribe,
-            audio=tmp_path,
-            language=language_param,
-            context=["薇薇安"]
-        )
+        asr_queued.inc()
+        results = await asyncio.to_thread(run_inference, tmp_path, language_param, time.perf_counter())
 
         if results and len(results) > 0:
             res = results[0]
+            asr_requests.inc(endpoint="ws", status="success")
             await websocket.send_json({
                 "status": "success",
                 "language": res.language,
                 "text": res.text
             })
         else:
+            asr_requests.inc(endpoint="ws", status="empty")
             await websocket.send_json({"status": "success", "language": "unknown", "text": ""})
 
     except WebSocketDisconnect:
+        asr_requests.inc(endpoint="ws", status="disconnected")
         print("WebSocket disconnected")
     except Exception as e:
+        asr_requests.inc(endpoint="ws", status="error")
         print(f"WS Error: {e}")
         # Try to send error if connection is open
         try:
@@ -172,6 +339,7 @@ async def websocket_asr(websocket: WebSocket):
         except:
             pass
     finally:
+        asr_connections.dec()
         # Cleanup
         if os.path.exists(tmp_path):
             try:
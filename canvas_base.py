@@ -2,6 +2,8 @@ import numpy as np
 import OpenGL.GL as GL
 from OpenGL.error import GLError  # 引入 GLError
 from abc import abstractmethod
+from PyQt5 import sip
+from PyQt5.QtGui import QOpenGLContext
 from PyQt5.QtWidgets import QOpenGLWidget
 
 """
@@ -36,6 +38,20 @@ def create_program(vs, fs):
     return program
 
 
+# 着色器程序可以在共享组内的上下文之间共用 (VAO 不能跨上下文共享，仍由每个画布创建)
+_shared_programs: dict[int, int] = {}
+
+
+def shared_program(vs, fs):
+    """当前上下文所在共享组中编译一次的程序，共享组销毁时移除"""
+    group = QOpenGLContext.currentContext().shareGroup()
+    key = sip.unwrapinstance(group)
+    if key not in _shared_programs:
+        _shared_programs[key] = create_program(vs, fs)
+        group.destroyed.connect(lambda *_: _shared_programs.pop(key, None))
+    return _shared_programs[key]
+
+
 def create_vao(v_pos, uv_coord):
     vao = GL.glGenVertexArrays(1)
     vbo = GL.glGenBuffers(1)
@@ -121,7 +137,7 @@ class OpenGLCanvas(QOpenGLWidget):
             gl_FragColor =  color;
         }
         """
-        self._program = create_program(vertex_shader, frag_shader)
+        self._program = shared_program(vertex_shader, frag_shader)
         self._opacity_loc = GL.glGetUniformLocation(self._program, "opacity")
 
     def _create_vao(self):
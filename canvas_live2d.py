@@ -1,14 +1,20 @@
 import math
 import os
+import time
 
 import live2d.v3 as live2d
 import utils.resources as resources
 from typing import Optional, TYPE_CHECKING
-from PyQt5.QtCore import Qt, QObject, pyqtSignal, QTimer
+from PyQt5.QtCore import Qt, QObject, pyqtSignal, QTimer, QEvent, QPoint
+from PyQt5.QtWidgets import QApplication, QWidget
 from live2d.v3.params import StandardParams
 from utils.logger_setup import get_logger
+from utils.startup import timeline
 from canvas_base import OpenGLCanvas
-from utils.model_helper import ModelAttribute, ModelHitManager, ModelConfigParser
+from utils.model_helper import (ModelAttribute, ModelHitManager, ModelConfigParser,
+                                ModelState, SimulationClock, parse_scene_models, prefetch_model_files)
+from utils.texture_cache import parse_tier, resolve_model_json, texture_memory_bytes
+from workers.warmup_worker import WarmupWorker
 
 
 logger = get_logger("Live2DCanvas")
@@ -18,9 +24,92 @@ if TYPE_CHECKING:  # 类型检查提示
 
 class Live2DSignals(QObject):
     tap_signal = pyqtSignal(str, str)
+    model_state_changed = pyqtSignal(str)  # 状态 KEY: model-loading / idle / model-error
+
+
+class PointerTracker(QObject):
+    """
+    应用级事件过滤器: 只记录窗口内最新的鼠标全局坐标，由渲染帧统一消费。
+    高回报率鼠标每秒上千次 MouseMove 只会覆盖同一个状态，Drag 的调用次数与帧率一致。
+    """
+
+    def __init__(self, window: QWidget):
+        super().__init__(window)
+        self.window = window
+        self.target: Optional[QPoint] = None
+        self.dirty = False
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.MouseMove and obj.isWidgetType() and obj.window() is self.window:
+            pos = event.globalPos()
+            # 事件向父控件传递时会再次经过过滤器，坐标相同直接忽略
+            if pos != self.target:
+                self.target = QPoint(pos)
+                self.dirty = True
+        return False
+
+    def take(self) -> Optional[QPoint]:
+        """返回上一帧之后的最新坐标，没有新输入时返回 None"""
+        if not self.dirty:
+            return None
+        self.dirty = False
+        return self.target
+
+
+class SceneModel:
+    """
+    场景中的一个模型实例: 自己的变换与参数状态，绘制时统计耗时。
+    贴图由 LAppModel 内部的纹理管理器上传，同一模型的多个实例无法共享 GPU 贴图，
+    texture_bytes 为按 PNG 尺寸估算的该实例贴图显存。
+    """
+
+    def __init__(self, name: str, model_path: str, model: live2d.LAppModel, attr: ModelAttribute,
+                 state: ModelState, texture_bytes: int):
+        self.name = name
+        self.model_path = model_path
+        self.model = model
+        self.attr = attr
+        self.state = state
+        self.texture_bytes = texture_bytes
+        self.frames = 0
+        self.render_seconds = 0.0
+
+    def render(self, updated: bool):
+        start = time.perf_counter()
+        if updated:
+            self.model.Update()
+        self.state.apply(self.model, updated)
+        self.model.Draw()
+        self.render_seconds += time.perf_counter() - start
+        self.frames += 1
+
+    def report(self) -> dict:
+        return {
+            "name": self.name,
+            "model": self.model_path,
+            "scale": self.attr.getNowScale(),
+            "offset": list(self.attr.getNowPositionOffset()),
+            "texture_mb": round(self.texture_bytes / (1 << 20), 1),
+            "frames": self.frames,
+            "avg_ms": round(self.render_seconds * 1000 / self.frames, 3) if self.frames else None,
+        }
+
+    def reset_stats(self):
+        self.frames = 0
+        self.render_seconds = 0.0
 
 
 class Live2DCanvas(OpenGLCanvas):
+    # 表情名 -> "Expressions" 动作组中的序号
+    EXPRESSION_MOTIONS = {"panic": 0, "scowl": 1, "shy": 2, "umbrella_close": 3, "cry": 4, "a": 5, "b": 6, "c": 7, "d": 8}
+    # 可覆盖的模型参数: 覆盖名 -> 参数 ID (口型由 lip_sync 信号驱动，其余通过 set_param_override 设置)
+    PARAM_OVERRIDES = {
+        "mouth": StandardParams.ParamMouthOpenY,
+        "eye_x": StandardParams.ParamEyeBallX,
+        "eye_y": StandardParams.ParamEyeBallY,
+        "body_angle": StandardParams.ParamBodyAngleX,
+    }
+
     def __init__(
         self,
         controller: "Controller",
@@ -36,6 +125,24 @@ class Live2DCanvas(OpenGLCanvas):
         self.modelAttr = modelAttr
         self.modelHitManager = modelHitManager
         self.modelJsonParser = modelJsonParser
+        # ---- 拖拽跟踪: 每帧最多调用一次 Drag，可选指数平滑 (0 为关闭，越接近 1 越平滑) ----
+        self.pointerTracker: Optional[PointerTracker] = None
+        self.drag_smoothing = float(os.getenv("LIVE2D_DRAG_SMOOTHING", "0"))
+        self.drag_target: Optional[tuple[float, float]] = None
+        self.drag_pos: Optional[tuple[float, float]] = None
+        # ---- 模型模拟按固定步长推进，与重绘次数无关 (LIVE2D_SIM_HZ=0 时每次重绘都推进) ----
+        self.simClock = SimulationClock(float(os.getenv("LIVE2D_SIM_HZ", "60")),
+                                        int(os.getenv("LIVE2D_SIM_MAX_CATCH_UP", "6")))
+        # ---- 参数/变换只在变化时写入模型，每帧 Draw 前统一提交 ----
+        self.modelState = ModelState(self.PARAM_OVERRIDES)
+        self.modelState.set_param("mouth", self.modelAttr.getLipParamY())
+        self.modelState.set_transform(self.modelAttr.getNowScale(), self.modelAttr.getNowPositionOffset())
+        # ---- 多模型场景: 主模型负责交互，LIVE2D_SCENE_MODELS 中的模型按各自变换画入同一个画布 ----
+        self.scene: list[SceneModel] = []
+        self.scene_specs = parse_scene_models(os.getenv("LIVE2D_SCENE_MODELS"), resources.RESOURCES_DIRECTORY)
+        self.scene_paths: dict[str, str] = {}  # 配置中的 model3.json -> 按贴图档位解析后的路径
+        self.scene_report_interval = float(os.getenv("LIVE2D_SCENE_REPORT_SECONDS", "60"))
+        self.scene_reported_at = time.monotonic()
         self.initWindowParams()
         # ---- 动画相关参数 ----
         self.radius_per_frame = math.pi * 0.5 / 120
@@ -45,6 +152,16 @@ class Live2DCanvas(OpenGLCanvas):
         self.expCounter_timer = QTimer(self)
         self.expCounter_timer.setInterval(8000)
 
+        # ---- 模型延迟加载: 窗口先显示，模型文件在后台预读后再在 GL 线程加载 ----
+        self.model_path = resources.MODEL_JSON_PATH
+        self.first_frame_drawn = False
+        screen = QApplication.primaryScreen()
+        self.texture_tier = parse_tier(os.getenv("LIVE2D_TEXTURE_TIER", "auto"),
+                                       int(screen.availableGeometry().height() * screen.devicePixelRatio()))
+        self.prefetch_worker = WarmupWorker({"model.prefetch": self.prepare_model_files}, self)
+        self.prefetch_worker.all_finished.connect(self.load_model)
+        timeline.expect("model.loaded", "model.first_frame")
+
         # ---- 功能初始化函数 ----
         self.initSignals()
 
@@ -95,8 +212,7 @@ class Live2DCanvas(OpenGLCanvas):
                                    self.on_start_motion_callback)
             return
         self.model.SetExpression(exp_name)
-        dictory = {"panic":0, "scowl":1, "shy":2, "umbrella_close":3, "cry":4,"a":5,"b":6,"c":7,"d":8,}
-        self.model.StartMotion("Expressions", dictory.get(exp_name, 0),
+        self.model.StartMotion("Expressions", self.EXPRESSION_MOTIONS.get(exp_name, 0),
                                live2d.MotionPriority.FORCE,
                               self.on_start_motion_callback,
                                self.on_finish_motion_callback)
@@ -132,12 +248,14 @@ class Live2DCanvas(OpenGLCanvas):
             elif attribute_change == "subY":
                 position_change = (0.0, -0.1)
             new_scale = round(self.modelAttr.getNowScale() + scale_change, 2)
+            offset_x, offset_y = self.modelAttr.getNowPositionOffset()
             new_position = (
-                round(self.modelAttr.getNowPositionOffset()[0] + position_change[0], 2),
-                round(self.modelAttr.getNowPositionOffset()[1] + position_change[1], 2)
+                round(offset_x + position_change[0], 2),
+                round(offset_y + position_change[1], 2)
             )
             self.modelAttr.setNewScale(new_scale)
             self.modelAttr.setNewPositionOffset(new_position)
+            self.modelState.set_transform(new_scale, new_position)
             logger.info(f"Changing scale to {new_scale},"f" PositionOffset is {new_position}")
         except Exception as e:
             logger.error(f"Error changing model attributes: {e}")
@@ -151,6 +269,14 @@ class Live2DCanvas(OpenGLCanvas):
         if not self.model:
             return
         self.modelAttr.setLipParamY(lip_value * lip_sync)
+        self.modelState.set_param("mouth", lip_value * lip_sync)
+
+    def set_param_override(self, name: str, value: float, weight: float = 1.0):
+        """覆盖 PARAM_OVERRIDES 中的参数 (如 eye_x / body_angle)，直到 clear_param_override"""
+        self.modelState.set_param(name, value, weight)
+
+    def clear_param_override(self, name: str):
+        self.modelState.clear_param(name)
 
     def on_audio_stopped(self):
         """
@@ -188,22 +314,117 @@ class Live2DCanvas(OpenGLCanvas):
 
     def on_init(self):
         live2d.glInit()
-        self.model = live2d.LAppModel()
-        model_path = os.path.join(resources.RESOURCES_DIRECTORY, "vivian/vivian.model3.json")
-        self.model.LoadModelJson(model_path)
-        self.modelJsonParser.load_config(model_path)
-        self.initFuncParams()
+        timeline.mark("canvas.gl_ready")
+        self.live2dSignals.model_state_changed.emit("model-loading")
+        self.prefetch_worker.start()
         self.startTimer(int(1000 / 120))
 
+    def prepare_model_files(self):
+        """后台线程: 选择贴图档位 (可能需要校验哈希) 并预读模型文件"""
+        primary_path = self.model_path
+        self.model_path = resolve_model_json(primary_path, self.texture_tier)
+        prefetch_model_files(self.model_path)
+        # 同一模型的多个实例只解析和预读一次
+        self.scene_paths[primary_path] = self.model_path
+        for path, _, _ in self.scene_specs:
+            if path not in self.scene_paths:
+                self.scene_paths[path] = resolve_model_json(path, self.texture_tier)
+                prefetch_model_files(self.scene_paths[path])
+
+    def load_model(self):
+        """预读完成后在 GL 上下文中加载模型 (贴图上传必须在 GL 线程)"""
+        self.makeCurrent()
+        start = time.perf_counter()
+        try:
+            model = live2d.LAppModel()
+            model.LoadModelJson(self.model_path)
+            model.Resize(self.width(), self.height())
+        except Exception as e:
+            logger.error(f"Failed to load model: {e}")
+            timeline.done("model.loaded", time.perf_counter() - start, ok=False)
+            timeline.done("model.first_frame", ok=False)
+            self.live2dSignals.model_state_changed.emit("model-error")
+            return
+        finally:
+            self.doneCurrent()
+        self.model = model
+        self.modelState.bind(model)
+        self.simClock.reset()
+        self.modelJsonParser.load_config(self.model_path)
+        self.initFuncParams()
+        self.load_scene_models()
+        # 主模型最后绘制，位于其他模型之上
+        self.scene.append(SceneModel("main", self.model_path, model, self.modelAttr, self.modelState,
+                                     texture_memory_bytes(self.model_path)))
+        timeline.done("model.loaded", time.perf_counter() - start)
+        self.live2dSignals.model_state_changed.emit("idle")
+
+    def load_scene_models(self):
+        """加载场景中的其他模型，单个模型失败只跳过该模型"""
+        texture_bytes: dict[str, int] = {}
+        self.makeCurrent()
+        try:
+            for index, (path, scale, offset) in enumerate(self.scene_specs):
+                model_path = self.scene_paths.get(path, path)
+                try:
+                    model = live2d.LAppModel()
+                    model.LoadModelJson(model_path)
+                    model.Resize(self.width(), self.height())
+                except Exception as e:
+                    logger.error(f"Failed to load scene model {path}: {e}")
+                    continue
+                state = ModelState({})
+                state.set_transform(scale, offset)
+                state.bind(model)
+                if model_path not in texture_bytes:
+                    texture_bytes[model_path] = texture_memory_bytes(model_path)
+                self.scene.append(SceneModel(f"scene{index}", model_path, model, ModelAttribute(scale, offset),
+                                             state, texture_bytes[model_path]))
+        finally:
+            self.doneCurrent()
+        if self.scene:
+            total = sum(entry.texture_bytes for entry in self.scene) / (1 << 20)
+            logger.info(f"Loaded {len(self.scene)} extra scene models, ~{total:.0f} MB textures")
+
+    def scene_report(self) -> list[dict]:
+        return [entry.report() for entry in self.scene]
+
+    def log_scene_report(self):
+        """多模型时定期输出每个模型的绘制耗时与贴图显存"""
+        now = time.monotonic()
+        if len(self.scene) < 2 or now - self.scene_reported_at < self.scene_report_interval:
+            return
+        self.scene_reported_at = now
+        lines = [f"  {r['name']:8} {r['avg_ms']:7.2f} ms/frame  {r['texture_mb']:7.1f} MB  {r['model']}"
+                 for r in self.scene_report() if r["frames"]]
+        logger.info("Scene render cost (CPU, Update + Draw):\n" + "\n".join(lines))
+        for entry in self.scene:
+            entry.reset_stats()
+
     def closeEvent(self, event):
         super().closeEvent(event)
 
-    def mouseMoveEvent(self, event):
-        if not self.model:
+    def setPointerTracker(self, tracker: PointerTracker):
+        self.pointerTracker = tracker
+
+    def apply_drag(self):
+        """渲染帧中消费合并后的鼠标位置，每帧最多一次 Drag"""
+        target = self.pointerTracker.take() if self.pointerTracker else None
+        if target is not None:
+            local = self.mapFromGlobal(target)
+            self.drag_target = (float(local.x()), float(local.y()))
+        if self.drag_target is None:
             return
-        x = event.pos().x()
-        y = event.pos().y()
-        self.model.Drag(x, y)
+        x, y = self.drag_target
+        if self.drag_smoothing > 0 and self.drag_pos is not None:
+            px, py = self.drag_pos
+            x = px + (x - px) * (1 - self.drag_smoothing)
+            y = py + (y - py) * (1 - self.drag_smoothing)
+            if abs(x - self.drag_target[0]) < 0.5 and abs(y - self.drag_target[1]) < 0.5:
+                x, y = self.drag_target
+        if (x, y) != self.drag_pos:
+            self.drag_pos = (x, y)
+            self.model.Drag(x, y)
 
     def mousePressEvent(self, event):
         if not self.model:
@@ -243,14 +464,17 @@ class Live2DCanvas(OpenGLCanvas):
         if not self.model:
             return
         live2d.clearBuffer()
-        self.model.Update()
-        self.model.SetParameterValue(StandardParams.ParamMouthOpenY,
-                                     self.modelAttr.getLipParamY())
-        self.model.SetScale(self.modelAttr.getNowScale())
-        self.model.SetOffset(self.modelAttr.getNowPositionOffset()[0],
-                             self.modelAttr.getNowPositionOffset()[1])
-        self.model.Draw()
+        self.apply_drag()
+        # LAppModel.Update 按自身记录的真实时间间隔推进 (上限 0.1s)，因此一帧内有多步积压时调用一次即可；
+        # 没有到期的步 (额外的重绘、高刷新率) 时跳过，Draw 仍会用当前参数重新计算顶点
+        updated = self.simClock.tick() > 0
+        for entry in self.scene:
+            entry.render(updated)
+        self.log_scene_report()
+        if not self.first_frame_drawn:
+            self.first_frame_drawn = True
+            timeline.done("model.first_frame")
 
     def on_resize(self, width: int, height: int):
-        if self.model:
-            self.model.Resize(width, height)
+        for entry in self.scene:
+            entry.model.Resize(width, height)
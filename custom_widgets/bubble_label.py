@@ -1,5 +1,8 @@
-from PyQt5.QtWidgets import QLabel, QGraphicsOpacityEffect
-from PyQt5.QtCore import Qt, QTimer, QPropertyAnimation, QParallelAnimationGroup, QEasingCurve, QPoint
+from typing import Optional
+
+from PyQt5.QtWidgets import QLabel, QGraphicsOpacityEffect, QStyle, QStyleOption
+from PyQt5.QtCore import Qt, QTimer, QPropertyAnimation, QParallelAnimationGroup, QEasingCurve, QPoint, QPointF, QRectF
+from PyQt5.QtGui import QPainter, QPalette, QTextLayout, QTextOption
 
 class BubbleLabel(QLabel):
     def __init__(self, parent=None):
@@ -38,6 +41,11 @@ class BubbleLabel(QLabel):
         self.delay_timer.setInterval(2000)
         self.delay_timer.timeout.connect(self.start_hide_anim)
 
+        # 逐字显示: 整段文本只排版一次，之后每次只改变裁剪位置，不再重复 setText 整个前缀
+        self.reveal_count: Optional[int] = None  # None 表示完整显示 (交给 QLabel 自己绘制)
+        self._layout: Optional[QTextLayout] = None
+        self._layout_key = None
+
     def start_show_anim(self):
         self.delay_timer.stop()
         self.hide_anim.stop()
@@ -79,3 +87,80 @@ class BubbleLabel(QLabel):
         self.hide_anim.stop()
         self.opacity_effect.setOpacity(1.0)
         self.setVisible(True)
+
+    # ---- 逐字显示 ----
+
+    def begin_reveal(self, text: str):
+        """设置完整文本 (气泡尺寸按最终文本一次确定)，从 0 个字符开始逐步显示"""
+        self.setText(text)
+        self._layout = None
+        self.reveal_count = 0
+        self.update()
+
+    def set_reveal(self, count: int):
+        if self.reveal_count is None:
+            return
+        count = max(0, min(count, len(self.text())))
+        if count != self.reveal_count:
+            self.reveal_count = count
+            self.update()
+
+    def finish_reveal(self):
+        if self.reveal_count is not None:
+            self.reveal_count = None
+            self.update()
+
+    def _text_layout(self, width: float) -> QTextLayout:
+        key = (self.text(), width, self.font().key())
+        if self._layout is not None and self._layout_key == key:
+            return self._layout
+        option = QTextOption(Qt.AlignHCenter)
+        option.setWrapMode(QTextOption.WrapAtWordBoundaryOrAnywhere)
+        layout = QTextLayout(self.text(), self.font())
+        layout.setTextOption(option)
+        layout.beginLayout()
+        y = 0.0
+        while True:
+            line = layout.createLine()
+            if not line.isValid():
+                break
+            line.setLineWidth(width)
+            line.setPosition(QPointF(0, y))
+            y += line.height()
+        layout.endLayout()
+        self._layout, self._layout_key = layout, key
+        return layout
+
+    def paintEvent(self, event):
+        if self.reveal_count is None:
+            super().paintEvent(event)
+            return
+
+        painter = QPainter(self)
+        # 背景和边框仍由 QSS 绘制，文字部分由这里按已显示的字符数裁剪
+        option = QStyleOption()
+        option.initFrom(self)
+        self.style().drawPrimitive(QStyle.PE_Widget, option, painter, self)
+
+        rect = self.contentsRect().adjusted(self.margin(), self.margin(), -self.margin(), -self.margin())
+        layout = self._text_layout(rect.width())
+        painter.setPen(self.palette().color(QPalette.WindowText))
+        origin = QPointF(rect.topLeft())
+        for i in range(layout.lineCount()):
+            line = layout.lineAt(i)
+            start = line.textStart()
+            if start >= self.reveal_count:
+                break
+            if start + line.textLength() <= self.reveal_count:
+                line.draw(painter, origin)
+                continue
+            # 当前行只显示到第 reveal_count 个字符为止
+            x = line.cursorToX(self.reveal_count)
+            x = x[0] if isinstance(x, tuple) else x
+            line_rect = line.naturalTextRect().translated(origin)
+            painter.save()
+            painter.setClipRect(QRectF(line_rect.left(), line_rect.top(), x - line.naturalTextRect().left(),
+                                       line_rect.height()))
+            line.draw(painter, origin)
+            painter.restore()
+            break
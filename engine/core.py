@@ -0,0 +1,80 @@
+"""
+不依赖 Qt 的对话引擎: 在一个 asyncio 事件循环中同时运行多个会话的回合 (LLM -> 解析 -> TTS)，
+所有会话共用 LLM/TTS 的连接池与回复缓存，各自保存对话历史。
+桌面端的 AIManager 只是其上的一层 Qt 适配 (事件转为信号、音频交给 QAudioOutput)，
+同一引擎也可以服务多个远程前端或在无显示环境中做压测。
+"""
+import asyncio
+import os
+from typing import Optional, Union
+
+from engine.llm import DEFAULT_SYSTEM_PROMPT, LLMClient
+from engine.llm_router import LLMRouter
+from engine.session import ConversationSession
+from engine.tts import TTSClient
+from utils.logger_setup import get_logger
+from utils.response_cache import ResponseCache
+
+logger = get_logger("ConversationEngine")
+
+
+class ConversationEngine:
+    def __init__(
+        self,
+        llm: Optional[Union[LLMClient, LLMRouter]] = None,
+        tts: Optional[TTSClient] = None,
+        system_prompt: str = DEFAULT_SYSTEM_PROMPT,
+        context_tokens: Optional[int] = None,
+        cache: Optional[ResponseCache] = None,
+        max_concurrent_turns: Optional[int] = None,
+    ):
+        # 默认按 .env 配置: 只有主服务时直接转发，配置了 LLM_HEDGE_API_URL 时对慢请求做对冲
+        self.llm = llm or LLMRouter.from_env()
+        self.tts = tts or TTSClient()
+        self.system_prompt = system_prompt
+        self.context_tokens = context_tokens or int(os.getenv("LLM_CONTEXT_TOKENS", "4096"))
+        # 回复缓存按问题索引、所有会话共用，因此只用于会话的第一个回合 (回复与上下文无关)
+        self.cache = cache or ResponseCache(
+            similarity_threshold=float(os.getenv("RESPONSE_CACHE_SIMILARITY", "0.8")))
+        # 同时进行的回合数上限 (超出的回合排队等待)，保护后端推理服务
+        self.max_concurrent_turns = max_concurrent_turns or int(os.getenv("ENGINE_MAX_CONCURRENT_TURNS", "16"))
+        self._turn_slots: Optional[asyncio.Semaphore] = None
+        self.sessions: dict[str, ConversationSession] = {}
+
+    @property
+    def turn_slots(self) -> asyncio.Semaphore:
+        """
+        引擎通常在 Qt 主线程中构造，而回合运行在 runtime 的事件循环线程中；
+        Python 3.9 的 Semaphore 在构造时绑定当前线程的事件循环，因此在循环内首次使用时再创建。
+        """
+        if self._turn_slots is None:
+            self._turn_slots = asyncio.Semaphore(self.max_concurrent_turns)
+        return self._turn_slots
+
+    def session(self, session_id: str) -> ConversationSession:
+        """获取或创建会话"""
+        session = self.sessions.get(session_id)
+        if session is None:
+            session = self.sessions[session_id] = ConversationSession(self, session_id)
+            logger.info(f"Session {session_id} created ({len(self.sessions)} active)")
+        return session
+
+    def close_session(self, session_id: str):
+        session = self.sessions.pop(session_id, None)
+        if session is not None:
+            session.cancel()
+
+    def busy_sessions(self) -> int:
+        return sum(1 for session in self.sessions.values() if session.busy)
+
+    async def warmup(self):
+        """并行预热 LLM 与 TTS 连接，单个失败只记录日志"""
+        results = await asyncio.gather(self.llm.warmup(), self.tts.warmup(), return_exceptions=True)
+        for name, result in zip(("llm", "tts"), results):
+            if isinstance(result, Exception):
+                logger.warning(f"Warmup {name} failed: {result}")
+
+    async def aclose(self):
+        for session_id in list(self.sessions):
+            self.close_session(session_id)
+        await asyncio.gather(self.llm.aclose(), self.tts.aclose(), return_exceptions=True)
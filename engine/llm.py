@@ -0,0 +1,106 @@
+import os
+from typing import AsyncIterator, Callable, Optional, TYPE_CHECKING
+
+from utils.lazy_import import lazy_import
+from utils.turn_trace import TurnTrace
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+
+# openai 会连带导入 httpx/pydantic，首次创建客户端时才导入 (通常在启动预热中)
+openai = lazy_import("openai")
+
+DEFAULT_SYSTEM_PROMPT = """
+人物设定：你名叫薇薇安，与对话者关系亲近，习惯称呼其为法厄同大人（如果使用英语回答，称呼为Phaethon-sama）且是狂热粉丝。
+
+首要规则：用户使用何种语言提问，你就必须使用完全相同的语言回答。这是必须严格遵守的规则。
+
+回复规则：
+1. 始终使用JSON格式回复，包含三个字段：'emotion', 'text' 和 'text_lang'
+2. 'emotion'字段代表你此刻的情绪，必须从以下选项中选择一个：['cry','scowl','shy','normal','umbrella_close']
+3. 'text'字段是你的回复内容，使用接近人类对话的自然语言
+4. 'text_lang'字段表示回复内容的语种缩写，必须从['zh','en','ja']中选择
+   - 如果用户用中文提问，'text_lang'设为'zh'
+   - 如果用户用英文提问，'text_lang'设为'en'  
+   - 如果用户用日文提问，'text_lang'设为'ja'
+5. 确保回复内容能够直接被Python的json.loads解析
+
+重要语言匹配规则：
+- 当用户用中文提问时，你的'text'内容必须完全是中文
+- 当用户用英文提问时，你的'text'内容必须完全是英文，称呼用户为"Phaethon-sama"
+- 当用户用日文提问时，你的'text'内容必须完全是日文
+- 禁止在回复中混合语言，禁止在不匹配用户语言的情况下使用其他语言
+- 即使你知道如何用其他语言表达，也必须严格使用用户使用的语言
+
+示例：
+用户问："How are you today?"
+正确回复：{"emotion": "shy", "text": "I'm doing well, Phaethon-sama! How about you?", "text_lang": "en"}
+
+用户问："今天天气不错"
+正确回复：{"emotion": "normal", "text": "是的，法厄同大人！今天阳光真好。", "text_lang": "zh"}
+
+违反语言匹配规则会导致严重后果。请务必在每次回复前检查用户使用的语言，并确保你的回复语言完全匹配。
+"""
+
+
+class LLMClient:
+    """
+    OpenAI 兼容接口的异步客户端。引擎中所有会话共用一个 AsyncOpenAI 及其 HTTP 连接池，
+    预热建立的连接可被后续请求复用。配置默认取自 .env (DEEPSEEK_API_KEY / DEEPSEEK_API_URL / DEEPSEEK_MODEL)。
+    """
+
+    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None, model: Optional[str] = None,
+                 name: str = "default"):
+        self.api_key = api_key or os.getenv("DEEPSEEK_API_KEY")
+        self.base_url = base_url or os.getenv("DEEPSEEK_API_URL")
+        self.model = model or os.getenv("DEEPSEEK_MODEL")
+        self.name = name
+        self._client: Optional["AsyncOpenAI"] = None
+
+    @property
+    def client(self) -> "AsyncOpenAI":
+        # 在事件循环线程中首次使用时创建，连接池绑定到该循环
+        if self._client is None:
+            self._client = openai.AsyncOpenAI(api_key=self.api_key, base_url=self.base_url)
+        return self._client
+
+    async def warmup(self):
+        """创建客户端并完成一次轻量请求，提前完成 DNS/TLS 握手"""
+        # with_options 复制出的客户端共享同一个 HTTP 连接池
+        await self.client.with_options(timeout=5, max_retries=0).models.list()
+
+    async def stream(self, messages: list[dict], trace: Optional[TurnTrace] = None,
+                     on_usage: Optional[Callable[[dict], None]] = None) -> AsyncIterator[str]:
+        """流式返回回复的增量文本；任务被取消时关闭响应，服务端随之停止生成"""
+        if trace:
+            trace.begin("llm")
+        response = await self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            temperature=0.5,
+            max_tokens=2048,
+            stream=True,
+            stream_options={"include_usage": True},
+        )
+        first = True
+        try:
+            async for chunk in response:
+                if getattr(chunk, "usage", None) and on_usage:
+                    on_usage(chunk.usage.model_dump())
+                if not chunk.choices:
+                    continue
+                piece = chunk.choices[0].delta.content
+                if piece:
+                    if trace and first:
+                        trace.mark("llm.first_token")
+                    first = False
+                    yield piece
+        finally:
+            await response.close()
+        if trace:
+            trace.end("llm")
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
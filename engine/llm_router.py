@@ -0,0 +1,224 @@
+"""
+多个 OpenAI 兼容服务之间的对冲请求 (hedged request):
+先只请求主服务，若在对冲时限内还没有首个 token，再向备用服务发出同样的请求，
+哪个先产出首个 token 就用哪个，另一个立即取消 (关闭响应，服务端停止生成)。
+对冲时限取主服务近期首 token 延迟 (TTFT) 的百分位，只有尾部的慢请求才会被对冲，额外请求量约为 1 - 百分位。
+"""
+import asyncio
+import os
+import time
+from collections import deque
+from typing import AsyncIterator, Callable, Optional
+
+from engine.llm import LLMClient
+from utils.logger_setup import get_logger
+from utils.turn_trace import TurnTrace, percentile
+
+logger = get_logger("LLMRouter")
+
+MIN_SAMPLES = 10  # TTFT 样本不足时使用初始对冲时限
+
+
+class ProviderStats:
+    """单个服务的近期 TTFT 与生成速度 (tokens/s)，以及请求/胜出/失败计数"""
+
+    def __init__(self, window: int = 200):
+        self.ttft: deque[float] = deque(maxlen=window)
+        self.throughput: deque[float] = deque(maxlen=window)
+        self.requests = 0
+        self.wins = 0
+        self.failures = 0
+
+    def ttft_percentile(self, q: float) -> Optional[float]:
+        if len(self.ttft) < MIN_SAMPLES:
+            return None
+        return percentile(sorted(self.ttft), q)
+
+    def report(self) -> dict:
+        def p(values, q):
+            return round(percentile(sorted(values), q), 3) if values else None
+        return {
+            "requests": self.requests,
+            "wins": self.wins,
+            "failures": self.failures,
+            "ttft_p50": p(self.ttft, 0.5),
+            "ttft_p90": p(self.ttft, 0.9),
+            "tokens_per_second_p50": p(self.throughput, 0.5),
+        }
+
+
+class _Attempt:
+    """对某个服务的一次流式请求，首个 token 在后台任务中等待"""
+
+    def __init__(self, provider: LLMClient, messages: list[dict], on_usage: Callable[["_Attempt", dict], None]):
+        self.provider = provider
+        self.started = time.perf_counter()
+        self.first_token_at: Optional[float] = None
+        self.chunks = 0
+        self.completion_tokens: Optional[int] = None
+        self.stream = provider.stream(messages, None, lambda usage: on_usage(self, usage))
+        self.first = asyncio.ensure_future(self._first_piece())
+
+    async def _first_piece(self) -> str:
+        piece = await self.stream.__anext__()
+        self.first_token_at = time.perf_counter()
+        self.chunks = 1
+        return piece
+
+    async def close(self):
+        self.first.cancel()
+        await asyncio.gather(self.first, return_exceptions=True)
+        await self.stream.aclose()
+
+
+class LLMRouter:
+    """
+    与 LLMClient 接口相同 (warmup / stream / aclose)，可直接交给 ConversationEngine。
+    providers[0] 为主服务，其余为备用服务，依次对冲；只有一个服务时等同于直接使用它。
+    """
+
+    def __init__(self, providers: list[LLMClient], percentile_q: float = 0.9, initial_delay: float = 1.5,
+                 min_delay: float = 0.2, max_delay: float = 5.0):
+        if not providers:
+            raise ValueError("LLMRouter needs at least one provider")
+        self.providers = providers
+        self.percentile_q = percentile_q
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.stats: dict[str, ProviderStats] = {provider.name: ProviderStats() for provider in providers}
+        self.name = "+".join(provider.name for provider in providers)
+
+    @classmethod
+    def from_env(cls) -> "LLMRouter":
+        """主服务取 DEEPSEEK_*，设置了 LLM_HEDGE_API_URL 时加入备用服务 (LLM_HEDGE_API_KEY / LLM_HEDGE_MODEL)"""
+        providers = [LLMClient(name="primary")]
+        hedge_url = os.getenv("LLM_HEDGE_API_URL")
+        if hedge_url:
+            providers.append(LLMClient(os.getenv("LLM_HEDGE_API_KEY") or providers[0].api_key, hedge_url,
+                                       os.getenv("LLM_HEDGE_MODEL") or providers[0].model, name="hedge"))
+        return cls(
+            providers,
+            percentile_q=float(os.getenv("LLM_HEDGE_PERCENTILE", "0.9")),
+            initial_delay=float(os.getenv("LLM_HEDGE_DELAY", "1.5")),
+        )
+
+    def hedge_delay(self, provider: LLMClient) -> float:
+        """该服务的对冲时限: 近期 TTFT 的百分位，限制在 [min_delay, max_delay] 内"""
+        delay = self.stats[provider.name].ttft_percentile(self.percentile_q)
+        if delay is None:
+            delay = self.initial_delay
+        return min(self.max_delay, max(self.min_delay, delay))
+
+    def report(self) -> dict[str, dict]:
+        return {name: stats.report() for name, stats in self.stats.items()}
+
+    async def warmup(self):
+        results = await asyncio.gather(*(provider.warmup() for provider in self.providers), return_exceptions=True)
+        for provider, result in zip(self.providers[1:], results[1:]):
+            if isinstance(result, Exception):
+                logger.warning(f"Warmup {provider.name} failed: {result!r}")
+        # 主服务可用即视为就绪
+        if isinstance(results[0], Exception):
+            raise results[0]
+
+    async def stream(self, messages: list[dict], trace: Optional[TurnTrace] = None,
+                     on_usage: Optional[Callable[[dict], None]] = None) -> AsyncIterator[str]:
+        """与 LLMClient.stream 相同；trace 中额外记录胜出的服务 (llm_provider) 与对冲时间点 (llm.hedge.*)"""
+        winner: Optional[_Attempt] = None
+
+        def usage_from(attempt: _Attempt, usage: dict):
+            attempt.completion_tokens = usage.get("completion_tokens")
+            if attempt is winner and on_usage:
+                on_usage(usage)
+
+        if trace:
+            trace.begin("llm")
+        attempts: list[_Attempt] = []
+        try:
+            winner, piece = await self._race(messages, attempts, usage_from, trace)
+            if trace:
+                trace.mark("llm.first_token")
+                trace.set(llm_provider=winner.provider.name, llm_hedged=len(attempts) > 1)
+            if len(attempts) > 1:
+                logger.info(f"LLM first token from {winner.provider.name} | {self.report()}")
+            # 取消落后的请求
+            for attempt in attempts:
+                if attempt is not winner:
+                    self._record_lost(attempt)
+                    await attempt.close()
+            attempts = [winner]
+
+            yield piece
+            async for piece in winner.stream:
+                winner.chunks += 1
+                yield piece
+            self._record_finished(winner)
+        finally:
+            for attempt in attempts:
+                await attempt.close()
+        if trace:
+            trace.end("llm")
+
+    async def _race(self, messages: list[dict], attempts: list[_Attempt],
+                    usage_from: Callable[[_Attempt, dict], None],
+                    trace: Optional[TurnTrace]) -> tuple[_Attempt, str]:
+        """
+        按顺序启动请求，返回第一个产出首个 token 的请求及该 token。
+        最近启动的请求超过对冲时限、或已启动的请求全部失败时启动下一个服务；全部失败时抛出最后的错误。
+        """
+        pending = list(self.providers)
+        last_error: Optional[BaseException] = None
+        while True:
+            waiting = [attempt.first for attempt in attempts if not attempt.first.done()]
+            done = set()
+            if waiting:
+                timeout = None
+                if pending:
+                    deadline = attempts[-1].started + self.hedge_delay(attempts[-1].provider)
+                    timeout = max(0.0, deadline - time.perf_counter())
+                done, _ = await asyncio.wait(waiting, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                if not pending:
+                    raise last_error
+                provider = pending.pop(0)
+                if attempts:
+                    action = "Hedging" if waiting else "Failing over"
+                    logger.info(f"{action} LLM request to {provider.name} "
+                                f"after {time.perf_counter() - attempts[0].started:.2f}s")
+                    if trace:
+                        trace.mark(f"llm.hedge.{provider.name}")
+                self.stats[provider.name].requests += 1
+                attempts.append(_Attempt(provider, messages, usage_from))
+                continue
+            for attempt in attempts:
+                if attempt.first not in done:
+                    continue
+                error = attempt.first.exception()
+                if error is None:
+                    stats = self.stats[attempt.provider.name]
+                    stats.wins += 1
+                    stats.ttft.append(attempt.first_token_at - attempt.started)
+                    return attempt, attempt.first.result()
+                if isinstance(error, StopAsyncIteration):
+                    error = RuntimeError(f"{attempt.provider.name} returned an empty response")
+                self.stats[attempt.provider.name].failures += 1
+                logger.warning(f"LLM provider {attempt.provider.name} failed: {error!r}")
+                last_error = error
+
+    def _record_lost(self, attempt: _Attempt):
+        """落后的请求: 已有首 token 的按实际 TTFT 计入；仍在等待的按已等待时间计入 (TTFT 的下界)"""
+        stats = self.stats[attempt.provider.name]
+        if not attempt.first.done():
+            stats.ttft.append(time.perf_counter() - attempt.started)
+        elif not attempt.first.cancelled() and attempt.first.exception() is None:
+            stats.ttft.append(attempt.first_token_at - attempt.started)
+
+    def _record_finished(self, attempt: _Attempt):
+        duration = time.perf_counter() - attempt.first_token_at
+        tokens = attempt.completion_tokens or attempt.chunks
+        if duration > 0 and tokens > 1:
+            self.stats[attempt.provider.name].throughput.append(tokens / duration)
+
+    async def aclose(self):
+        await asyncio.gather(*(provider.aclose() for provider in self.providers), return_exceptions=True)
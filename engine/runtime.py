@@ -0,0 +1,99 @@
+import asyncio
+import concurrent.futures
+import threading
+import time
+from typing import Awaitable, Callable, Optional, TypeVar
+
+from utils.logger_setup import get_logger
+from utils.startup import timeline
+
+logger = get_logger("AsyncRuntime")
+
+T = TypeVar("T")
+
+
+class AsyncRuntime:
+    """
+    后台 asyncio 事件循环线程: 对话引擎的所有会话、ASR 推流与启动预热等网络 I/O 都运行在这一个线程中，
+    线程数不随回合与并发流的数量增长。
+    其他线程 (Qt 主线程、预热线程) 通过 submit() 提交协程，通过 call_soon() 在循环中执行回调。
+    首次使用时才启动线程。
+    """
+
+    def __init__(self, name: str = "async-runtime"):
+        self.name = name
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        if self._loop is None:
+            self.start()
+        return self._loop
+
+    def in_loop(self) -> bool:
+        return self._thread is not None and threading.current_thread() is self._thread
+
+    def start(self):
+        with self._lock:
+            if self._loop is not None:
+                return
+            loop = asyncio.new_event_loop()
+            ready = threading.Event()
+            self._thread = threading.Thread(target=self._run, args=(loop, ready), name=self.name, daemon=True)
+            self._thread.start()
+            ready.wait()
+            self._loop = loop
+
+    def _run(self, loop: asyncio.AbstractEventLoop, ready: threading.Event):
+        asyncio.set_event_loop(loop)
+        loop.call_soon(ready.set)
+        try:
+            loop.run_forever()
+        finally:
+            loop.close()
+
+    def submit(self, coro: Awaitable[T]) -> "concurrent.futures.Future[T]":
+        """线程安全: 在事件循环中运行协程，返回 concurrent.futures.Future"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def call_soon(self, callback: Callable, *args):
+        """线程安全: 在事件循环线程中执行回调"""
+        self.loop.call_soon_threadsafe(callback, *args)
+
+    def stop(self, timeout: float = 2.0):
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is None:
+            return
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout)
+        if thread.is_alive():
+            logger.warning("Async runtime did not stop in time")
+
+
+async def run_warmup(tasks: dict[str, Callable[[], Awaitable]],
+                     on_done: Optional[Callable[[str, bool, float], None]] = None, timeout: float = 10.0):
+    """
+    在事件循环中并行执行启动预热 (与 WarmupWorker 相同的约定，但不占用线程):
+    每个任务的耗时写入启动时间线，单个失败或超时只记录日志。阻塞的任务可用 asyncio.to_thread 包装。
+    """
+    async def run_task(name: str, task: Callable[[], Awaitable]):
+        start = time.perf_counter()
+        ok = True
+        try:
+            await asyncio.wait_for(task(), timeout)
+        except Exception as e:
+            ok = False
+            logger.warning(f"Warmup '{name}' failed: {e!r}")
+        duration = time.perf_counter() - start
+        timeline.done(name, duration, ok)
+        if on_done is not None:
+            on_done(name, ok, duration)
+
+    await asyncio.gather(*(run_task(name, task) for name, task in tasks.items()))
+
+
+runtime = AsyncRuntime()
@@ -0,0 +1,276 @@
+import asyncio
+import json
+import re
+from dataclasses import dataclass
+from typing import Optional, TYPE_CHECKING
+
+from engine.tts import AudioFormat, TTSStream
+from utils.conversation import ConversationStore
+from utils.logger_setup import get_logger
+from utils.response_cache import CachedResponse
+from utils.stream_parser import PartialReplyParser, guess_text_lang, has_balanced_brackets
+from utils.turn_trace import TurnTrace
+
+if TYPE_CHECKING:
+    from engine.core import ConversationEngine
+
+logger = get_logger("ConversationSession")
+
+RESPONSE_CACHE_MAX_AUDIO_BYTES = 8 * 1024 * 1024
+
+
+@dataclass
+class Reply:
+    emotion: str
+    text: str
+    text_lang: str
+    raw_content: str
+    cached: bool = False
+
+
+def strip_brackets(text: str) -> str:
+    """Filter out text in brackets for TTS, matches (text) or （text）"""
+    return re.sub(r'[（\(].*?[）\)]', '', text)
+
+
+def parse_reply(content: str) -> tuple[Reply, bool]:
+    """
+    解析 LLM 的 JSON 回复 ({"emotion", "text", "text_lang"})。
+    :return: (回复, 是否解析成功)；失败时整段内容作为文本
+    """
+    try:
+        # Attempt to clean potential markdown wrappers
+        clean_content = content.replace("```json", "").replace("```", "").strip()
+        # Try to find JSON object if there's extra text
+        json_match = re.search(r'\{.*\}', clean_content, re.DOTALL)
+        if json_match:
+            clean_content = json_match.group(0)
+        data = json.loads(clean_content)
+        if isinstance(data, dict):
+            return Reply(data.get("emotion", "shy"), data.get("text", content), data.get("text_lang"), content), True
+    except Exception as e:
+        logger.error(f"JSON Parse Error: {e}, using raw content.")
+    return Reply("normal", content, "zh", content), False
+
+
+class TurnListener:
+    """
+    回合事件回调，全部在事件循环线程中调用，实现方需要自行切换到自己的线程 (如 Qt 信号)。
+    顺序: on_reply -> (on_segment -> [on_audio_format] -> on_audio*)* -> on_audio_end；
+    出错时为 on_failed (stage 为 "llm" 或 "tts"，后者只在还没有任何音频时发出，之后的分段错误会被跳过)。
+    """
+
+    def on_reply(self, turn_id: int, reply: Reply, text_ends: list[int]):
+        """回复已解析；text_ends 为每段 TTS 对应的显示文本结束位置"""
+
+    def on_segment(self, turn_id: int, index: int):
+        """第 index 段 TTS 开始输出"""
+
+    def on_audio_format(self, turn_id: int, audio_format: AudioFormat):
+        """本回合第一段音频的格式"""
+
+    def on_audio(self, turn_id: int, data: bytes):
+        """PCM 数据"""
+
+    def on_audio_end(self, turn_id: int):
+        """所有音频都已下载完毕"""
+
+    def on_failed(self, turn_id: int, stage: str, message: str):
+        """回合失败"""
+
+
+class ConversationSession:
+    """
+    单个前端的对话状态: 多轮历史、回合号与正在进行的回合任务。
+    同一会话同时只有一个回合，新回合开始时取消旧回合 (关闭 LLM 流与所有 TTS 下载)。
+    所有方法都需要在引擎的事件循环线程中调用。
+    """
+
+    def __init__(self, engine: "ConversationEngine", session_id: str):
+        self.engine = engine
+        self.session_id = session_id
+        self.conversation = ConversationStore(engine.system_prompt, max_context_tokens=engine.context_tokens)
+        self.turn_id = 0
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def busy(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def cancel(self):
+        if self.busy:
+            self._task.cancel()
+
+    async def run_turn(self, question: str, listener: TurnListener, trace: Optional[TurnTrace] = None,
+                       turn_id: Optional[int] = None) -> Optional[Reply]:
+        """
+        执行一个回合: 缓存查询 -> LLM 流式生成 (首句预合成) -> 解析 -> 按段 TTS，事件通过 listener 发出。
+        :param turn_id: 调用方的回合号 (用于丢弃迟到的事件)，默认自增
+        :return: 回复；LLM 失败时为 None
+        """
+        self.cancel()
+        self._task = asyncio.current_task()
+        self.turn_id = turn_id if turn_id is not None else self.turn_id + 1
+        turn_id = self.turn_id
+        try:
+            async with self.engine.turn_slots:
+                # 回复缓存按提问索引、所有会话共用，只在会话的第一个回合使用；
+                # 有上下文时 ("为什么？"、"然后呢？") 回复取决于之前的对话，不能回放别的会话的回答
+                cacheable = self.conversation.empty
+                cached = self.engine.cache.lookup(question) if cacheable else None
+                if cached is not None:
+                    logger.info(f"[{self.session_id}] Response cache hit: {cached.question} | {self.engine.cache.report()}")
+                    if trace:
+                        trace.set(cache="hit", cached_audio=cached.audio is not None)
+                    return await self._replay_cached(turn_id, question, cached, listener, trace)
+                return await self._ask(turn_id, question, listener, trace, cacheable)
+        finally:
+            if self._task is asyncio.current_task():
+                self._task = None
+
+    async def _replay_cached(self, turn_id: int, question: str, entry: CachedResponse, listener: TurnListener,
+                             trace: Optional[TurnTrace]) -> Reply:
+        """命中缓存: 有音频时直接输出，否则只对缓存文本做 TTS"""
+        self.conversation.append(question, entry.raw_content)
+        reply = Reply(entry.emotion, entry.text, entry.text_lang, entry.raw_content, cached=True)
+        listener.on_reply(turn_id, reply, [len(reply.text)])
+        if entry.audio is not None:
+            listener.on_segment(turn_id, 0)
+            listener.on_audio_format(turn_id, AudioFormat(*entry.audio_format))
+            listener.on_audio(turn_id, entry.audio)
+            listener.on_audio_end(turn_id)
+            return reply
+        streams = [self.engine.tts.open(strip_brackets(entry.text), entry.text_lang, trace)]
+        await self._play(turn_id, streams, listener, entry)
+        return reply
+
+    async def _ask(self, turn_id: int, question: str, listener: TurnListener,
+                   trace: Optional[TurnTrace], cacheable: bool = False) -> Optional[Reply]:
+        messages, prompt_estimate = self.conversation.build_messages(question)
+
+        def on_usage(usage: dict):
+            prompt_tokens = usage.get("prompt_tokens") or 0
+            self.conversation.calibrate(prompt_estimate, prompt_tokens)
+            if trace:
+                trace.set(prompt_tokens=prompt_tokens, completion_tokens=usage.get("completion_tokens"))
+            logger.info(f"[{self.session_id}] LLM usage: prompt={prompt_tokens}, "
+                        f"completion={usage.get('completion_tokens')}, "
+                        f"cache_hit={usage.get('prompt_cache_hit_tokens')}")
+
+        # 首句预合成: text 字段出现第一个完整句子时立即开始 TTS，与 LLM 的剩余生成并行
+        parser = PartialReplyParser()
+        speculative: Optional[TTSStream] = None
+        speculative_sentence = ""
+        speculation_attempted = False
+        parts = []
+        try:
+            async for piece in self.engine.llm.stream(messages, trace, on_usage):
+                parts.append(piece)
+                parser.feed(piece)
+                if speculative is not None:
+                    if parser.text_lang and parser.text_lang != speculative.text_lang:
+                        logger.info(f"Speculative TTS discarded, text_lang changed to {parser.text_lang}")
+                        speculative.cancel()
+                        speculative = None
+                    continue
+                if speculation_attempted:
+                    continue
+                sentence = parser.first_sentence()
+                if not sentence:
+                    continue
+                speculation_attempted = True
+                tts_sentence = strip_brackets(sentence).strip()
+                if not has_balanced_brackets(sentence) or not tts_sentence:
+                    continue
+                text_lang = parser.text_lang or guess_text_lang(sentence)
+                logger.info(f"Speculative TTS started: {tts_sentence} ({text_lang})")
+                speculative_sentence = sentence
+                speculative = self.engine.tts.open(tts_sentence, text_lang, trace, "tts.speculative")
+        except asyncio.CancelledError:
+            if speculative is not None:
+                speculative.cancel()
+            raise
+        except Exception as e:
+            if speculative is not None:
+                speculative.cancel()
+            logger.error(f"[{self.session_id}] LLM Call Error: {e}")
+            listener.on_failed(turn_id, "llm", str(e))
+            return None
+
+        content = "".join(parts)
+        self.conversation.append(question, content)
+        if trace:
+            trace.begin("reply.parse")
+        reply, parsed = parse_reply(content)
+        logger.info(f"Parsed emotion: {reply.emotion}")
+        entry = None
+        if parsed and cacheable:
+            entry = self.engine.cache.store(question, reply.emotion, reply.text, reply.text_lang, content)
+        if trace:
+            trace.end("reply.parse")
+
+        streams, text_ends = self._plan_segments(reply, speculative, speculative_sentence, trace)
+        listener.on_reply(turn_id, reply, text_ends)
+        await self._play(turn_id, streams, listener, entry)
+        return reply
+
+    def _plan_segments(self, reply: Reply, speculative: Optional[TTSStream], speculative_sentence: str,
+                       trace: Optional[TurnTrace]) -> tuple[list[TTSStream], list[int]]:
+        """
+        若最终解析结果与预合成的首句一致则复用其音频，只合成剩余部分；否则丢弃预合成。
+        同时返回每段对应的显示文本结束位置，用于字幕时间线。
+        """
+        tts = self.engine.tts
+        if speculative is not None:
+            if reply.text_lang == speculative.text_lang and reply.text.startswith(speculative_sentence):
+                logger.info("Speculative TTS reused for the first sentence.")
+                streams = [speculative]
+                text_ends = [len(speculative_sentence)]
+                rest = strip_brackets(reply.text[len(speculative_sentence):]).strip()
+                if rest:
+                    streams.append(tts.open(rest, reply.text_lang, trace, "tts.rest"))
+                    text_ends.append(len(reply.text))
+                return streams, text_ends
+            logger.info("Speculative TTS discarded, final reply differs.")
+            speculative.cancel()
+        return [tts.open(strip_brackets(reply.text), reply.text_lang, trace)], [len(reply.text)]
+
+    async def _play(self, turn_id: int, streams: list[TTSStream], listener: TurnListener,
+                    entry: Optional[CachedResponse]):
+        """按顺序输出各段音频 (各段已在后台并行下载)，完整的音频写入回复缓存"""
+        record: Optional[bytearray] = bytearray() if entry is not None else None
+        audio_format: Optional[AudioFormat] = None
+        try:
+            for index, stream in enumerate(streams):
+                listener.on_segment(turn_id, index)
+                try:
+                    async for item in stream:
+                        if isinstance(item, AudioFormat):
+                            if audio_format is None:
+                                audio_format = item
+                                listener.on_audio_format(turn_id, item)
+                            elif item != audio_format:
+                                logger.warning(f"TTS segment format {tuple(item)} differs from {tuple(audio_format)}")
+                            continue
+                        if record is not None:
+                            if len(record) + len(item) > RESPONSE_CACHE_MAX_AUDIO_BYTES:
+                                record = None
+                            else:
+                                record.extend(item)
+                        listener.on_audio(turn_id, item)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.error(f"[{self.session_id}] TTS Error: {e}")
+                    # 音频不完整，不写入回复缓存
+                    record = None
+                    if audio_format is None:
+                        # 还没有任何音频开始播放: 放弃剩余分段，只显示文字
+                        listener.on_failed(turn_id, "tts", f"TTS Error: {e}")
+                        return
+        finally:
+            for stream in streams:
+                stream.cancel()
+        listener.on_audio_end(turn_id)
+        if entry is not None and record and audio_format:
+            self.engine.cache.attach_audio(entry, tuple(audio_format), bytes(record))
@@ -0,0 +1,154 @@
+import asyncio
+import os
+import struct
+from typing import AsyncIterator, NamedTuple, Optional, Union
+from urllib.parse import urljoin
+
+from utils.lazy_import import lazy_import
+from utils.logger_setup import get_logger
+from utils.turn_trace import TurnTrace
+
+logger = get_logger("TTSClient")
+
+httpx = lazy_import("httpx")
+
+WAV_HEADER_SIZE = 44
+
+
+class AudioFormat(NamedTuple):
+    sample_rate: int
+    channels: int
+    sample_size: int  # bits
+
+    @property
+    def bytes_per_second(self) -> int:
+        return self.sample_rate * self.channels * (self.sample_size // 8)
+
+
+def parse_wav_header(header: bytes) -> AudioFormat:
+    # Offset 22: Num Channels (2 bytes), 24: Sample Rate (4 bytes), 34: Bits Per Sample (2 bytes)
+    channels = struct.unpack_from("<H", header, 22)[0]
+    sample_rate = struct.unpack_from("<I", header, 24)[0]
+    bits_per_sample = struct.unpack_from("<H", header, 34)[0]
+    return AudioFormat(sample_rate, channels, bits_per_sample)
+
+
+class TTSClient:
+    """
+    GPT-SoVITS /tts 流式接口的异步客户端，所有会话共用一个 httpx.AsyncClient 连接池。
+    配置默认取自 .env (GPT_SOVITS_API_URL / REF_AUDIO_PATH / REF_PROMPT_TEXT)。
+    """
+
+    def __init__(self, url: Optional[str] = None, ref_audio_path: Optional[str] = None,
+                 prompt_text: Optional[str] = None, prompt_lang: str = "zh", max_connections: int = 32):
+        self.url = url or os.getenv("GPT_SOVITS_API_URL")
+        self.ref_audio_path = ref_audio_path if ref_audio_path is not None else os.getenv("REF_AUDIO_PATH")
+        self.prompt_text = prompt_text if prompt_text is not None else os.getenv("REF_PROMPT_TEXT", "")
+        self.prompt_lang = prompt_lang
+        self.max_connections = max_connections
+        self._http: Optional["httpx.AsyncClient"] = None
+
+    @property
+    def http(self) -> "httpx.AsyncClient":
+        if self._http is None:
+            # 合成可能持续数十秒，读超时按两次数据块之间的间隔计算
+            self._http = httpx.AsyncClient(
+                timeout=httpx.Timeout(60.0, connect=5.0),
+                limits=httpx.Limits(max_connections=self.max_connections,
+                                    max_keepalive_connections=self.max_connections),
+            )
+        return self._http
+
+    async def warmup(self):
+        """请求 TTS 服务的 /health，提前建立连接并确认服务可用"""
+        resp = await self.http.get(urljoin(self.url, "/health"), timeout=5)
+        resp.raise_for_status()
+
+    async def stream(self, text: str, text_lang: str, trace: Optional[TurnTrace] = None,
+                     trace_label: str = "tts") -> AsyncIterator[Union[AudioFormat, bytes]]:
+        """先返回一个 AudioFormat (解析自 WAV 头)，之后是 PCM 数据块"""
+        params = {
+            "text": text,
+            "ref_audio_path": self.ref_audio_path,
+            "prompt_text": self.prompt_text,
+            "text_lang": text_lang,
+            "prompt_lang": self.prompt_lang,
+            "streaming_mode": "true",
+            "media_type": "wav",
+        }
+        if trace:
+            trace.begin(trace_label)
+        async with self.http.stream("GET", self.url, params=params) as resp:
+            resp.raise_for_status()
+            buffer = b""
+            header_parsed = False
+            async for chunk in resp.aiter_bytes(4096):
+                if header_parsed:
+                    yield chunk
+                    continue
+                buffer += chunk
+                if len(buffer) < WAV_HEADER_SIZE:
+                    continue
+                audio_format = parse_wav_header(buffer)
+                if trace:
+                    trace.mark(f"{trace_label}.first_byte")
+                logger.info(f"TTS audio: Rate={audio_format.sample_rate}, Ch={audio_format.channels}, "
+                            f"Bits={audio_format.sample_size}")
+                yield audio_format
+                if len(buffer) > WAV_HEADER_SIZE:
+                    yield buffer[WAV_HEADER_SIZE:]
+                header_parsed = True
+                buffer = b""
+        if trace:
+            trace.end(trace_label)
+
+    def open(self, text: str, text_lang: str, trace: Optional[TurnTrace] = None,
+             trace_label: str = "tts") -> "TTSStream":
+        return TTSStream(self, text, text_lang, trace, trace_label)
+
+    async def aclose(self):
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+
+_END = object()
+
+
+class TTSStream:
+    """
+    一段独立合成的 TTS 音频: 创建后立即在后台任务中下载，数据先缓存在队列里，
+    按顺序播放时再逐块读取 (首句可在 LLM 仍在生成时预合成)。需要在事件循环中创建。
+    """
+
+    def __init__(self, client: TTSClient, text: str, text_lang: str, trace: Optional[TurnTrace] = None,
+                 trace_label: str = "tts"):
+        self.text = text
+        self.text_lang = text_lang
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._task = asyncio.ensure_future(self._download(client.stream(text, text_lang, trace, trace_label)))
+
+    async def _download(self, source: AsyncIterator):
+        try:
+            async for item in source:
+                self._queue.put_nowait(item)
+            self._queue.put_nowait(_END)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self._queue.put_nowait(e)
+
+    def cancel(self):
+        """丢弃这段音频: 关闭 HTTP 响应，服务端随之停止推理"""
+        self._task.cancel()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> Union[AudioFormat, bytes]:
+        item = await self._queue.get()
+        if item is _END:
+            raise StopAsyncIteration
+        if isinstance(item, Exception):
+            raise item
+        return item
@@ -1,11 +1,11 @@
 import os
 from PyQt5.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
                              QPushButton, QLabel, QFrame, QGridLayout, QRadioButton, QApplication)
-from PyQt5.QtCore import Qt, QEvent
+from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QSurfaceFormat
 
 from ai_control import Controller, AIManager
-from canvas_live2d import Live2DSignals, Live2DCanvas
+from canvas_live2d import Live2DSignals, Live2DCanvas, PointerTracker
 from custom_widgets.bubble_label import BubbleLabel
 from custom_widgets.input_text_edit import InputTextEdit
 from utils import logger_setup, resources
@@ -141,8 +141,10 @@ class MainWindow(QMainWindow):
 
         # 初始化样式和状态
         self.init_styles()
-        # 初始化事件过滤器
-        self.init_event_filters()
+        # 鼠标跟踪: 一个应用级过滤器合并所有控件上的移动事件，由画布每帧消费
+        self.pointer_tracker = PointerTracker(self)
+        QApplication.instance().installEventFilter(self.pointer_tracker)
+        self.canvas.setPointerTracker(self.pointer_tracker)
         # 连接信号
         self.connect_ai_signals()
         self.connect_interal_signals()
@@ -157,16 +159,6 @@ class MainWindow(QMainWindow):
         else:
             logger.warning(f"QSS file not found at: {qss_path}")
 
-    def init_event_filters(self):
-        self.central_widget.installEventFilter(self)
-        self.controls_frame.installEventFilter(self)
-        self.status_label.installEventFilter(self)
-        self.voice_btn.installEventFilter(self)
-        self.voice_directly_radio.installEventFilter(self)
-        self.input_text.installEventFilter(self)
-        self.send_btn.installEventFilter(self)
-        self.bubble_container.installEventFilter(self)
-
     def connect_interal_signals(self):
         self.voice_btn.pressed.connect(self.ai_manager.start_voice_input)
         self.voice_btn.released.connect(self.ai_manager.stop_voice_input)
@@ -174,21 +166,14 @@ class MainWindow(QMainWindow):
         self.input_text.send_signal.connect(self.on_send_clicked)
         self.send_btn.clicked.connect(self.on_send_clicked)
 
-    def eventFilter(self, obj, event):
-        if event.type() == QEvent.MouseMove:
-            if self.canvas and self.canvas.model:
-                 # 将全局坐标映射到 canvas 本地坐标
-                 canvas_pos = self.canvas.mapFromGlobal(event.globalPos())
-                 self.canvas.model.Drag(canvas_pos.x(), canvas_pos.y())
-        return super().eventFilter(obj, event)
-
     def connect_ai_signals(self):
         self.ai_manager.response_ready.connect(self.on_response_ready)
-        self.ai_manager.typing_update.connect(self.on_typing_update)
+        self.ai_manager.typing_progress.connect(self.on_typing_progress)
         self.ai_manager.typing_finished.connect(self.on_typing_finished)
         self.ai_manager.status_update.connect(self.on_status_update)
         self.ai_manager.asr_partial_update.connect(self.on_asr_update)
         self.ai_manager.listening_state_changed.connect(self.on_listening_state)
+        self.live2dSignals.model_state_changed.connect(self.on_status_update)
         self.controller.audio_output_stopped.connect(self.on_audio_finished)
 
     def on_send_clicked(self):
@@ -198,6 +183,9 @@ class MainWindow(QMainWindow):
         self.ai_manager.process_input_text(text)
 
     def on_response_ready(self, text):
+        # 整段文本只设置一次，之后打字机只更新显示到第几个字
+        self.bubble_label.cancel_hide()
+        self.bubble_label.begin_reveal(text)
         # 触发显示动画
         self.bubble_label.start_show_anim()
 
@@ -207,16 +195,14 @@ class MainWindow(QMainWindow):
         self.status_label.setText(text)
 
     def on_typing_finished(self):
+        self.bubble_label.finish_reveal()
         if self.current_status_key == "tts-error" or self.current_status_key == "idle":
             # 如果 TTS 失败，我们不会收到 audio_finished 信号，所以在打字完成后隐藏
             self.bubble_label.schedule_hide()
             self.current_status_key = "idle"  # tts异常，因为打字机一般先于语音结束，不可由controller重置，由ui界面重置状态
 
-    def on_typing_update(self, current_text):
-        self.bubble_label.cancel_hide()
-        if not self.bubble_label.isVisible():
-            self.bubble_label.start_show_anim()
-        self.bubble_label.setText(current_text)
+    def on_typing_progress(self, count):
+        self.bubble_label.set_reveal(count)
 
     def on_audio_finished(self):
         # 音频完成 (TTS 或播放)，安排隐藏
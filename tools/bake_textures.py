@@ -0,0 +1,110 @@
+"""
+预烘焙 Live2D 模型贴图的低分辨率档位。
+
+live2d-py 在 LoadModelJson 中按 model3.json 的路径自行解码并上传 PNG，无法接入外部的
+GPU 压缩格式 (BC7/ETC2)，因此这里生成缩小后的 PNG 和引用它们的 model3.json，
+运行时由 utils.texture_cache 按档位选择。2048 档的解码量和显存约为原来的 1/4，1024 档约 1/16。
+
+用法:
+    python -m tools.bake_textures                      # 默认模型, 生成 2048 和 1024 两档
+    python -m tools.bake_textures --tiers 2048 --force
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image
+
+from utils.resources import MODEL_JSON_PATH
+from utils.texture_cache import (TEXTURE_TIERS, file_sha256, file_stat_key, load_manifest, manifest_path,
+                                 tier_model_json_name)
+
+
+def baked_texture_path(source: str, tier: int) -> str:
+    """vivian.4096/texture_00.png -> vivian.2048/texture_00.png"""
+    directory, name = os.path.split(source)
+    stem = directory.rsplit(".", 1)[0] if "." in directory else directory
+    return os.path.join(f"{stem}.{tier}", name).replace(os.sep, "/")
+
+
+def bake_one(source_path: str, target_path: str, tier: int) -> tuple[int, int]:
+    with Image.open(source_path) as image:
+        image = image.convert("RGBA")
+        width, height = image.size
+        scale = min(1.0, tier / max(width, height))
+        size = (max(1, round(width * scale)), max(1, round(height * scale)))
+        if size != image.size:
+            # 在预乘 alpha 空间中缩放，避免透明像素的颜色渗入边缘形成黑边
+            image = image.convert("RGBa").resize(size, Image.LANCZOS).convert("RGBA")
+        os.makedirs(os.path.dirname(target_path), exist_ok=True)
+        # 低压缩级别: 文件稍大，但打包体积不是瓶颈，解码更快
+        image.save(target_path, format="PNG", compress_level=1)
+    return size
+
+
+def bake(model_json_path: str, tiers: list[int], force: bool = False, jobs: int = 0) -> dict:
+    model_dir = os.path.dirname(model_json_path)
+    with open(model_json_path, "r", encoding="utf-8") as f:
+        model = json.load(f)
+    sources = model.get("FileReferences", {}).get("Textures", [])
+
+    manifest = load_manifest(model_json_path)
+    manifest.setdefault("tiers", {})
+    fingerprints = {}
+    for source in sources:
+        source_path = os.path.join(model_dir, source)
+        if not os.path.exists(source_path):
+            print(f"  skip missing texture {source}")
+            continue
+        fingerprints[source] = {"sha256": file_sha256(source_path), "stat": file_stat_key(source_path)}
+
+    with ProcessPoolExecutor(max_workers=jobs or None) as pool:
+        for tier in tiers:
+            previous = manifest["tiers"].get(str(tier), {}).get("sources", {})
+            entry = {"model_json": tier_model_json_name(model_json_path, tier), "sources": {}}
+            futures = {}
+            for source, fingerprint in fingerprints.items():
+                baked = baked_texture_path(source, tier)
+                entry["sources"][source] = {**fingerprint, "baked": baked}
+                up_to_date = (previous.get(source, {}).get("sha256") == fingerprint["sha256"]
+                              and os.path.exists(os.path.join(model_dir, baked)))
+                if force or not up_to_date:
+                    futures[source] = pool.submit(bake_one, os.path.join(model_dir, source),
+                                                  os.path.join(model_dir, baked), tier)
+            for source, future in futures.items():
+                size = future.result()
+                print(f"  [{tier}] {source} -> {entry['sources'][source]['baked']} {size[0]}x{size[1]}")
+
+            baked_model = json.loads(json.dumps(model))
+            baked_model["FileReferences"]["Textures"] = [
+                entry["sources"][source]["baked"] if source in entry["sources"] else source for source in sources
+            ]
+            with open(os.path.join(model_dir, entry["model_json"]), "w", encoding="utf-8") as f:
+                json.dump(baked_model, f, ensure_ascii=False, indent="\t")
+            manifest["tiers"][str(tier)] = entry
+
+    with open(manifest_path(model_json_path), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    return manifest
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description="Bake reduced-resolution Live2D texture tiers.")
+    parser.add_argument("--model", default=MODEL_JSON_PATH, help="path to *.model3.json")
+    parser.add_argument("--tiers", type=int, nargs="+", default=[2048, 1024],
+                        choices=[tier for tier in TEXTURE_TIERS if tier != max(TEXTURE_TIERS)])
+    parser.add_argument("--force", action="store_true", help="rebake even if the source hash is unchanged")
+    parser.add_argument("--jobs", type=int, default=0, help="worker processes (default: CPU count)")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    bake(args.model, args.tiers, args.force, args.jobs)
+    print(f"Baked tiers {args.tiers} in {time.perf_counter() - start:.1f}s -> {manifest_path(args.model)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,260 @@
+"""
+无窗口渲染基准测试: 在离屏 OpenGL 上下文中驱动真实的 Live2DCanvas 渲染管线
+(initializeGL -> on_init 异步加载模型 -> paintGL: on_draw 画入画布 FBO 再合成到目标 FBO)，
+按固定分辨率与 DPR 回放脚本化场景，输出每帧耗时分布 (JSON)。
+
+场景: idle / 每个表情 (exp_signal) / 每个 Tap 动作 / 口型扫频 (on_lip_sync)。
+帧耗时含 glFinish，软件渲染 (Mesa llvmpipe) 下即为完整的 CPU 光栅化时间。
+帧是连续绘制的，模型模拟仍按 LIVE2D_SIM_HZ 推进，sim_steps 为该场景中实际执行的 Update 次数
+(设为 0 可让每帧都执行 Update，测量模拟 + 绘制的最坏情况)。
+设置 LIVE2D_SCENE_MODELS 可测多模型场景，models 中为每个模型的 CPU 耗时与贴图显存估算。
+
+用法:
+    python -m tools.bench_render --software                          # offscreen 平台 + llvmpipe
+    python -m tools.bench_render --sizes 540x960 1080x1920 --dpr 1 2 -o render.json
+    python -m tools.bench_render --software --baseline render.json   # p50 比基线慢 20% 以上时返回 1
+没有 X 服务器时 offscreen 平台可能拿不到 GLX 上下文，可改用 xvfb-run -a，
+或 QT_QPA_PLATFORM=eglfs EGL_PLATFORM=surfaceless (Mesa EGL)。
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import sys
+import time
+from typing import Callable, Optional
+
+from utils.turn_trace import percentile
+
+
+def parse_size(value: str) -> tuple[int, int]:
+    width, _, height = value.lower().partition("x")
+    return int(width), int(height)
+
+
+def frame_stats(samples: list[float]) -> dict:
+    values = sorted(samples)
+    mean = sum(values) / len(values)
+    return {
+        "frames": len(values),
+        "mean_ms": round(mean, 3),
+        "p50_ms": round(percentile(values, 0.5), 3),
+        "p90_ms": round(percentile(values, 0.9), 3),
+        "p99_ms": round(percentile(values, 0.99), 3),
+        "max_ms": round(values[-1], 3),
+        "fps": round(1000 / mean, 1) if mean > 0 else None,
+    }
+
+
+def build_scenarios(canvas, frames: int) -> list[tuple[str, int, Callable[[], None], Optional[Callable[[int], None]]]]:
+    """(名称, 帧数, 开始时调用, 每帧调用)"""
+    import live2d.v3 as live2d
+
+    scenarios = [("idle", frames, lambda: None, None)]
+    for name in ["normal", *canvas.EXPRESSION_MOTIONS]:
+        scenarios.append((f"expression:{name}", frames, lambda name=name: canvas.exp_signal(name), None))
+    for group, count in sorted(canvas.model.GetMotionGroups().items()):
+        if not group.startswith("Tap"):
+            continue
+        for index in range(count):
+            start = lambda group=group, index=index: canvas.model.StartMotion(group, index, live2d.MotionPriority.FORCE)
+            scenarios.append((f"tap:{group}_{index}", frames, start, None))
+
+    def lip_sweep(frame: int):
+        # 0.5Hz -> 8Hz 的线性扫频，覆盖说话时口型的开合频率
+        t = frame / 60
+        freq = 0.5 + 7.5 * frame / max(1, frames - 1)
+        canvas.on_lip_sync(0.5 + 0.5 * math.sin(2 * math.pi * freq * t))
+
+    scenarios.append(("lipsync", frames, lambda: None, lip_sweep))
+    return scenarios
+
+
+def run(args) -> Optional[dict]:
+    from PyQt5.QtCore import QEventLoop, QTimer
+    from PyQt5.QtGui import QOffscreenSurface, QOpenGLContext, QOpenGLFramebufferObject, QSurfaceFormat
+    from PyQt5.QtWidgets import QApplication
+    import OpenGL.GL as GL
+    import live2d.v3 as live2d
+
+    from ai_control import Controller
+    from canvas_live2d import Live2DCanvas, Live2DSignals
+
+    class HeadlessLive2DCanvas(Live2DCanvas):
+        """不显示窗口: GL 上下文、目标 FBO 与 DPR 由基准测试提供，其余渲染路径与窗口中完全一致"""
+
+        def __init__(self, context: QOpenGLContext, surface: QOffscreenSurface):
+            super().__init__(Controller(), Live2DSignals())
+            self.gl_context = context
+            self.gl_surface = surface
+            self.target: Optional[QOpenGLFramebufferObject] = None
+            self.dpr = 1.0
+
+        def makeCurrent(self):
+            self.gl_context.makeCurrent(self.gl_surface)
+
+        def doneCurrent(self):
+            pass  # 整个测试期间上下文保持 current
+
+        def devicePixelRatioF(self):
+            return self.dpr
+
+        def defaultFramebufferObject(self):
+            return self.target.handle()
+
+        def timerEvent(self, _):
+            pass  # 帧由测试循环驱动，不使用 120Hz 定时器
+
+        def configure(self, width: int, height: int, dpr: float):
+            self.dpr = dpr
+            self.resize(width, height)
+            self.target = QOpenGLFramebufferObject(max(1, int(width * dpr)), max(1, int(height * dpr)),
+                                                   QOpenGLFramebufferObject.CombinedDepthStencil)
+            self.target.bind()
+            self.resizeGL(width, height)
+
+    app = QApplication(sys.argv)
+    fmt = QSurfaceFormat()
+    fmt.setVersion(3, 3)
+    fmt.setProfile(QSurfaceFormat.CoreProfile)
+    surface = QOffscreenSurface()
+    surface.setFormat(fmt)
+    surface.create()
+    context = QOpenGLContext()
+    context.setFormat(fmt)
+    if not context.create() or not context.makeCurrent(surface):
+        print(f"OpenGL context unavailable on platform '{app.platformName()}'", file=sys.stderr)
+        return None
+
+    live2d.init()
+    canvas = HeadlessLive2DCanvas(context, surface)
+    width, height = args.sizes[0]
+    canvas.configure(width, height, args.dpr[0])
+
+    # 与窗口中相同的异步加载: on_init 启动预读线程，完成后在主线程 load_model
+    loop = QEventLoop()
+    states = []
+
+    def on_model_state(state: str):
+        states.append(state)
+        if state != "model-loading":
+            loop.quit()
+
+    canvas.live2dSignals.model_state_changed.connect(on_model_state)
+    QTimer.singleShot(int(args.load_timeout * 1000), loop.quit)
+    load_start = time.perf_counter()
+    canvas.initializeGL()
+    loop.exec_()
+    load_seconds = time.perf_counter() - load_start
+    if canvas.model is None:
+        print(f"Model failed to load ({states[-1] if states else 'timeout'})", file=sys.stderr)
+        return None
+
+    def render_frame() -> float:
+        start = time.perf_counter()
+        canvas.paintGL()
+        GL.glFinish()
+        return (time.perf_counter() - start) * 1000
+
+    report = {
+        "environment": {
+            "platform": app.platformName(),
+            "gl_vendor": GL.glGetString(GL.GL_VENDOR).decode(errors="replace"),
+            "gl_renderer": GL.glGetString(GL.GL_RENDERER).decode(errors="replace"),
+            "gl_version": GL.glGetString(GL.GL_VERSION).decode(errors="replace"),
+            "python": platform.python_version(),
+            "model": canvas.model_path,
+            "model_load_ms": round(load_seconds * 1000, 1),
+        },
+        "runs": [],
+    }
+    print(f"Rendering with {report['environment']['gl_renderer']} ({report['environment']['platform']}), "
+          f"model loaded in {report['environment']['model_load_ms']:.0f} ms", file=sys.stderr)
+
+    for width, height in args.sizes:
+        for dpr in args.dpr:
+            canvas.configure(width, height, dpr)
+            for _ in range(args.warmup):
+                render_frame()
+            for name, count, begin, per_frame in build_scenarios(canvas, args.frames):
+                canvas.exp_signal("normal")
+                begin()
+                samples = []
+                steps_before = canvas.simClock.stats["steps"]
+                for entry in canvas.scene:
+                    entry.reset_stats()
+                for frame in range(count):
+                    if per_frame is not None:
+                        per_frame(frame)
+                    samples.append(render_frame())
+                run_report = {"size": [width, height], "dpr": dpr, "scenario": name, **frame_stats(samples),
+                              "sim_steps": canvas.simClock.stats["steps"] - steps_before,
+                              "models": canvas.scene_report()}
+                report["runs"].append(run_report)
+                print(f"  {width}x{height}@{dpr:g} {name:28} p50 {run_report['p50_ms']:7.2f} ms  "
+                      f"p99 {run_report['p99_ms']:7.2f} ms", file=sys.stderr)
+                if args.dump:
+                    os.makedirs(args.dump, exist_ok=True)
+                    image_name = f"{width}x{height}@{dpr:g}_{name.replace(':', '_')}.png"
+                    canvas.target.toImage().save(os.path.join(args.dump, image_name))
+            canvas.modelAttr.setLipParamY(0.0)
+
+    canvas.target.release()
+    live2d.dispose()
+    return report
+
+
+def compare(report: dict, baseline: dict, tolerance: float) -> list[str]:
+    """返回 p50 超出基线 (1 + tolerance) 倍的场景"""
+    previous = {(tuple(r["size"]), r["dpr"], r["scenario"]): r for r in baseline.get("runs", [])}
+    regressions = []
+    for run_report in report["runs"]:
+        old = previous.get((tuple(run_report["size"]), run_report["dpr"], run_report["scenario"]))
+        if old and run_report["p50_ms"] > old["p50_ms"] * (1 + tolerance):
+            regressions.append(f"{run_report['size'][0]}x{run_report['size'][1]}@{run_report['dpr']:g} "
+                               f"{run_report['scenario']}: {old['p50_ms']:.2f} -> {run_report['p50_ms']:.2f} ms")
+    return regressions
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark Live2DCanvas rendering on an offscreen GL surface.")
+    parser.add_argument("--sizes", type=parse_size, nargs="+", default=[(540, 960)], metavar="WxH")
+    parser.add_argument("--dpr", type=float, nargs="+", default=[1.0])
+    parser.add_argument("--frames", type=int, default=180, help="frames per scenario")
+    parser.add_argument("--warmup", type=int, default=30, help="untimed frames after each resize")
+    parser.add_argument("--software", action="store_true", help="force Mesa llvmpipe on the offscreen platform")
+    parser.add_argument("--load-timeout", type=float, default=60.0)
+    parser.add_argument("--dump", help="directory for the last frame of each scenario (PNG)")
+    parser.add_argument("-o", "--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--baseline", help="previous JSON report to compare p50 frame times against")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    # 平台与驱动在 QApplication 创建时确定
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    if args.software:
+        os.environ["LIBGL_ALWAYS_SOFTWARE"] = "1"
+        os.environ["GALLIUM_DRIVER"] = "llvmpipe"
+
+    report = run(args)
+    if report is None:
+        return 2
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    else:
+        print(output)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
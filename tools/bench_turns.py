@@ -0,0 +1,179 @@
+"""
+端到端回合基准测试: 启动本地 OpenAI 桩服务与 GPT-SoVITS 桩服务，
+用无声的音频输出 (NullAudioOutput，按实时速率消耗数据) 驱动真实的 AIManager，
+按脚本连续提问 N 个回合 (process_input_text -> 引擎 LLM/TTS -> call_success_handler -> 播放)，
+从每个回合的延迟追踪中统计:
+  first_text  (回合开始 -> 回复文本开始显示, text.shown)
+  first_audio (回合开始 -> 首次写入音频输出, audio.first_write)
+  total       (回合开始 -> 播放完毕)
+
+用法:
+    python -m tools.bench_turns --turns 20 -o turns.json
+    python -m tools.bench_turns --llm-ttft 0.8 --llm-rate 30 --tts-rtf 0.5 --playback-speed 4
+默认每个回合都绕过回复缓存；传入 --cache 时每个回合前清空对话历史
+(缓存只用于没有上下文的回合)，重复的问题走缓存回放路径。
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Optional
+
+from utils.turn_trace import percentile, summarize
+
+QUESTIONS = [
+    "今天天气不错",
+    "How are you today?",
+    "今日は何をしていましたか？",
+    "给我讲讲你最喜欢的东西吧",
+    "What should we do this weekend?",
+]
+
+METRICS = {"first_text": "text.shown", "first_audio": "audio.first_write"}
+
+
+def metric_stats(values: list[float]) -> Optional[dict]:
+    if not values:
+        return None
+    values = sorted(values)
+    return {
+        "count": len(values),
+        "mean_ms": round(sum(values) / len(values), 1),
+        "p50_ms": round(percentile(values, 0.5), 1),
+        "p90_ms": round(percentile(values, 0.9), 1),
+        "p99_ms": round(percentile(values, 0.99), 1),
+        "max_ms": round(values[-1], 1),
+    }
+
+
+def start_stubs(args) -> tuple[object, object, int, int]:
+    """桩服务运行在独立的事件循环线程中，与被测的引擎运行时互不影响"""
+    from engine.runtime import AsyncRuntime
+    from tools.stub_openai import StubOpenAI, serve
+    from tools.stub_tts import StubTTS
+
+    stub_runtime = AsyncRuntime("stub-servers")
+    llm = StubOpenAI(args.llm_ttft, args.llm_rate, args.llm_slow_ratio, args.llm_slow_ttft)
+    tts = StubTTS(args.tts_rtf, args.tts_first_chunk)
+    llm_server = stub_runtime.submit(serve(llm, "127.0.0.1", 0)).result()
+    tts_server = stub_runtime.submit(serve(tts, "127.0.0.1", 0)).result()
+    return (stub_runtime, (llm, tts), llm_server.sockets[0].getsockname()[1],
+            tts_server.sockets[0].getsockname()[1])
+
+
+def run(args) -> dict:
+    stub_runtime, (llm_stub, tts_stub), llm_port, tts_port = start_stubs(args)
+    # 各模块在构造时读取配置，必须在导入 AIManager 之前设置
+    os.environ.update({
+        "DEEPSEEK_API_URL": f"http://127.0.0.1:{llm_port}/v1",
+        "DEEPSEEK_API_KEY": "stub",
+        "DEEPSEEK_MODEL": "stub",
+        "LLM_HEDGE_API_URL": "",
+        "GPT_SOVITS_API_URL": f"http://127.0.0.1:{tts_port}/tts",
+        "REF_AUDIO_PATH": "stub.wav",
+        "TURN_TRACE_REPORT_EVERY": "0",
+    })
+    os.environ.setdefault("TURN_TRACE_LOG", "")
+
+    from PyQt5.QtCore import QCoreApplication, QEventLoop, QTimer
+
+    from ai_control import AIManager, Controller
+    from canvas_live2d import Live2DSignals
+    from engine.runtime import runtime
+    from utils.null_audio import NullAudioOutput
+    from utils.response_cache import ResponseCache
+    from utils.turn_trace import tracer
+
+    app = QCoreApplication(sys.argv)
+    manager = AIManager(Controller(), Live2DSignals(),
+                        audio_output_factory=lambda fmt, parent: NullAudioOutput(fmt, parent, args.playback_speed))
+    if not args.cache:
+        manager.engine.cache = ResponseCache(ttl_seconds=0)
+    runtime.submit(manager.engine.warmup()).result(timeout=10)
+
+    questions = args.questions or QUESTIONS
+    turns = []
+    records = []
+    for index in range(args.turns):
+        question = questions[index % len(questions)]
+        if args.cache:
+            manager.session.conversation.clear()
+        # records 是有长度上限的 deque，回合数超过上限后长度不再增长，因此用结束计数判断
+        finished_before = tracer.finished_count
+        loop = QEventLoop()
+        poll = QTimer()
+        poll.setInterval(5)
+        poll.timeout.connect(lambda: tracer.finished_count > finished_before and loop.quit())
+        poll.start()
+        QTimer.singleShot(int(args.turn_timeout * 1000), loop.quit)
+        manager.process_input_text(question)
+        loop.exec_()
+        poll.stop()
+        if tracer.finished_count == finished_before:
+            manager.cancel_turn()  # 超时: 以 cancelled 结束追踪
+        record = tracer.records[-1]
+        records.append(record)
+        turn = {"question": question, "outcome": record["outcome"], "total_ms": record["total_ms"]}
+        for name, mark in METRICS.items():
+            turn[f"{name}_ms"] = record["marks"].get(mark)
+        turns.append(turn)
+        print(f"  turn {index + 1:3d} {record['outcome']:9} first_text {turn['first_text_ms'] or 0:7.0f} ms  "
+              f"first_audio {turn['first_audio_ms'] or 0:7.0f} ms  total {turn['total_ms']:7.0f} ms", file=sys.stderr)
+        if args.gap > 0:
+            time.sleep(args.gap)
+
+    ok = [turn for turn in turns if turn["outcome"] == "ok"]
+    report = {
+        "config": {key: value for key, value in vars(args).items() if key != "output"},
+        "summary": {
+            "turns": len(turns),
+            "ok": len(ok),
+            **{name: metric_stats([t[f"{name}_ms"] for t in ok if t[f"{name}_ms"] is not None])
+               for name in [*METRICS, "total"]},
+        },
+        "marks": summarize(records),
+        "turns": turns,
+        "stubs": {"llm": llm_stub.stats, "tts": tts_stub.stats},
+    }
+    manager.shutdown()
+    stub_runtime.stop()
+    app.quit()
+    return report
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description="End-to-end turn benchmark against local LLM/TTS stubs.")
+    parser.add_argument("--turns", type=int, default=10)
+    parser.add_argument("--questions", nargs="+", help="scripted questions, cycled (default: zh/en/ja mix)")
+    parser.add_argument("--llm-ttft", type=float, default=0.3, help="stub LLM first token delay (seconds)")
+    parser.add_argument("--llm-rate", type=float, default=50.0, help="stub LLM tokens per second")
+    parser.add_argument("--llm-slow-ratio", type=float, default=0.0)
+    parser.add_argument("--llm-slow-ttft", type=float, default=3.0)
+    parser.add_argument("--tts-rtf", type=float, default=0.3, help="stub TTS synthesis time / audio duration")
+    parser.add_argument("--tts-first-chunk", type=float, default=0.15)
+    parser.add_argument("--playback-speed", type=float, default=1.0, help="null audio sink consumption speed")
+    parser.add_argument("--cache", action="store_true", help="keep the response cache enabled")
+    parser.add_argument("--gap", type=float, default=0.0, help="idle seconds between turns")
+    parser.add_argument("--turn-timeout", type=float, default=60.0)
+    parser.add_argument("-o", "--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+
+    report = run(args)
+    summary = report["summary"]
+    for name in [*METRICS, "total"]:
+        stats = summary[name]
+        if stats:
+            print(f"{name:12} p50 {stats['p50_ms']:7.0f} ms  p90 {stats['p90_ms']:7.0f} ms  "
+                  f"p99 {stats['p99_ms']:7.0f} ms", file=sys.stderr)
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    else:
+        print(output)
+    return 0 if summary["ok"] == summary["turns"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,189 @@
+"""
+本地 OpenAI 兼容接口桩服务 (只依赖标准库)，用于在没有真实大模型服务时测试对冲路由与流式管线:
+GET /v1/models、POST /v1/chat/completions (stream=true 时为 SSE 流式，末尾带 usage；否则一次返回)。
+回复为 DEFAULT_SYSTEM_PROMPT 约定的 JSON ({"emotion", "text", "text_lang"})，语种按最后一条用户消息判断，情绪依次轮换。
+首 token 延迟可设置长尾 (--slow-ratio 的请求使用 --slow-ttft)，之后按 --rate 个 token/秒 生成，客户端断开时立即停止生成。
+
+用法:
+    python -m tools.stub_openai --port 18001 --ttft 0.3 --slow-ratio 0.2 --slow-ttft 3
+    python -m tools.stub_openai --port 18002 --ttft 0.5 --rate 80
+对应 .env: DEEPSEEK_API_URL=http://127.0.0.1:18001/v1  LLM_HEDGE_API_URL=http://127.0.0.1:18002/v1
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+import uuid
+from typing import Optional
+
+from utils.stream_parser import guess_text_lang
+
+REPLIES = {
+    "zh": "是的，法厄同大人！今天阳光真好。我们一起出去走走吧，顺便去看看新开的那家店。",
+    "en": "I'm doing well, Phaethon-sama! The weather is lovely today. Shall we go out for a walk together?",
+    "ja": "はい、ファエトン様！今日はとてもいい天気ですね。一緒に散歩に行きませんか？",
+}
+EMOTIONS = ["normal", "shy", "scowl", "cry", "umbrella_close"]
+
+
+class StubOpenAI:
+    def __init__(self, ttft: float = 0.3, rate: float = 50.0, slow_ratio: float = 0.0, slow_ttft: float = 3.0,
+                 chars_per_token: int = 2, name: str = "stub"):
+        self.ttft = ttft
+        self.rate = rate
+        self.slow_ratio = slow_ratio
+        self.slow_ttft = slow_ttft
+        self.chars_per_token = chars_per_token
+        self.name = name
+        self.stats = {"requests": 0, "completed": 0, "disconnected": 0}
+
+    def reply_for(self, messages: list[dict]) -> str:
+        question = next((m.get("content", "") for m in reversed(messages) if m.get("role") == "user"), "")
+        lang = guess_text_lang(question) if question else "zh"
+        emotion = EMOTIONS[self.stats["requests"] % len(EMOTIONS)]
+        reply = {"emotion": emotion, "text": REPLIES.get(lang, REPLIES["zh"]), "text_lang": lang}
+        return json.dumps(reply, ensure_ascii=False)
+
+    def first_token_delay(self) -> float:
+        return self.slow_ttft if random.random() < self.slow_ratio else self.ttft
+
+    def tokens(self, content: str) -> list[str]:
+        step = self.chars_per_token
+        return [content[i:i + step] for i in range(0, len(content), step)]
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request = await read_request(reader)
+                if request is None:
+                    break
+                method, target, body = request
+                path = target.split("?", 1)[0].rstrip("/")
+                if method == "GET" and path.endswith("/models"):
+                    await send_json(writer, {"object": "list", "data": [{"id": self.name, "object": "model"}]})
+                elif method == "POST" and path.endswith("/chat/completions"):
+                    await self.chat_completions(writer, json.loads(body or b"{}"))
+                else:
+                    await send_json(writer, {"error": {"message": f"{method} {path} not found"}}, status=404)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            self.stats["disconnected"] += 1
+        finally:
+            writer.close()
+
+    async def chat_completions(self, writer: asyncio.StreamWriter, payload: dict):
+        self.stats["requests"] += 1
+        messages = payload.get("messages", [])
+        content = self.reply_for(messages)
+        pieces = self.tokens(content)
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        created = int(time.time())
+        model = payload.get("model") or self.name
+        prompt_tokens = sum(len(str(m.get("content", ""))) for m in messages) // self.chars_per_token
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": len(pieces),
+                 "total_tokens": prompt_tokens + len(pieces)}
+
+        if not payload.get("stream"):
+            # 非流式: 等待完整生成所需的时间后一次返回
+            await asyncio.sleep(self.first_token_delay() + (len(pieces) - 1) / self.rate)
+            await send_json(writer, {
+                "id": completion_id, "object": "chat.completion", "created": created, "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content},
+                             "finish_reason": "stop"}],
+                "usage": usage,
+            })
+            self.stats["completed"] += 1
+            return
+
+        def chunk(delta: dict, finish_reason: Optional[str] = None, usage: Optional[dict] = None) -> dict:
+            data = {"id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                    "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}] if usage is None else []}
+            if usage is not None:
+                data["usage"] = usage
+            return data
+
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nCache-Control: no-cache\r\n"
+                     b"Transfer-Encoding: chunked\r\n\r\n")
+        await asyncio.sleep(self.first_token_delay())
+        await send_event(writer, chunk({"role": "assistant", "content": ""}))
+        for i, piece in enumerate(pieces):
+            if i:
+                await asyncio.sleep(1 / self.rate)
+            await send_event(writer, chunk({"content": piece}))
+        await send_event(writer, chunk({}, "stop"))
+        if (payload.get("stream_options") or {}).get("include_usage"):
+            await send_event(writer, chunk({}, usage=usage))
+        await send_chunk(writer, b"data: [DONE]\n\n")
+        await send_chunk(writer, b"")
+        self.stats["completed"] += 1
+
+
+async def read_request(reader: asyncio.StreamReader) -> Optional[tuple[str, str, bytes]]:
+    """读取一个 HTTP/1.1 请求，返回 (方法, 请求目标 (含查询字符串), 请求体)；连接关闭时返回 None"""
+    try:
+        head = await reader.readuntil(b"\r\n\r\n")
+    except asyncio.IncompleteReadError:
+        return None
+    lines = head.decode("latin-1").split("\r\n")
+    method, target, _ = lines[0].split(" ", 2)
+    headers = {}
+    for line in lines[1:]:
+        if ":" in line:
+            key, value = line.split(":", 1)
+            headers[key.strip().lower()] = value.strip()
+    length = int(headers.get("content-length", 0))
+    body = await reader.readexactly(length) if length else b""
+    return method, target, body
+
+
+async def send_chunk(writer: asyncio.StreamWriter, data: bytes):
+    writer.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+    await writer.drain()
+
+
+async def send_event(writer: asyncio.StreamWriter, data: dict):
+    await send_chunk(writer, f"data: {json.dumps(data, ensure_ascii=False)}\n\n".encode())
+
+
+async def send_json(writer: asyncio.StreamWriter, data: dict, status: int = 200):
+    body = json.dumps(data, ensure_ascii=False).encode()
+    reason = "OK" if status == 200 else "Not Found"
+    writer.write(f"HTTP/1.1 {status} {reason}\r\nContent-Type: application/json\r\n"
+                 f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+    await writer.drain()
+
+
+async def serve(stub, host: str, port: int) -> asyncio.AbstractServer:
+    """stub 需提供 handle(reader, writer)；port 为 0 时由系统分配"""
+    return await asyncio.start_server(stub.handle, host, port)
+
+
+async def main_async(args):
+    stub = StubOpenAI(args.ttft, args.rate, args.slow_ratio, args.slow_ttft, args.chars_per_token, args.name)
+    server = await serve(stub, args.host, args.port)
+    print(f"Stub OpenAI API on http://{args.host}:{args.port}/v1", file=sys.stderr)
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description="Local OpenAI-compatible chat completions stub.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=18001)
+    parser.add_argument("--name", default="stub", help="model id reported by /v1/models")
+    parser.add_argument("--ttft", type=float, default=0.3, help="first token delay (seconds)")
+    parser.add_argument("--rate", type=float, default=50.0, help="tokens per second after the first token")
+    parser.add_argument("--slow-ratio", type=float, default=0.0, help="fraction of requests using --slow-ttft")
+    parser.add_argument("--slow-ttft", type=float, default=3.0, help="first token delay of slow requests")
+    parser.add_argument("--chars-per-token", type=int, default=2, help="characters of the reply per streamed token")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(main_async(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,123 @@
+"""
+本地 GPT-SoVITS /tts 桩服务 (只依赖标准库)，与 backend_adapters/GPT-SoVITS/api_v2.py 的流式接口一致:
+GET /tts?text=...&text_lang=...&streaming_mode=true → 先返回 WAV 头，之后分块返回 PCM；GET /health。
+音频为合成的带音节包络的正弦波 (口型有开合)，时长按文本长度估算，
+每块的生成耗时 = 块时长 × 实时率 (--rtf)，首块额外等待 --first-chunk 秒，客户端断开时立即停止。
+
+用法:
+    python -m tools.stub_tts --port 19980 --rtf 0.3
+对应 .env: GPT_SOVITS_API_URL=http://127.0.0.1:19980/tts
+"""
+import argparse
+import asyncio
+import math
+import struct
+import sys
+from array import array
+from urllib.parse import parse_qs
+
+from tools.stub_openai import read_request, send_chunk, send_json, serve
+
+# 每个字符的朗读时长 (秒)
+SECONDS_PER_CHAR = {"zh": 0.22, "ja": 0.15, "en": 0.06}
+
+
+def wav_header(sample_rate: int, channels: int, bits: int) -> bytes:
+    """流式 WAV 头，数据长度未知时按 GPT-SoVITS 的做法填最大值"""
+    block_align = channels * bits // 8
+    return (b"RIFF" + struct.pack("<I", 0xFFFFFFFF) + b"WAVE"
+            + b"fmt " + struct.pack("<IHHIIHH", 16, 1, channels, sample_rate, sample_rate * block_align,
+                                    block_align, bits)
+            + b"data" + struct.pack("<I", 0xFFFFFFFF))
+
+
+def synth_wave(sample_rate: int, seconds: float = 1.0) -> bytes:
+    """220Hz 正弦波乘以 4Hz 音节包络的一秒 16bit PCM，循环使用"""
+    samples = array("h", (
+        int(9000 * abs(math.sin(math.pi * 4 * i / sample_rate)) * math.sin(2 * math.pi * 220 * i / sample_rate))
+        for i in range(int(sample_rate * seconds))
+    ))
+    return samples.tobytes()
+
+
+class StubTTS:
+    def __init__(self, rtf: float = 0.3, first_chunk: float = 0.15, chunk_seconds: float = 0.25,
+                 sample_rate: int = 32000):
+        self.rtf = rtf
+        self.first_chunk = first_chunk
+        self.chunk_seconds = chunk_seconds
+        self.sample_rate = sample_rate
+        self.wave = synth_wave(sample_rate)
+        self.stats = {"requests": 0, "completed": 0, "disconnected": 0, "audio_seconds": 0.0}
+
+    def duration(self, text: str, text_lang: str) -> float:
+        return max(0.5, len(text.strip()) * SECONDS_PER_CHAR.get(text_lang, 0.2))
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request = await read_request(reader)
+                if request is None:
+                    break
+                method, target, _ = request
+                path, _, query = target.partition("?")
+                if method == "GET" and path.rstrip("/") == "/health":
+                    await send_json(writer, {"status": "ok"})
+                elif method == "GET" and path.rstrip("/") == "/tts":
+                    params = {key: values[0] for key, values in parse_qs(query).items()}
+                    await self.tts(writer, params.get("text", ""), params.get("text_lang", "zh"))
+                else:
+                    await send_json(writer, {"message": f"{method} {path} not found"}, status=404)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            self.stats["disconnected"] += 1
+        finally:
+            writer.close()
+
+    async def tts(self, writer: asyncio.StreamWriter, text: str, text_lang: str):
+        self.stats["requests"] += 1
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: audio/wav\r\nTransfer-Encoding: chunked\r\n\r\n")
+        await send_chunk(writer, wav_header(self.sample_rate, 1, 16))
+
+        bytes_per_second = self.sample_rate * 2
+        total = int(self.duration(text, text_lang) * bytes_per_second) // 2 * 2
+        chunk_size = int(self.chunk_seconds * bytes_per_second) // 2 * 2
+        await asyncio.sleep(self.first_chunk)
+        offset = 0
+        while offset < total:
+            size = min(chunk_size, total - offset)
+            await asyncio.sleep(size / bytes_per_second * self.rtf)
+            start = offset % len(self.wave)
+            data = (self.wave[start:] + self.wave)[:size]
+            await send_chunk(writer, data)
+            offset += size
+        await send_chunk(writer, b"")
+        self.stats["completed"] += 1
+        self.stats["audio_seconds"] += total / bytes_per_second
+
+
+async def main_async(args):
+    stub = StubTTS(args.rtf, args.first_chunk, args.chunk_seconds, args.sample_rate)
+    server = await serve(stub, args.host, args.port)
+    print(f"Stub GPT-SoVITS API on http://{args.host}:{args.port}/tts", file=sys.stderr)
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description="Local GPT-SoVITS /tts streaming stub.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=19980)
+    parser.add_argument("--rtf", type=float, default=0.3, help="synthesis time / audio duration")
+    parser.add_argument("--first-chunk", type=float, default=0.15, help="extra delay before the first chunk")
+    parser.add_argument("--chunk-seconds", type=float, default=0.25, help="audio per streamed chunk")
+    parser.add_argument("--sample-rate", type=int, default=32000)
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(main_async(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,134 @@
+import re
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from utils.logger_setup import get_logger
+
+logger = get_logger("Conversation")
+
+_CJK_PATTERN = re.compile(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uff00-\uffef]")
+
+
+class TokenEstimator:
+    """
+    不依赖分词器的 token 估算。
+    默认比例参考 DeepSeek 文档: 1 个中文字符约 0.6 token, 1 个英文字符约 0.3 token。
+    可用 API 返回的 usage.prompt_tokens 进行校准 (指数滑动平均)，让估算贴近实际计费。
+    """
+
+    def __init__(self, cjk_ratio: float = 0.6, other_ratio: float = 0.3, message_overhead: int = 4):
+        self.cjk_ratio = cjk_ratio
+        self.other_ratio = other_ratio
+        self.message_overhead = message_overhead
+        self.scale = 1.0
+
+    def raw_estimate(self, text: str) -> float:
+        cjk = len(_CJK_PATTERN.findall(text))
+        return cjk * self.cjk_ratio + (len(text) - cjk) * self.other_ratio + self.message_overhead
+
+    def to_tokens(self, raw: float) -> int:
+        return int(raw * self.scale + 0.5)
+
+    def calibrate(self, raw: float, actual_tokens: int, alpha: float = 0.3):
+        if raw <= 0 or actual_tokens <= 0:
+            return
+        observed = actual_tokens / raw
+        self.scale = (1 - alpha) * self.scale + alpha * observed
+
+
+@dataclass
+class ConversationTurn:
+    user: str
+    assistant: str
+    raw_tokens: float  # 未校准的估算值，写入时计算一次
+
+
+class ConversationStore:
+    """
+    多轮对话历史，按 token 预算裁剪上下文窗口。
+    消息顺序固定为 [system, (summary), 历史..., 本轮提问]，前缀只在裁剪时变化，便于命中服务端的上下文缓存
+    (DeepSeek context cache 按前缀匹配)。超出预算时一次性裁剪到 low_water_ratio，
+    而不是每轮滑动一条，从而让前缀在多轮之间保持稳定。
+    被裁剪的旧对话可交给 summarizer 压缩为摘要，不提供时直接丢弃。
+    """
+
+    def __init__(
+        self,
+        system_prompt: str,
+        max_context_tokens: int = 4096,
+        low_water_ratio: float = 0.6,
+        estimator: Optional[TokenEstimator] = None,
+        summarizer: Optional[Callable[[str, list[ConversationTurn]], str]] = None,
+    ):
+        self.system_prompt = system_prompt
+        self.max_context_tokens = max_context_tokens
+        self.low_water_ratio = low_water_ratio
+        self.estimator = estimator or TokenEstimator()
+        self.summarizer = summarizer
+        self.summary = ""
+        self.turns: list[ConversationTurn] = []
+
+        self._system_raw = self.estimator.raw_estimate(system_prompt)
+        self._summary_raw = 0.0
+        self._history_raw = 0.0
+
+    def build_messages(self, question: str) -> tuple[list[dict], float]:
+        """
+        构造本轮请求的消息列表，必要时先裁剪历史。
+        :return: (messages, 估算的 prompt 原始 token 数，用于之后的校准)
+        """
+        question_raw = self.estimator.raw_estimate(question)
+        self._trim(question_raw)
+
+        messages = [{"role": "system", "content": self.system_prompt}]
+        if self.summary:
+            messages.append({"role": "system", "content": f"此前对话摘要：{self.summary}"})
+        for turn in self.turns:
+            messages.append({"role": "user", "content": turn.user})
+            messages.append({"role": "assistant", "content": turn.assistant})
+        messages.append({"role": "user", "content": question})
+        return messages, self._system_raw + self._summary_raw + self._history_raw + question_raw
+
+    def append(self, question: str, reply: str):
+        raw = self.estimator.raw_estimate(question) + self.estimator.raw_estimate(reply)
+        self.turns.append(ConversationTurn(question, reply, raw))
+        self._history_raw += raw
+
+    @property
+    def empty(self) -> bool:
+        """没有历史也没有摘要: 本轮回复只取决于提问本身"""
+        return not self.turns and not self.summary
+
+    def calibrate(self, estimated_raw: float, prompt_tokens: int):
+        self.estimator.calibrate(estimated_raw, prompt_tokens)
+
+    def clear(self):
+        self.turns.clear()
+        self.summary = ""
+        self._summary_raw = 0.0
+        self._history_raw = 0.0
+
+    def estimated_tokens(self) -> int:
+        return self.estimator.to_tokens(self._system_raw + self._summary_raw + self._history_raw)
+
+    def _trim(self, incoming_raw: float):
+        to_tokens = self.estimator.to_tokens
+        fixed = self._system_raw + self._summary_raw + incoming_raw
+        if to_tokens(fixed + self._history_raw) <= self.max_context_tokens:
+            return
+
+        target = max(0.0, (self.max_context_tokens - to_tokens(fixed)) * self.low_water_ratio)
+        evicted: list[ConversationTurn] = []
+        while self.turns and to_tokens(self._history_raw) > target:
+            turn = self.turns.pop(0)
+            self._history_raw -= turn.raw_tokens
+            evicted.append(turn)
+
+        if evicted and self.summarizer is not None:
+            try:
+                self.summary = self.summarizer(self.summary, evicted)
+                self._summary_raw = self.estimator.raw_estimate(self.summary) if self.summary else 0.0
+            except Exception as e:
+                logger.error(f"Conversation summarize failed: {e}")
+        logger.info(f"Context trimmed: evicted {len(evicted)} turns, {len(self.turns)} kept, "
+                    f"~{self.estimated_tokens()} tokens")
@@ -0,0 +1,180 @@
+import os
+import sys
+import threading
+import time
+from importlib.abc import MetaPathFinder
+from typing import Optional
+
+# 顶层包 -> 子系统，用于按子系统汇总导入耗时
+SUBSYSTEMS = {
+    "qt": ("PyQt5", "sip"),
+    "live2d": ("live2d",),
+    "opengl": ("OpenGL",),
+    "numpy": ("numpy",),
+    "llm": ("openai", "httpx", "httpcore", "pydantic", "pydantic_core", "anyio", "sniffio", "distro",
+            "jiter", "tqdm", "typing_extensions", "annotated_types", "h11"),
+    "http": ("requests", "urllib3", "certifi", "charset_normalizer", "idna"),
+    "asr": ("websocket", "websockets", "pyaudio", "sounddevice", "_sounddevice", "cffi", "_cffi_backend"),
+    "config": ("dotenv",),
+    "app": ("app_main", "mainwindow", "ai_control", "canvas_base", "canvas_live2d",
+            "workers", "utils", "custom_widgets"),
+}
+_PACKAGE_TO_SUBSYSTEM = {pkg: name for name, pkgs in SUBSYSTEMS.items() for pkg in pkgs}
+_STDLIB = getattr(sys, "stdlib_module_names", frozenset())
+
+
+def subsystem_of(module_name: str) -> str:
+    top = module_name.split(".", 1)[0]
+    if top in _PACKAGE_TO_SUBSYSTEM:
+        return _PACKAGE_TO_SUBSYSTEM[top]
+    if top in _STDLIB or top in sys.builtin_module_names:
+        return "stdlib"
+    return "other"
+
+
+class _TimedLoader:
+    """包装原 loader，统计 exec_module 的耗时；其余属性原样转发"""
+
+    def __init__(self, loader, profiler: "ImportProfiler"):
+        self._loader = loader
+        self._profiler = profiler
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        self._profiler._enter()
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._profiler._exit(module.__name__)
+
+    def __getattr__(self, attr):
+        return getattr(self._loader, attr)
+
+
+class ImportProfiler(MetaPathFinder):
+    """
+    进程内的导入耗时统计，类似 python -X importtime，但按子系统汇总输出，
+    在 PyInstaller 打包后的程序中同样可用 (委托给其后的 finder，包括 FrozenImporter)。
+    - self: 模块自身执行耗时 (扣除其中嵌套导入的时间)；
+    - cumulative: 包含嵌套导入的总耗时。
+    按线程分别计时，后台线程中的导入同样会被统计；已在 sys.modules 中的模块不会经过 finder。
+    """
+
+    def __init__(self):
+        self.records: list[tuple[str, float, float]] = []  # (模块名, self, cumulative)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.installed_at: Optional[float] = None
+        self.checkpoints: dict[str, int] = {}  # 名称 -> 当时已记录的模块数
+
+    def install(self):
+        if self not in sys.meta_path:
+            sys.meta_path.insert(0, self)
+            self.installed_at = time.perf_counter()
+
+    def uninstall(self):
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+
+    def checkpoint(self, name: str):
+        """标记一个时间点 (如窗口显示)，报告中会单独列出此前的导入耗时"""
+        with self._lock:
+            self.checkpoints[name] = len(self.records)
+
+    def find_spec(self, fullname, path=None, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is None:
+                continue
+            if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                spec.loader = _TimedLoader(spec.loader, self)
+            return spec
+        return None
+
+    def _stack(self) -> list:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _enter(self):
+        # [开始时间, 嵌套导入累计耗时]
+        self._stack().append([time.perf_counter(), 0.0])
+
+    def _exit(self, name: str):
+        stack = self._stack()
+        start, children = stack.pop()
+        cumulative = time.perf_counter() - start
+        if stack:
+            stack[-1][1] += cumulative
+        with self._lock:
+            self.records.append((name, cumulative - children, cumulative))
+
+    def summary(self) -> dict[str, dict]:
+        with self._lock:
+            records = list(self.records)
+        result: dict[str, dict] = {}
+        for name, self_time, cumulative in records:
+            group = result.setdefault(subsystem_of(name), {"modules": 0, "self": 0.0, "top": []})
+            group["modules"] += 1
+            group["self"] += self_time
+            group["top"].append((self_time, cumulative, name))
+        for group in result.values():
+            group["top"].sort(reverse=True)
+        return result
+
+    def report(self, top: int = 5) -> str:
+        summary = self.summary()
+        total = sum(group["self"] for group in summary.values())
+        lines = [f"Import cost by subsystem ({sum(g['modules'] for g in summary.values())} modules, "
+                 f"{total * 1000:.1f} ms):",
+                 f"{'subsystem':<10} {'modules':>7} {'self ms':>9} {'share':>6}"]
+        for name, group in sorted(summary.items(), key=lambda item: item[1]["self"], reverse=True):
+            share = group["self"] / total * 100 if total else 0.0
+            lines.append(f"{name:<10} {group['modules']:>7} {group['self'] * 1000:>9.1f} {share:>5.1f}%")
+            for self_time, cumulative, module in group["top"][:top]:
+                lines.append(f"    {self_time * 1000:>8.1f} ms self {cumulative * 1000:>8.1f} ms cum  {module}")
+        with self._lock:
+            checkpoints = [(name, self.records[:count]) for name, count in self.checkpoints.items()]
+        for name, records in checkpoints:
+            lines.append(f"before {name}: {len(records)} modules, "
+                         f"{sum(record[1] for record in records) * 1000:.1f} ms")
+        return "\n".join(lines)
+
+
+profiler = ImportProfiler()
+
+
+def enabled_from_env(argv: Optional[list[str]] = None) -> bool:
+    argv = sys.argv if argv is None else argv
+    return "--profile-imports" in argv or os.getenv("IMPORT_PROFILE", "") not in ("", "0")
+
+
+def install_if_enabled() -> bool:
+    """app_main 最先调用：设置 IMPORT_PROFILE=1 或传入 --profile-imports 时开始统计"""
+    if enabled_from_env():
+        profiler.install()
+        return True
+    return False
+
+
+def main(argv: list[str]) -> int:
+    """
+    python -m utils.import_profiler [模块 ...]
+    在干净的解释器中导入指定模块 (默认 app_main) 并输出按子系统汇总的耗时，不会创建窗口。
+    """
+    modules = [arg for arg in argv if not arg.startswith("-")] or ["app_main"]
+    profiler.install()
+    for name in modules:
+        __import__(name)
+    profiler.uninstall()
+    print(profiler.report())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,42 @@
+import importlib
+import threading
+from types import ModuleType
+from typing import Optional
+
+from utils.startup import timeline
+
+
+class LazyModule:
+    """
+    延迟导入的模块代理: 首次访问属性时才真正 import，并把耗时记入启动时间线。
+    用于 openai / requests / ASR 后端等首帧前用不到的重量级依赖。
+    只适合 "module.attr" 形式的访问; "from x import y" 会立即导入，需要改写为属性访问。
+    """
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module: Optional[ModuleType] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._module is not None
+
+    def load(self) -> ModuleType:
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    with timeline.span(f"import.{self._name}"):
+                        self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr: str):
+        return getattr(self.load(), attr)
+
+    def __repr__(self):
+        state = "loaded" if self.loaded else "not loaded"
+        return f"<LazyModule {self._name} ({state})>"
+
+
+def lazy_import(name: str) -> LazyModule:
+    return LazyModule(name)
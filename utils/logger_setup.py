@@ -1,5 +1,16 @@
+import atexit
+import json
 import logging
+import os
+import queue
 import sys
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Optional
+
+LOG_QUEUE_SIZE = 10000
+
 
 class ColoredFormatter(logging.Formatter):
     """
@@ -24,14 +35,204 @@ class ColoredFormatter(logging.Formatter):
         logging.CRITICAL: BOLD_RED + fmt + RESET
     }
 
+    def __init__(self):
+        super().__init__(self.fmt)
+        # 每个级别的 Formatter 只创建一次
+        self._formatters = {level: logging.Formatter(log_fmt) for level, log_fmt in self.FORMATS.items()}
+
     def format(self, record):
-        log_fmt = self.FORMATS.get(record.levelno)
-        formatter = logging.Formatter(log_fmt)
+        formatter = self._formatters.get(record.levelno)
+        if formatter is None:
+            return super().format(record)
         return formatter.format(record)
 
+
+class JsonFormatter(logging.Formatter):
+    """结构化日志: 每条记录一行 JSON"""
+
+    def format(self, record):
+        entry = {
+            "time": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "message": record.getMessage(),  # 入队时异常堆栈已合并进 message
+        }
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class AsyncLogHandler(QueueHandler):
+    """
+    调用线程只把记录放入有界队列 (不阻塞)，由后台线程统一写控制台/文件。
+    - DEBUG 日志按 logger 限速，每秒最多 debug_per_second 条，超出的丢弃；
+    - 队列满时丢弃新记录；
+    两种丢弃都会计数，并在之后补一条汇总记录。
+    """
+
+    def __init__(self, log_queue: queue.Queue, debug_per_second: int = 50):
+        super().__init__(log_queue)
+        self.debug_per_second = debug_per_second
+        self._windows: dict[str, list] = {}  # logger -> [窗口起点, 已放行条数, 已丢弃条数]
+        self._overflowed = 0
+        self._lock = threading.Lock()
+
+    def emit(self, record):
+        if record.levelno <= logging.DEBUG and not self._sample(record):
+            return
+        try:
+            self.queue.put_nowait(self.prepare(record))
+        except queue.Full:
+            with self._lock:
+                self._overflowed += 1
+            return
+        except Exception:
+            self.handleError(record)
+            return
+        if self._overflowed:
+            with self._lock:
+                overflowed, self._overflowed = self._overflowed, 0
+            self._enqueue_notice(record.name, f"log queue full, dropped {overflowed} records")
+
+    def _sample(self, record) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.setdefault(record.name, [now, 0, 0])
+            dropped = 0
+            if now - window[0] >= 1.0:
+                dropped = window[2]
+                window[:] = [now, 0, 0]
+            allowed = window[1] < self.debug_per_second
+            if allowed:
+                window[1] += 1
+            else:
+                window[2] += 1
+        if dropped:
+            self._enqueue_notice(record.name, f"dropped {dropped} debug records in the last second")
+        return allowed
+
+    def _enqueue_notice(self, name: str, message: str):
+        notice = logging.makeLogRecord({"name": name, "levelno": logging.WARNING, "levelname": "WARNING",
+                                        "msg": message, "notice": True})
+        try:
+            self.queue.put_nowait(notice)
+        except queue.Full:
+            pass
+
+
+class _RecordFilter(logging.Filter):
+    """
+    区分普通日志与记录文件 (get_record_logger) 的条目: include=True 只放行记录条目，
+    include=False 只放行普通日志。丢弃汇总 (notice) 总是当作普通日志输出到控制台。
+    """
+
+    def __init__(self, names: set, include: bool):
+        super().__init__()
+        self.names = names
+        self.include = include
+
+    def filter(self, record) -> bool:
+        is_record = record.name in self.names and not getattr(record, "notice", False)
+        return is_record == self.include
+
+
+class _LogListener(QueueListener):
+    def enqueue_sentinel(self):
+        # 队列满时等待写线程腾出空间，保证退出时剩余日志能写完
+        self.queue.put(self._sentinel, timeout=1.0)
+
+
+_queue: queue.Queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+_handler = AsyncLogHandler(_queue)
+_console_handler = logging.StreamHandler(sys.stdout)
+_console_handler.setFormatter(ColoredFormatter())
+_record_logger_names: set[str] = set()
+_console_handler.addFilter(_RecordFilter(_record_logger_names, include=False))
+_listener: Optional[_LogListener] = None
+_listener_lock = threading.Lock()
+_loggers: list[logging.Logger] = []
+_default_level = logging.INFO
+
+
+def _ensure_listener():
+    global _listener
+    with _listener_lock:
+        if _listener is None:
+            _listener = _LogListener(_queue, _console_handler, respect_handler_level=True)
+            _listener.start()
+            atexit.register(shutdown_logging)
+
+
+def shutdown_logging():
+    """停止写线程并写完队列中剩余的日志 (进程退出时自动调用)"""
+    global _listener
+    with _listener_lock:
+        listener, _listener = _listener, None
+    if listener is not None:
+        try:
+            listener.stop()
+        except queue.Full:
+            pass
+
+
+def configure_logging():
+    """
+    在 .env 加载之后调用 (get_logger 在模块导入时就会执行，那时环境变量还不完整):
+    LOG_LEVEL 设置所有 logger 的级别，LOG_JSON_PATH 开启按大小轮转的结构化 JSONL 日志，
+    LOG_DEBUG_RATE 为每个 logger 每秒最多输出的 DEBUG 条数。
+    """
+    global _default_level
+    level = logging.getLevelName(os.getenv("LOG_LEVEL", "INFO").upper())
+    if isinstance(level, int):
+        _default_level = level
+        for logger in _loggers:
+            logger.setLevel(level)
+    _handler.debug_per_second = int(os.getenv("LOG_DEBUG_RATE", str(_handler.debug_per_second)))
+
+    json_path = os.getenv("LOG_JSON_PATH")
+    _ensure_listener()
+    if json_path and not any(isinstance(h, RotatingFileHandler) for h in _listener.handlers):
+        directory = os.path.dirname(json_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        file_handler = RotatingFileHandler(json_path, maxBytes=int(os.getenv("LOG_JSON_MAX_BYTES", str(10 * 1024 * 1024))),
+                                           backupCount=3, encoding="utf-8")
+        file_handler.setFormatter(JsonFormatter())
+        file_handler.addFilter(_RecordFilter(_record_logger_names, include=False))
+        # 写线程每条记录都会重新读取 handlers，直接替换元组即可
+        _listener.handlers = _listener.handlers + (file_handler,)
+
+
+def get_record_logger(name: str, path: str, max_bytes: int, backups: int) -> logging.Logger:
+    """
+    结构化记录专用的 Logger (如每个回合一行 JSON): 与普通日志共用异步队列，
+    由后台写线程原样写入 path，超过 max_bytes 后轮转为 .1 .. .{backups}；不输出到控制台和 LOG_JSON_PATH。
+    同一 name 只在第一次调用时绑定文件。
+    """
+    logger = logging.getLogger(name)
+    logger.propagate = False
+    _ensure_listener()
+    with _listener_lock:
+        if name not in _record_logger_names:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # delay: 文件在写线程第一次写入时才打开
+            file_handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups, encoding="utf-8",
+                                               delay=True)
+            file_handler.setFormatter(logging.Formatter("%(message)s"))
+            file_handler.addFilter(_RecordFilter({name}, include=True))
+            _record_logger_names.add(name)
+            _listener.handlers = _listener.handlers + (file_handler,)
+            # 不加入 _loggers: LOG_LEVEL 只影响普通日志
+            logger.setLevel(logging.INFO)
+            logger.addHandler(_handler)
+    return logger
+
+
 def get_logger(name: str) -> logging.Logger:
     """
     获取一个配置好颜色输出、且防止重复打印的 Logger 实例。
+    所有 Logger 共用一个异步队列 Handler，调用方只负责入队，实际输出在后台写线程中完成。
     """
     logger = logging.getLogger(name)
 
@@ -40,12 +241,9 @@ def get_logger(name: str) -> logging.Logger:
 
     # 仅当 logger 还没有 Handler 时才添加，防止多次调用导致重复输出
     if not logger.handlers:
-        logger.setLevel(logging.INFO)
-
-        # 创建流处理器（输出到控制台）
-        handler = logging.StreamHandler(sys.stdout)
-        handler.setFormatter(ColoredFormatter())
-
-        logger.addHandler(handler)
+        logger.setLevel(_default_level)
+        logger.addHandler(_handler)
+        _loggers.append(logger)
+        _ensure_listener()
 
     return logger
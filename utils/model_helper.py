@@ -1,5 +1,8 @@
 import os
 import json
+import time
+from array import array
+from typing import Callable, Optional
 from utils.logger_setup import get_logger
 
 logger = get_logger("ModelHelper")
@@ -31,6 +34,62 @@ class ModelConfigParser:
             logger.error(f"Error getting motion text: {e}")
         return ""
 
+def parse_scene_models(value: Optional[str], base_dir: str) -> list[tuple[str, float, tuple[float, float]]]:
+    """
+    解析 LIVE2D_SCENE_MODELS: 以 ; 分隔的额外模型，每项为 "路径[@缩放,X偏移,Y偏移]"，相对路径基于资源目录。
+    例: vivian/vivian.model3.json@1.0,-0.6,0;vivian/vivian.model3.json@1.0,0.6,0
+    :return: [(model3.json 路径, 缩放, (X偏移, Y偏移))]
+    """
+    specs = []
+    for entry in (value or "").split(";"):
+        entry = entry.strip()
+        if not entry:
+            continue
+        path, _, transform = entry.partition("@")
+        try:
+            numbers = [float(part) for part in transform.split(",")] if transform else []
+        except ValueError:
+            logger.warning(f"Invalid scene model transform '{transform}', using defaults")
+            numbers = []
+        scale, x, y = (numbers + [1.0, 0.0, 0.0][len(numbers):])[:3]
+        path = path.strip()
+        if not os.path.isabs(path):
+            path = os.path.join(base_dir, path)
+        specs.append((path, scale, (x, y)))
+    return specs
+
+
+def model_file_references(model_json_path: str) -> list[str]:
+    """列出 LoadModelJson 会读取的文件 (moc、贴图、物理、表情、动作) 的路径"""
+    with open(model_json_path, 'r', encoding='utf-8') as f:
+        refs = json.load(f).get("FileReferences", {})
+    model_dir = os.path.dirname(model_json_path)
+    files = [refs.get(key) for key in ("Moc", "Physics", "Pose", "DisplayInfo", "UserData")]
+    files.extend(refs.get("Textures", []))
+    files.extend(exp.get("File") for exp in refs.get("Expressions", []))
+    for group in refs.get("Motions", {}).values():
+        for motion in group:
+            files.append(motion.get("File"))
+    return [os.path.join(model_dir, path) for path in files if path]
+
+
+def prefetch_model_files(model_json_path: str, chunk_size: int = 1 << 20) -> int:
+    """
+    在后台线程顺序读取模型文件，把它们带入系统文件缓存，
+    之后在 GL 线程中 LoadModelJson 时不再等待冷磁盘 IO。
+    :return: 读取的总字节数
+    """
+    total = 0
+    for path in model_file_references(model_json_path):
+        try:
+            with open(path, 'rb') as f:
+                while chunk := f.read(chunk_size):
+                    total += len(chunk)
+        except OSError as e:
+            logger.warning(f"Prefetch skipped {path}: {e}")
+    return total
+
+
 class ModelAttribute:
     def __init__(self, scale: float , positionOffset: tuple[float, float], lipParamY: float = 0.0):
         self.scale = scale
@@ -108,6 +167,23 @@ class ModelHitManager:
         }
 
         self.priority_list = ["Hand", "Accessories", "Head", "Face", "Leg", "Breast", "Body"]
+        self.build_index()
+
+    def build_index(self):
+        """
+        把 area_mapping / exp_mapping / priority_list 预先展开为 部件ID -> (优先级, 区域, 表情)，
+        点击时只需遍历命中的部件，耗时与命中数成正比。修改映射后需重新调用。
+        """
+        self.part_index: dict[str, tuple[int, str, str]] = {}
+        for rank, area_name in enumerate(self.priority_list):
+            expression = "normal"
+            for exp_name, affected_areas in self.exp_mapping.items():
+                if area_name in affected_areas:  # 与原逻辑一致: 多个表情包含同一区域时取最后一个
+                    expression = exp_name
+            for part_id in self.area_mapping[area_name]:
+                # 部件同时属于多个区域时保留优先级最高的
+                if part_id not in self.part_index or rank < self.part_index[part_id][0]:
+                    self.part_index[part_id] = (rank, area_name, expression)
 
     def get_hit_feedback(self, hit_part_ids: list[str]):
         """
@@ -115,21 +191,151 @@ class ModelHitManager:
         :param hit_part_ids: Live2D SDK 返回的点击命中的 ID 列表
         :return: 区域名称 (例如 "Face") 或 None，以及对应的表情名称 (例如 "shy")
         """
-        expression = "normal"
-        area_name = None
-        if not hit_part_ids:
-            return area_name, expression  # 未命中任何部件
-        # 将输入的列表转换为集合，提高查找效率
-        hit_set = set(hit_part_ids)
-        # 按照优先级遍历区域
-        for area_name in self.priority_list:
-            target_parts = self.area_mapping[area_name]
-
-            # 使用集合求交集：如果命中的部件里有属于当前区域的
-            if not hit_set.isdisjoint(target_parts):
-                for exp_name, affected_areas in self.exp_mapping.items():
-                    if area_name in affected_areas: # 检查该区域对应表情
-                        expression = exp_name
-                return area_name, expression  # 返回对应表情
-
-        return area_name, expression  # 未命中定义区域
+        best = None
+        for part_id in hit_part_ids:
+            entry = self.part_index.get(part_id)
+            if entry is not None and (best is None or entry[0] < best[0]):
+                best = entry
+                if best[0] == 0:
+                    break  # 已是最高优先级
+        if best is None:
+            return None, "normal"  # 未命中任何部件或未命中定义区域
+        return best[1], best[2]
+
+
+class SimulationClock:
+    """
+    模型模拟 (动作、物理、呼吸、眨眼) 的固定步长时钟，与重绘频率解耦。
+    每次绘制调用 tick()，累计真实经过的时间，返回本帧应推进的模拟步数:
+    - 0: 距上次推进不足一步，本次重绘直接沿用当前模型状态 (跳过 Update)；
+    - 积压超过 max_catch_up 步 (窗口被拖动/卡顿) 时丢弃多余时间，避免恢复后动画突然快进。
+    hz <= 0 时退化为每次绘制都推进一步。
+    """
+
+    def __init__(self, hz: float = 60.0, max_catch_up: int = 6, clock: Callable[[], float] = time.perf_counter):
+        self.step = 1.0 / hz if hz > 0 else 0.0
+        self.max_catch_up = max(1, max_catch_up)
+        self.clock = clock
+        self._last: Optional[float] = None
+        self._accumulator = 0.0
+        self.stats = {"frames": 0, "steps": 0, "skipped": 0, "dropped_seconds": 0.0}
+
+    @property
+    def alpha(self) -> float:
+        """当前时刻在两个模拟步之间的位置 [0, 1)，可用于插值"""
+        return self._accumulator / self.step if self.step else 0.0
+
+    def reset(self):
+        self._last = None
+        self._accumulator = 0.0
+
+    def tick(self) -> int:
+        now = self.clock()
+        self.stats["frames"] += 1
+        if self._last is None or not self.step:
+            # 首帧 (或未启用固定步长) 总是推进，保证模型加载后立即有姿态
+            self._last = now
+            self.stats["steps"] += 1
+            return 1
+        self._accumulator += now - self._last
+        self._last = now
+        steps = int(self._accumulator / self.step)
+        if steps > self.max_catch_up:
+            self.stats["dropped_seconds"] += (steps - self.max_catch_up) * self.step
+            steps = self.max_catch_up
+            self._accumulator = 0.0
+        else:
+            self._accumulator -= steps * self.step
+        if steps:
+            self.stats["steps"] += steps
+        else:
+            self.stats["skipped"] += 1
+        return steps
+
+
+class ModelState:
+    """
+    信号 (ModelAttribute / Controller) 与 live2d 模型之间的状态层: 信号处理中只记录待写入的值，
+    每帧在 Draw 之前统一提交一次，只写入发生变化的部分。
+    - 缩放/偏移保存在模型的矩阵中，变化时才调用 SetScale / SetOffset；
+    - 命名参数覆盖 (口型、眼球、身体角度等) 存放在定长数组中，按下标 SetIndexParamValue。
+      Update 中的动作/表情/拖拽/呼吸会改写参数，因此执行过 Update 的帧需要重写所有生效的覆盖，
+      其余帧 (固定步长下跳过 Update 的重绘) 只写入脏项。
+    """
+
+    def __init__(self, overrides: dict[str, str]):
+        """:param overrides: 覆盖名 -> 模型参数 ID"""
+        self.names = list(overrides)
+        self.param_ids = [overrides[name] for name in self.names]
+        self._slots = {name: slot for slot, name in enumerate(self.names)}
+        count = len(self.names)
+        self.values = array("d", [0.0]) * count
+        self.weights = array("d", [1.0]) * count
+        self._indices = array("i", [-1]) * count  # 在模型参数表中的下标，bind 时解析
+        self._active = bytearray(count)
+        self._active_slots: list[int] = []
+        self._dirty = bytearray(count)
+        self._dirty_slots: list[int] = []
+        self._transform: Optional[tuple[float, tuple[float, float]]] = None
+        self._applied_transform: Optional[tuple[float, tuple[float, float]]] = None
+        self.stats = {"param_writes": 0, "transform_writes": 0}
+
+    def bind(self, model):
+        """模型加载后解析参数下标；新模型的矩阵是默认值，变换需要重新提交"""
+        lookup = {param_id: index for index, param_id in enumerate(model.GetParamIds())}
+        for slot, param_id in enumerate(self.param_ids):
+            self._indices[slot] = lookup.get(param_id, -1)
+            if self._indices[slot] < 0:
+                logger.warning(f"Model has no parameter {param_id}, override '{self.names[slot]}' ignored")
+        if self._transform is None:
+            self._transform = self._applied_transform
+        self._applied_transform = None
+        for slot in self._active_slots:
+            self._mark(slot)
+
+    def set_param(self, name: str, value: float, weight: float = 1.0):
+        slot = self._slots[name]
+        if self._active[slot] and self.values[slot] == value and self.weights[slot] == weight:
+            return
+        self.values[slot] = value
+        self.weights[slot] = weight
+        if not self._active[slot]:
+            self._active[slot] = 1
+            self._active_slots.append(slot)
+        self._mark(slot)
+
+    def clear_param(self, name: str):
+        """取消覆盖: 不需要写入，下一次 Update 后参数由动作/表情重新驱动"""
+        slot = self._slots[name]
+        if self._active[slot]:
+            self._active[slot] = 0
+            self._active_slots.remove(slot)
+
+    def set_transform(self, scale: float, offset: tuple[float, float]):
+        transform = (scale, offset)
+        self._transform = None if transform == self._applied_transform else transform
+
+    def _mark(self, slot: int):
+        if not self._dirty[slot]:
+            self._dirty[slot] = 1
+            self._dirty_slots.append(slot)
+
+    def apply(self, model, updated: bool):
+        """
+        在 Draw 之前调用，提交待写入的状态
+        :param updated: 本帧是否执行过 model.Update()
+        """
+        if self._transform is not None:
+            scale, (x, y) = self._transform
+            model.SetScale(scale)
+            model.SetOffset(x, y)
+            self._applied_transform, self._transform = self._transform, None
+            self.stats["transform_writes"] += 1
+        slots = self._active_slots if updated else self._dirty_slots
+        for slot in slots:
+            if self._active[slot] and self._indices[slot] >= 0:
+                model.SetIndexParamValue(self._indices[slot], self.values[slot], self.weights[slot])
+        self.stats["param_writes"] += len(slots)
+        for slot in self._dirty_slots:
+            self._dirty[slot] = 0
+        self._dirty_slots.clear()
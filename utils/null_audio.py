@@ -0,0 +1,83 @@
+from typing import Optional
+
+from PyQt5.QtCore import QElapsedTimer, QObject, QTimer, pyqtSignal
+from PyQt5.QtMultimedia import QAudio, QAudioFormat
+
+
+class _NullDevice:
+    def __init__(self, output: "NullAudioOutput"):
+        self._output = output
+
+    def write(self, data: bytes) -> int:
+        return self._output._accept(len(data))
+
+
+class NullAudioOutput(QObject):
+    """
+    与 AIManager 用到的 QAudioOutput 推模式接口一致 (start / bytesFree / processedUSecs / state / stateChanged)，
+    但不访问声卡: 写入的数据按实时速率 (乘以 speed) 被“播放”掉。
+    用于无声卡环境和端到端回合基准测试，状态切换 (Idle <-> Active) 与真实设备的欠载行为相同。
+    """
+    stateChanged = pyqtSignal(int)
+
+    def __init__(self, audio_format: QAudioFormat, parent: Optional[QObject] = None, speed: float = 1.0):
+        super().__init__(parent)
+        self.bytes_per_second = audio_format.sampleRate() * audio_format.channelCount() * (audio_format.sampleSize() // 8)
+        self.speed = speed
+        self._buffer_size = self.bytes_per_second // 5
+        self._queued = 0.0
+        self._processed = 0.0
+        self._state = QAudio.StoppedState
+        self._clock = QElapsedTimer()
+        self._timer = QTimer(self)
+        self._timer.setInterval(10)
+        self._timer.timeout.connect(self._drain)
+
+    def setBufferSize(self, size: int):
+        self._buffer_size = size
+
+    def bufferSize(self) -> int:
+        return self._buffer_size
+
+    def start(self) -> _NullDevice:
+        self._set_state(QAudio.IdleState)
+        self._clock.start()
+        self._timer.start()
+        return _NullDevice(self)
+
+    def stop(self):
+        self._timer.stop()
+        self._queued = 0
+        self._set_state(QAudio.StoppedState)
+
+    def state(self) -> int:
+        return self._state
+
+    def bytesFree(self) -> int:
+        self._drain()
+        return max(0, int(self._buffer_size - self._queued))
+
+    def processedUSecs(self) -> int:
+        self._drain()
+        return int(self._processed * 1_000_000 / self.bytes_per_second)
+
+    def _accept(self, size: int) -> int:
+        written = min(size, self.bytesFree())
+        if written > 0:
+            self._queued += written
+            self._set_state(QAudio.ActiveState)
+        return written
+
+    def _drain(self):
+        if self._state == QAudio.StoppedState:
+            return
+        played = min(self._queued, self._clock.restart() / 1000 * self.bytes_per_second * self.speed)
+        self._queued -= played
+        self._processed += played
+        if self._queued <= 0 and self._state == QAudio.ActiveState:
+            self._set_state(QAudio.IdleState)
+
+    def _set_state(self, state: int):
+        if state != self._state:
+            self._state = state
+            self.stateChanged.emit(state)
@@ -46,3 +46,5 @@ if getattr(sys, 'frozen', False) and not os.path.exists(RESOURCES_DIRECTORY):
     alt_res_dir = os.path.join(exe_dir, "resources")
     if os.path.exists(alt_res_dir):
         RESOURCES_DIRECTORY = alt_res_dir
+
+MODEL_JSON_PATH = os.path.join(RESOURCES_DIRECTORY, "vivian/vivian.model3.json")
@@ -0,0 +1,154 @@
+import re
+import time
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Optional
+
+from utils.logger_setup import get_logger
+
+logger = get_logger("ResponseCache")
+
+# 标点、符号与空白在比较问题时没有意义
+_STRIP_PATTERN = re.compile(r"[\s\W_]+", re.UNICODE)
+
+
+def normalize_question(text: str) -> str:
+    """
+    归一化用户问题: NFKC (全角/半角折叠) + casefold + 去除标点和空白。
+    "你是谁？" / "你是谁" / "ＷＨＯ are you!" -> "你是谁" / "你是谁" / "whoareyou"
+    """
+    text = unicodedata.normalize("NFKC", text).casefold()
+    return _STRIP_PATTERN.sub("", text)
+
+
+def char_ngrams(text: str, n: int = 2) -> set[str]:
+    if len(text) <= n:
+        return {text} if text else set()
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+@dataclass
+class CachedResponse:
+    question: str
+    emotion: str
+    text: str
+    text_lang: str
+    raw_content: str
+    audio_format: Optional[tuple[int, int, int]] = None  # sample_rate, channels, sample_size
+    audio: Optional[bytes] = None
+    created_at: float = field(default_factory=time.monotonic)
+    hits: int = 0
+
+
+class ResponseCache:
+    """
+    针对重复提问的回复缓存 (问候、自我介绍等)。
+    键只包含提问本身，调用方只应在没有对话上下文时查询和写入。
+    - 精确索引: 归一化后的问题 -> 回复；
+    - 相似索引 (可选): 字符 n-gram 倒排表 + Jaccard 相似度，阈值可配置；
+    - TTL 过期与 LRU 淘汰；命中后直接回放情绪、文本以及已缓存的音频。
+    归一化后短于 min_key_length 的问题 (纯标点、"嗯"、"?" 等) 不缓存也不查询，否则任意这类输入都会回放同一条回复。
+    """
+
+    def __init__(self, max_entries: int = 128, ttl_seconds: float = 24 * 3600,
+                 similarity_threshold: float = 0.8, ngram: int = 2, enable_similarity: bool = True,
+                 min_key_length: int = 2):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self.ngram = ngram
+        self.enable_similarity = enable_similarity
+        self.min_key_length = min_key_length
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._grams: dict[str, set[str]] = {}
+        self._postings: dict[str, set[str]] = {}
+        self.stats = {"lookups": 0, "exact_hits": 0, "similar_hits": 0, "misses": 0, "evictions": 0}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def lookup(self, question: str) -> Optional[CachedResponse]:
+        self.stats["lookups"] += 1
+        key = normalize_question(question)
+        if len(key) < self.min_key_length:
+            self.stats["misses"] += 1
+            return None
+        entry = self._get_fresh(key)
+        if entry is not None:
+            self.stats["exact_hits"] += 1
+        elif self.enable_similarity:
+            similar_key = self._most_similar(key)
+            entry = self._get_fresh(similar_key) if similar_key else None
+            if entry is not None:
+                self.stats["similar_hits"] += 1
+        if entry is None:
+            self.stats["misses"] += 1
+            return None
+        entry.hits += 1
+        return entry
+
+    def store(self, question: str, emotion: str, text: str, text_lang: str,
+              raw_content: str) -> Optional[CachedResponse]:
+        """问题过短时不缓存，返回 None"""
+        key = normalize_question(question)
+        if len(key) < self.min_key_length:
+            return None
+        if key in self._entries:
+            self._remove(key)
+        entry = CachedResponse(question, emotion, text, text_lang, raw_content)
+        self._entries[key] = entry
+        grams = char_ngrams(key, self.ngram)
+        self._grams[key] = grams
+        for gram in grams:
+            self._postings.setdefault(gram, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+            self.stats["evictions"] += 1
+        return entry
+
+    def attach_audio(self, entry: CachedResponse, audio_format: tuple[int, int, int], audio: bytes):
+        """TTS 完整下载后补充音频，之后的命中可以跳过 TTS 直接播放"""
+        entry.audio_format = audio_format
+        entry.audio = audio
+
+    def hit_ratio(self) -> float:
+        lookups = self.stats["lookups"]
+        hits = self.stats["exact_hits"] + self.stats["similar_hits"]
+        return hits / lookups if lookups else 0.0
+
+    def report(self) -> dict:
+        return {**self.stats, "entries": len(self._entries), "hit_ratio": round(self.hit_ratio(), 3)}
+
+    def _get_fresh(self, key: str) -> Optional[CachedResponse]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() - entry.created_at > self.ttl_seconds:
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _most_similar(self, key: str) -> Optional[str]:
+        grams = char_ngrams(key, self.ngram)
+        overlap: dict[str, int] = {}
+        for gram in grams:
+            for candidate in self._postings.get(gram, ()):
+                overlap[candidate] = overlap.get(candidate, 0) + 1
+        best_key, best_score = None, 0.0
+        for candidate, shared in overlap.items():
+            union = len(grams) + len(self._grams[candidate]) - shared
+            score = shared / union if union else 0.0
+            if score > best_score:
+                best_key, best_score = candidate, score
+        return best_key if best_score >= self.similarity_threshold else None
+
+    def _remove(self, key: str):
+        self._entries.pop(key, None)
+        for gram in self._grams.pop(key, ()):
+            keys = self._postings.get(gram)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._postings[gram]
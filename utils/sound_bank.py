@@ -0,0 +1,194 @@
+import json
+import os
+import threading
+import wave
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+from PyQt5.QtCore import QBuffer, QByteArray, QIODevice, QObject
+from PyQt5.QtMultimedia import QAudio, QAudioFormat, QAudioOutput
+
+from utils.logger_setup import get_logger
+
+logger = get_logger("SoundBank")
+
+
+@dataclass
+class SoundClip:
+    path: str
+    sample_rate: int
+    channels: int
+    sample_width: int
+    pcm: bytes
+    envelope: np.ndarray  # 每 hop 秒一个 RMS 值 (按峰值归一化，与 WavHandler 的口型幅度一致)
+    hop: float
+
+    @property
+    def duration(self) -> float:
+        return len(self.pcm) / (self.sample_rate * self.channels * self.sample_width)
+
+    @property
+    def audio_format(self) -> tuple[int, int, int]:
+        return self.sample_rate, self.channels, self.sample_width * 8
+
+    def rms_at(self, seconds: float) -> float:
+        index = int(seconds / self.hop)
+        if index < 0 or index >= len(self.envelope):
+            return 0.0
+        return float(self.envelope[index])
+
+
+def decode_clip(path: str, hop: float = 0.02) -> SoundClip:
+    with wave.open(path, "rb") as wav:
+        sample_rate = wav.getframerate()
+        channels = wav.getnchannels()
+        sample_width = wav.getsampwidth()
+        pcm = wav.readframes(wav.getnframes())
+    if sample_width != 2:
+        raise ValueError(f"Only 16-bit PCM is supported: {path}")
+
+    samples = np.frombuffer(pcm, dtype=np.int16).reshape(-1, channels).astype(np.float32)
+    peak = float(np.max(np.abs(samples))) if samples.size else 0.0
+    if peak > 0:
+        samples /= peak
+    window = max(1, int(sample_rate * hop))
+    frames = len(samples) // window
+    # 预先计算每个窗口的 RMS (所有声道合并)，播放时按音频时钟直接查表
+    blocks = samples[:frames * window].reshape(frames, window * channels)
+    envelope = np.sqrt(np.mean(np.square(blocks), axis=1))
+    if len(samples) % window:
+        tail = samples[frames * window:]
+        envelope = np.append(envelope, np.sqrt(np.mean(np.square(tail))))
+    return SoundClip(path, sample_rate, channels, sample_width, pcm, envelope.astype(np.float32), hop)
+
+
+def model_tap_sounds(model_json_path: str) -> list[str]:
+    """model3.json 中 Tap* 动作组引用的音频 (相对 resources 目录)"""
+    with open(model_json_path, "r", encoding="utf-8") as f:
+        motions = json.load(f).get("FileReferences", {}).get("Motions", {})
+    sounds = []
+    for group, items in motions.items():
+        if group.startswith("Tap"):
+            sounds.extend(item["Sound"] for item in items if item.get("Sound"))
+    return sounds
+
+
+class SoundBank:
+    """
+    解码后常驻内存的音效库。
+    启动时在后台线程 preload() 模型 Tap 动作的全部音频 (PCM + RMS 包络)，
+    点击时直接取用，不再读文件、解析 WAV 或分析口型；未预载的音频在首次 get() 时解码并缓存。
+    """
+
+    def __init__(self, base_dir: str):
+        self.base_dir = base_dir
+        self._clips: dict[str, SoundClip] = {}
+        self._lock = threading.Lock()
+
+    def preload(self, sound_paths: list[str]) -> int:
+        loaded = 0
+        for sound_path in sound_paths:
+            if self.get(sound_path) is not None:
+                loaded += 1
+        logger.info(f"Sound bank ready: {loaded}/{len(sound_paths)} clips")
+        return loaded
+
+    def get(self, sound_path: str) -> Optional[SoundClip]:
+        with self._lock:
+            clip = self._clips.get(sound_path)
+        if clip is not None:
+            return clip
+        full_path = os.path.join(self.base_dir, sound_path)
+        try:
+            clip = decode_clip(full_path)
+        except (OSError, EOFError, ValueError, wave.Error) as e:
+            logger.error(f"Failed to load sound {full_path}: {e}")
+            return None
+        with self._lock:
+            return self._clips.setdefault(sound_path, clip)
+
+
+class _Voice:
+    def __init__(self, audio_format: tuple[int, int, int], buffer_duration: float, parent: QObject):
+        sample_rate, channels, sample_size = audio_format
+        fmt = QAudioFormat()
+        fmt.setSampleRate(sample_rate)
+        fmt.setChannelCount(channels)
+        fmt.setSampleSize(sample_size)
+        fmt.setCodec("audio/pcm")
+        fmt.setByteOrder(QAudioFormat.LittleEndian)
+        fmt.setSampleType(QAudioFormat.SignedInt)
+        self.audio_format = audio_format
+        self.output = QAudioOutput(fmt, parent)
+        self.output.setBufferSize(int(sample_rate * channels * (sample_size // 8) * buffer_duration))
+        self.buffer = QBuffer(parent)
+        self.clip: Optional[SoundClip] = None
+
+    def play(self, clip: SoundClip):
+        self.stop()
+        self.clip = clip
+        self.buffer.setData(QByteArray(clip.pcm))
+        self.buffer.open(QIODevice.ReadOnly)
+        self.output.start(self.buffer)
+
+    def stop(self):
+        if self.output.state() != QAudio.StoppedState:
+            self.output.stop()
+        if self.buffer.isOpen():
+            self.buffer.close()
+
+    def release(self):
+        self.stop()
+        self.output.deleteLater()
+        self.buffer.deleteLater()
+
+    def is_active(self) -> bool:
+        return self.clip is not None and self.output.state() in (QAudio.ActiveState, QAudio.IdleState) \
+            and self.position() < self.clip.duration
+
+    def position(self) -> float:
+        """以输出设备实际消耗的数据量作为播放时钟 (秒)"""
+        return self.output.processedUSecs() / 1_000_000
+
+
+class VoicePool(QObject):
+    """
+    复用的音效输出通道: 每种音频格式最多保留 max_voices 个 QAudioOutput，
+    播放时直接从内存 PCM 拉取数据，不再像 QSoundEffect.setSource 那样每次重新加载文件。
+    """
+
+    def __init__(self, max_voices: int = 2, buffer_duration: float = 0.04, parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self.max_voices = max_voices
+        self.buffer_duration = buffer_duration
+        self._voices: list[_Voice] = []
+
+    def play(self, clip: SoundClip, exclusive: bool = True) -> _Voice:
+        """exclusive 时先停止其他正在播放的音效 (点击新的部位会打断上一句台词)"""
+        if exclusive:
+            self.stop_all()
+        voice = self._acquire(clip.audio_format)
+        voice.play(clip)
+        return voice
+
+    def stop_all(self):
+        for voice in self._voices:
+            voice.stop()
+
+    def _acquire(self, audio_format: tuple[int, int, int]) -> _Voice:
+        same_format = [voice for voice in self._voices if voice.audio_format == audio_format]
+        for voice in same_format:
+            if not voice.is_active():
+                return voice
+        if len(self._voices) < self.max_voices:
+            voice = _Voice(audio_format, self.buffer_duration, self)
+            self._voices.append(voice)
+            return voice
+        # 通道已满: 复用最早的同格式通道，没有则替换最早创建的通道
+        if same_format:
+            return same_format[0]
+        self._voices.pop(0).release()
+        voice = _Voice(audio_format, self.buffer_duration, self)
+        self._voices.append(voice)
+        return voice
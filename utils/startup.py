@@ -0,0 +1,108 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+from utils.logger_setup import get_logger
+
+logger = get_logger("Startup")
+
+# 以本模块首次导入的时间作为冷启动起点，app_main 应尽早导入
+_PROCESS_START = time.perf_counter()
+
+
+class StartupTimeline:
+    """
+    冷启动时间线: 记录各阶段相对进程启动的时间点和耗时。
+    - mark(name): 记录一个时间点 (如窗口首次显示、首帧渲染)；
+    - span(name): 上下文管理器，记录一个阶段的开始与耗时；
+    - expect(...) / done(name): 登记需要等待的后台阶段，全部完成后输出汇总，
+      若设置了 STARTUP_TIMELINE_LOG 则追加一行 JSON，便于统计多次重启的数据。
+    可跨线程调用。
+    """
+
+    def __init__(self, log_path: Optional[str] = None):
+        self.log_path = log_path
+        self._lock = threading.Lock()
+        self._events: list[dict] = []
+        self._pending: set[str] = set()
+        self._reported = False
+        self._listeners: list[Callable[[], None]] = []
+
+    @staticmethod
+    def elapsed() -> float:
+        return time.perf_counter() - _PROCESS_START
+
+    def mark(self, name: str, duration: Optional[float] = None, ok: bool = True):
+        at = self.elapsed()
+        event = {"name": name, "at": round(at, 4), "thread": threading.current_thread().name}
+        if duration is not None:
+            event["duration"] = round(duration, 4)
+        if not ok:
+            event["ok"] = False
+        with self._lock:
+            self._events.append(event)
+        suffix = f" ({duration * 1000:.0f} ms)" if duration is not None else ""
+        logger.info(f"[{at * 1000:8.1f} ms] {name}{suffix}{'' if ok else ' FAILED'}")
+
+    @contextmanager
+    def span(self, name: str):
+        start = time.perf_counter()
+        ok = True
+        try:
+            yield
+        except BaseException:
+            ok = False
+            raise
+        finally:
+            self.mark(name, time.perf_counter() - start, ok)
+
+    def expect(self, *names: str):
+        with self._lock:
+            self._pending.update(names)
+
+    def done(self, name: str, duration: Optional[float] = None, ok: bool = True):
+        self.mark(name, duration, ok)
+        with self._lock:
+            self._pending.discard(name)
+            finished = not self._pending and not self._reported
+            if finished:
+                self._reported = True
+        if finished:
+            self.report()
+
+    def on_complete(self, callback: Callable[[], None]):
+        """所有登记的阶段完成、汇总输出之后调用"""
+        self._listeners.append(callback)
+
+    def events(self) -> list[dict]:
+        with self._lock:
+            return list(self._events)
+
+    def report(self):
+        events = self.events()
+        total = events[-1]["at"] if events else 0.0
+        lines = [f"{e['at'] * 1000:8.1f} ms  {e['name']}"
+                 + (f"  ({e['duration'] * 1000:.0f} ms)" if "duration" in e else "")
+                 for e in events]
+        logger.info("Startup complete in %.0f ms:\n%s" % (total * 1000, "\n".join(lines)))
+        for callback in self._listeners:
+            try:
+                callback()
+            except Exception as e:
+                logger.warning(f"Startup listener failed: {e}")
+        # .env 在本模块导入之后才加载，日志路径在输出时再读取
+        log_path = self.log_path or os.getenv("STARTUP_TIMELINE_LOG")
+        if not log_path:
+            return
+        try:
+            with open(log_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps({"time": time.time(), "total": round(total, 4), "events": events},
+                                   ensure_ascii=False) + "\n")
+        except OSError as e:
+            logger.warning(f"Failed to write startup timeline: {e}")
+
+
+timeline = StartupTimeline()
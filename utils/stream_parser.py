@@ -0,0 +1,214 @@
+import re
+from typing import Optional
+
+# 句末标点 (中日英)，以及可以紧跟在句末标点后的收尾符号
+SENTENCE_TERMINATORS = "。！？!?…～~"
+SENTENCE_CLOSERS = "”’」』）)】》\"'"
+
+_BRACKET_PAIRS = {"（": "）", "(": ")"}
+
+# 后面跟空格也不表示句末的英文缩写 (小写比较)
+_ABBREVIATIONS = {"mr", "mrs", "ms", "dr", "prof", "st", "jr", "sr", "vs", "e.g", "i.e"}
+
+_ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "b": "\b", "f": "\f"}
+
+
+def guess_text_lang(text: str) -> str:
+    """根据字符粗略判断语种，用于 text_lang 字段尚未到达时的推测"""
+    if re.search(r"[\u3040-\u30ff]", text):
+        return "ja"
+    if re.search(r"[\u4e00-\u9fff]", text):
+        return "zh"
+    return "en"
+
+
+def _is_period_end(text: str, i: int, complete: bool) -> bool:
+    """
+    ASCII "." 只在后面是空白 (或文本已结束) 时才算句末，
+    并排除小数 ("3.5")、常见称谓缩写 ("Mr. Smith") 与单字母缩写 ("J. K.")。
+    """
+    if i + 1 < len(text):
+        if not text[i + 1].isspace():
+            return False
+    elif not complete:
+        return False
+    if 0 < i and text[i - 1].isdigit() and i + 1 < len(text) and text[i + 1].isdigit():
+        return False
+    word_start = i
+    while word_start > 0 and (text[word_start - 1].isalpha() or text[word_start - 1] == "."):
+        word_start -= 1
+    word = text[word_start:i]
+    if word.lower() in _ABBREVIATIONS:
+        return False
+    return not (len(word) == 1 and word.isupper())
+
+
+def _find_sentence_end(text: str, start: int = 0, complete: bool = False) -> tuple[Optional[int], int]:
+    """
+    从 start 开始查找第一个句子的结束位置。
+    :return: (句子结束下标 (不含)，未找到为 None；下次追加文本后可以从哪里继续查找)
+    """
+    length = len(text)
+    for i in range(start, length):
+        ch = text[i]
+        if ch == ".":
+            # 后一个字符还没到达时无法判断，下次从这里重新检查
+            if i + 1 >= length and not complete:
+                return None, i
+            is_end = _is_period_end(text, i, complete)
+        else:
+            is_end = ch in SENTENCE_TERMINATORS
+        if not is_end:
+            continue
+        end = i + 1
+        while end < length and (text[end] in SENTENCE_TERMINATORS or text[end] in SENTENCE_CLOSERS):
+            end += 1
+        if end < length or complete:
+            return end, end
+        return None, i
+    return None, length
+
+
+def first_sentence(text: str, complete: bool = False) -> Optional[str]:
+    """
+    返回 text 中第一个完整的句子 (包含句末标点及紧随的收尾符号)。
+    流式场景下句末标点后必须已经出现下一个字符，才能确认句子结束 (如 "3.14" 或 "？！")；
+    complete 为 True 时文本已结束，末尾的句子也视为完整。
+    """
+    end, _ = _find_sentence_end(text, 0, complete)
+    if end is not None:
+        return text[:end]
+    return text if complete and text else None
+
+
+def has_balanced_brackets(text: str) -> bool:
+    """TTS 前会删除括号内的内容，括号跨句时不能按句切分"""
+    depth = 0
+    for ch in text:
+        if ch in _BRACKET_PAIRS:
+            depth += 1
+        elif ch in _BRACKET_PAIRS.values():
+            depth = max(0, depth - 1)
+    return depth == 0
+
+
+class PartialReplyParser:
+    """
+    增量解析 LLM 流式返回的 JSON 回复 ({"emotion": ..., "text": ..., "text_lang": ...})。
+    每次 feed 后可以读取已经出现的字段；text 字段在闭合前也能拿到已生成的前缀。
+    内部是一个 JSON 字符串状态机，每个字符只处理一次 (不会随回复变长而重复扫描已收到的内容)；
+    转义序列被流切断时暂存，等后续数据到达再解码。
+    """
+
+    FIELDS = ("emotion", "text", "text_lang")
+
+    def __init__(self):
+        self.buffer = ""
+        self.text: str = ""
+        self.text_complete = False
+        self.text_lang: Optional[str] = None
+        self.emotion: Optional[str] = None
+        self._in_string = False
+        self._escape = ""  # 未完整的转义序列 (含反斜杠)
+        self._high_surrogate = ""  # 等待与下一个 \uXXXX 合并的高位代理
+        self._chars: list[str] = []  # 当前字符串已解码的内容
+        self._key: Optional[str] = None  # 刚闭合的、可能是键的字符串
+        self._value_of: Optional[str] = None  # 冒号之后: 下一个字符串是该键的值
+        self._string_field: Optional[str] = None  # 当前字符串是哪个字段的值
+        self._text_started = False
+        self._sentence: Optional[str] = None
+        self._sentence_scan = 0
+
+    def feed(self, piece: str):
+        self.buffer += piece
+        text_before = len(self._chars) if self._string_field == "text" else None
+        for ch in piece:
+            if self._in_string:
+                self._string_char(ch)
+            elif ch == '"':
+                self._open_string()
+            elif ch == ":":
+                self._value_of, self._key = self._key, None
+            elif not ch.isspace():
+                self._key = self._value_of = None
+        # text 字段仍在生成: 一次性追加本次新增的部分
+        if self._string_field == "text":
+            self.text += "".join(self._chars[text_before or 0:])
+
+    def _open_string(self):
+        self._in_string = True
+        self._chars = []
+        field, self._value_of = self._value_of, None
+        self._key = None
+        if field == "text" and self._text_started:
+            field = None  # 只取第一个 text 字段
+        self._string_field = field if field in self.FIELDS else None
+        if self._string_field == "text":
+            self._text_started = True
+
+    def _string_char(self, ch: str):
+        if self._escape:
+            self._escape += ch
+            if self._escape[1] == "u":
+                if len(self._escape) < 6:
+                    return
+                self._unicode_escape(self._escape)
+            else:
+                self._flush_surrogate()
+                self._chars.append(_ESCAPES.get(ch, ch))
+            self._escape = ""
+            return
+        if ch == "\\":
+            self._escape = ch
+            return
+        self._flush_surrogate()
+        if ch == '"':
+            self._close_string()
+        else:
+            self._chars.append(ch)
+
+    def _flush_surrogate(self):
+        """高位代理后面不是低位代理: 原样保留"""
+        if self._high_surrogate:
+            self._chars.append(self._high_surrogate)
+            self._high_surrogate = ""
+
+    def _unicode_escape(self, escape: str):
+        """\\uXXXX；代理对 (emoji 等) 的两个转义合并为一个字符"""
+        try:
+            code = int(escape[2:], 16)
+        except ValueError:
+            self._chars.append(escape)
+            return
+        if self._high_surrogate:
+            high, self._high_surrogate = ord(self._high_surrogate), ""
+            if 0xDC00 <= code <= 0xDFFF:
+                self._chars.append(chr(0x10000 + ((high - 0xD800) << 10) + (code - 0xDC00)))
+                return
+            self._chars.append(chr(high))
+        if 0xD800 <= code <= 0xDBFF:
+            self._high_surrogate = chr(code)
+        else:
+            self._chars.append(chr(code))
+
+    def _close_string(self):
+        self._in_string = False
+        value = "".join(self._chars)
+        field, self._string_field = self._string_field, None
+        if field is None:
+            self._key = value
+        elif field == "text":
+            self.text += value[len(self.text):]
+            self.text_complete = True
+        elif getattr(self, field) is None:
+            setattr(self, field, value)
+
+    def first_sentence(self) -> Optional[str]:
+        """只从上次停下的位置继续查找，已找到的句子不会再变化"""
+        if self._sentence is None:
+            end, self._sentence_scan = _find_sentence_end(self.text, self._sentence_scan, self.text_complete)
+            if end is not None:
+                self._sentence = self.text[:end]
+            elif self.text_complete and self.text:
+                return self.text
+        return self._sentence
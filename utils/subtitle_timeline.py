@@ -0,0 +1,113 @@
+import re
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from typing import Optional
+
+# 括号内的动作/神态描写不会被合成语音 (与 AIManager.strip_brackets 一致)，显示时不占用朗读时间
+_BRACKETED = re.compile(r'[（\(].*?[）\)]')
+
+
+def spoken_weights(text: str) -> list[int]:
+    """每个字符的朗读权重: 括号内容和空白为 0，其余为 1"""
+    weights = [0 if ch.isspace() else 1 for ch in text]
+    for match in _BRACKETED.finditer(text):
+        weights[match.start():match.end()] = [0] * (match.end() - match.start())
+    return weights
+
+
+@dataclass
+class Cue:
+    """一段字幕: 显示文本 [text_start, text_end) 对应音频 [audio_start, audio_start + duration)"""
+    text_start: int
+    text_end: int
+    cumulative: list[int]  # 区间内前 i+1 个字符的累计朗读权重
+    audio_start: Optional[float] = None
+    duration: float = 0.0
+    closed: bool = False
+
+    @property
+    def weight(self) -> int:
+        return self.cumulative[-1] if self.cumulative else 0
+
+    def chars_at(self, fraction: float) -> int:
+        """播放到本段的 fraction 时应显示到的位置 (绝对字符下标)"""
+        if fraction >= 1.0 or self.weight == 0:
+            return self.text_end
+        spoken = fraction * self.weight
+        # 正在朗读的字 (累计权重首次超过 spoken 的字符) 开始发音时即显示；零权重字符跟随前一个字一起出现
+        return min(self.text_end, self.text_start + bisect_right(self.cumulative, spoken) + 1)
+
+
+@dataclass
+class SubtitleTimeline:
+    """
+    字幕时间线: 把回复文本按 TTS 分段切成若干 cue，随音频到达记录每段在音频时间轴上的起止，
+    打字机用播放时钟 (QAudioOutput.processedUSecs) 查询应显示的字符数。
+    段内按朗读权重线性分配时间；仍在下载的段总时长未知，按 chars_per_second 估计且不短于已收到的音频。
+    """
+    text: str
+    text_ends: list[int]
+    chars_per_second: float = 10.0
+    cues: list[Cue] = field(default_factory=list)
+    received: float = 0.0  # 已收到的音频总秒数
+    _next: int = 0
+
+    def __post_init__(self):
+        weights = spoken_weights(self.text)
+        start = 0
+        for end in self.text_ends:
+            end = max(start, min(end, len(self.text)))
+            cumulative, total = [], 0
+            for w in weights[start:end]:
+                total += w
+                cumulative.append(total)
+            self.cues.append(Cue(start, end, cumulative))
+            start = end
+        if start < len(self.text) and self.cues:
+            # 分段没有覆盖到的结尾 (例如被截断的预合成) 归入最后一段
+            last = self.cues[-1]
+            for w in weights[start:]:
+                last.cumulative.append(last.weight + w)
+            last.text_end = len(self.text)
+
+    @property
+    def current(self) -> Optional[Cue]:
+        return self.cues[self._next - 1] if self._next else None
+
+    def next_cue(self):
+        """下一段 TTS 开始接入播放: 上一段结束，新段从当前已收到的音频末尾开始"""
+        if self.current is not None:
+            self.current.closed = True
+        if self._next < len(self.cues):
+            cue = self.cues[self._next]
+            cue.audio_start = self.received
+            self._next += 1
+
+    def add_audio(self, seconds: float):
+        self.received += seconds
+        if self.current is not None:
+            self.current.duration += seconds
+
+    def finish(self):
+        """音频全部到达: 所有段的时长都已确定，未收到音频的段随时钟到达时直接整段显示"""
+        if self.current is not None:
+            self.current.closed = True
+        for cue in self.cues[self._next:]:
+            cue.audio_start = self.received
+            cue.closed = True
+        self._next = len(self.cues)
+
+    def chars_at(self, played: float) -> int:
+        revealed = 0
+        for cue in self.cues:
+            if cue.audio_start is None or played < cue.audio_start:
+                break
+            if cue.closed:
+                duration = cue.duration
+            else:
+                duration = max(cue.duration, cue.weight / self.chars_per_second)
+            if duration <= 0 or played >= cue.audio_start + duration:
+                revealed = cue.text_end
+                continue
+            return cue.chars_at((played - cue.audio_start) / duration)
+        return revealed
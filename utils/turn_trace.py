@@ -0,0 +1,233 @@
+"""
+对话回合延迟追踪: 一次提问 (文字发送或松开语音键) 到回答播放完毕，按阶段记录单调时钟时间点，
+回合结束时写入滚动的 JSONL 文件并按百分位汇总。
+
+用法:
+    python -m utils.turn_trace logs/turn_trace.jsonl    # 统计历史记录 (含轮转出的 .1 .2 ...)
+"""
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from typing import Iterable, Optional
+
+from utils.logger_setup import get_logger, get_record_logger
+
+logger = get_logger("TurnTrace")
+
+
+class TurnTrace:
+    """
+    单个回合的追踪上下文，随回合传给 ASR / LLM / TTS 工作线程，可跨线程调用。
+    - mark(name): 时间点，同名只记录第一次 (如首个 token、首个音频字节)；
+    - begin(name) / end(name) 或 span(name): 阶段，记录开始时间与耗时。
+    所有时间都是相对回合开始的秒数 (time.perf_counter)。
+    """
+
+    def __init__(self, source: str, turn_id: int = 0):
+        self.trace_id = uuid.uuid4().hex[:12]
+        self.source = source
+        self.turn_id = turn_id
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+        self.marks: dict[str, float] = {}
+        self.spans: dict[str, list[float]] = {}  # name -> [start, duration]
+        self.attrs: dict = {}
+        self.outcome: Optional[str] = None
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._start
+
+    def mark(self, name: str):
+        if name in self.marks:
+            return
+        at = self.elapsed()
+        with self._lock:
+            self.marks.setdefault(name, at)
+
+    def begin(self, name: str):
+        at = self.elapsed()
+        with self._lock:
+            self.spans.setdefault(name, [at, None])
+
+    def end(self, name: str):
+        at = self.elapsed()
+        with self._lock:
+            span = self.spans.get(name)
+            if span is not None and span[1] is None:
+                span[1] = at - span[0]
+
+    @contextmanager
+    def span(self, name: str):
+        self.begin(name)
+        try:
+            yield
+        finally:
+            self.end(name)
+
+    def set(self, **attrs):
+        with self._lock:
+            self.attrs.update(attrs)
+
+    def to_record(self) -> dict:
+        with self._lock:
+            return {
+                "trace_id": self.trace_id,
+                "turn_id": self.turn_id,
+                "source": self.source,
+                "time": self.started_at,
+                "outcome": self.outcome,
+                "total_ms": round(self.elapsed() * 1000, 1),
+                "marks": {name: round(at * 1000, 1) for name, at in sorted(self.marks.items(), key=lambda i: i[1])},
+                "spans": {name: [round(start * 1000, 1), None if duration is None else round(duration * 1000, 1)]
+                          for name, (start, duration) in self.spans.items()},
+                "attrs": dict(self.attrs),
+            }
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    """线性插值百分位，sorted_values 需已排序且非空"""
+    if len(sorted_values) == 1:
+        return sorted_values[0]
+    pos = (len(sorted_values) - 1) * q
+    low = int(pos)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (pos - low)
+
+
+def summarize(records: Iterable[dict], outcome: Optional[str] = "ok") -> dict[str, dict]:
+    """
+    按名称汇总多次回合: 时间点统计 "回合开始 -> 该时间点" 的延迟，阶段统计其耗时 (键名带 "+" 后缀)。
+    outcome 不为 None 时只统计该结果的回合 (默认只看正常完成的回合，取消/出错的回合会拉偏分布)。
+    """
+    samples: dict[str, list[float]] = {}
+    for record in records:
+        if outcome is not None and record.get("outcome") != outcome:
+            continue
+        for name, at in record.get("marks", {}).items():
+            samples.setdefault(name, []).append(at)
+        for name, (_, duration) in record.get("spans", {}).items():
+            if duration is not None:
+                samples.setdefault(f"{name}+", []).append(duration)
+        samples.setdefault("total", []).append(record["total_ms"])
+    summary = {}
+    for name, values in samples.items():
+        values.sort()
+        summary[name] = {
+            "count": len(values),
+            "p50": percentile(values, 0.5),
+            "p90": percentile(values, 0.9),
+            "p99": percentile(values, 0.99),
+        }
+    return summary
+
+
+def format_summary(summary: dict[str, dict]) -> str:
+    """按 p50 排序，时间点与阶段耗时混排；阶段耗时以 "+" 结尾"""
+    rows = sorted(summary.items(), key=lambda item: item[1]["p50"])
+    lines = [f"{'':28} {'n':>5} {'p50':>9} {'p90':>9} {'p99':>9}"]
+    for name, stats in rows:
+        lines.append(f"{name:28} {stats['count']:5d} {stats['p50']:8.0f}ms {stats['p90']:8.0f}ms {stats['p99']:8.0f}ms")
+    return "\n".join(lines)
+
+
+class TraceRecorder:
+    """
+    收集已结束的回合: 保留最近 history 条用于应用内汇总，每 report_every 个回合输出一次百分位表，
+    设置了 TURN_TRACE_LOG 时逐行追加 JSON，超过 max_bytes 后轮转为 .1 .. .{backups}
+    (经日志队列由后台写线程写入，finish 在 Qt 主线程中调用，不做磁盘 I/O)。
+    finished_count 为累计结束的回合数，不受 history 限制。
+    """
+
+    def __init__(self, log_path: Optional[str] = None, history: int = 200, report_every: Optional[int] = None,
+                 max_bytes: int = 5 * 1024 * 1024, backups: int = 3):
+        self.log_path = log_path
+        self.records: deque[dict] = deque(maxlen=history)
+        self.report_every = report_every
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._lock = threading.Lock()
+        self.finished_count = 0
+
+    def start(self, source: str, turn_id: int = 0) -> TurnTrace:
+        return TurnTrace(source, turn_id)
+
+    def finish(self, trace: Optional[TurnTrace], outcome: str = "ok"):
+        """结束回合 (重复调用无效)，记录并导出"""
+        if trace is None or trace.outcome is not None:
+            return
+        trace.outcome = outcome
+        record = trace.to_record()
+        with self._lock:
+            self.records.append(record)
+            self.finished_count += 1
+            count = self.finished_count
+        marks = ", ".join(f"{name}={at:.0f}" for name, at in record["marks"].items())
+        logger.info(f"Turn {trace.turn_id} [{trace.source}] {outcome} in {record['total_ms']:.0f} ms: {marks}")
+        self._write(record)
+        # .env 在本模块导入之后才加载，配置在使用时读取
+        report_every = self.report_every or int(os.getenv("TURN_TRACE_REPORT_EVERY", "10"))
+        if report_every > 0 and count % report_every == 0:
+            logger.info(f"Latency over last {len(self.records)} turns (ms since turn start, + = duration):\n"
+                        f"{self.report()}")
+
+    def summary(self, outcome: Optional[str] = "ok") -> dict[str, dict]:
+        with self._lock:
+            records = list(self.records)
+        return summarize(records, outcome)
+
+    def report(self, outcome: Optional[str] = "ok") -> str:
+        return format_summary(self.summary(outcome))
+
+    def _write(self, record: dict):
+        log_path = self.log_path or os.getenv("TURN_TRACE_LOG")
+        if not log_path:
+            return
+        try:
+            record_logger = get_record_logger(f"TurnTrace:{os.path.abspath(log_path)}", log_path,
+                                              self.max_bytes, self.backups)
+        except OSError as e:
+            logger.warning(f"Failed to open turn trace log: {e}")
+            return
+        record_logger.info(json.dumps(record, ensure_ascii=False))
+
+
+def read_records(log_path: str, backups: int = 3) -> list[dict]:
+    records = []
+    for path in [f"{log_path}.{index}" for index in range(backups, 0, -1)] + [log_path]:
+        if not os.path.exists(path):
+            continue
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    records.append(json.loads(line))
+    return records
+
+
+tracer = TraceRecorder()
+
+
+def main(argv: list[str]) -> int:
+    log_path = argv[0] if argv else os.getenv("TURN_TRACE_LOG")
+    if not log_path:
+        print("usage: python -m utils.turn_trace <turn_trace.jsonl>")
+        return 2
+    records = read_records(log_path)
+    outcomes: dict[str, int] = {}
+    for record in records:
+        outcomes[record.get("outcome")] = outcomes.get(record.get("outcome"), 0) + 1
+    print(f"{len(records)} turns: " + ", ".join(f"{k}={v}" for k, v in sorted(outcomes.items(), key=str)))
+    for source in sorted({record.get("source") for record in records}, key=str):
+        print(f"\n[{source}] ms since turn start (+ = duration)")
+        print(format_summary(summarize(r for r in records if r.get("source") == source)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -1,27 +1,44 @@
 import os
 import time
 import json
+import asyncio
 import base64
+import concurrent.futures
 import hmac
 import hashlib
 import datetime
+import socket
+from typing import Optional
+
 import pyaudio
-import websocket
+from websockets.asyncio.client import connect
 from wsgiref.handlers import format_date_time
 from urllib.parse import urlencode
 
-from PyQt5.QtCore import QThread, pyqtSignal
-from dotenv import load_dotenv
+from PyQt5.QtCore import QObject, pyqtSignal
+from engine.runtime import runtime
 from utils.logger_setup import get_logger
+from utils.turn_trace import TurnTrace
 
 
-load_dotenv()
 logger = get_logger("ASRWorker_ifly")
 
-class ASRWorker(QThread):
+IFLYTEK_HOST = "iat-api.xfyun.cn"
+RESULT_TIMEOUT = 5.0  # 发出最后一帧后等待最终结果的时间 (秒)
+
+_STOP = object()  # 音频队列中的停止标记
+
+
+async def warmup():
+    """启动预热: 提前解析讯飞接口域名 (每次识别都会新建连接，只能预热 DNS)"""
+    await asyncio.get_running_loop().getaddrinfo(IFLYTEK_HOST, 443, type=socket.SOCK_STREAM)
+
+
+class ASRWorker(QObject):
     """
     ASR Worker using iFlyTek (Xunfei) Streaming API.
     Refactored to Push-to-Talk mode to match local ASR interface.
+    每次会话是后台 asyncio 运行时中的协程 (发送与接收并行)，麦克风使用 PyAudio 回调模式，不再占用常驻线程。
     """
     # Signals matching asr_worker.py
     speech_recognized = pyqtSignal(str)     # Final recognition result
@@ -31,12 +48,9 @@ class ASRWorker(QThread):
 
     def __init__(self, parent=None):
         super().__init__(parent)
-        self._is_running = True
-
-        # Recording control flags
-        self._request_start = False
-        self._request_stop = False
+        self._session: Optional[concurrent.futures.Future] = None
         self._is_recording_active = False
+        self.trace: Optional[TurnTrace] = None  # 松开按键时创建的回合追踪
 
         # Audio Configuration
         self.pa = None
@@ -44,33 +58,19 @@ class ASRWorker(QThread):
         self.sample_rate = 16000
         # iFlyTek recommends ~40ms buffer (16000 * 0.04 = 640 samples = 1280 bytes)
         self.frames_per_buffer = 1280
+        # 会话的音频队列 (在会话协程中创建，只在事件循环线程中读写)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.audio_queue: Optional[asyncio.Queue] = None
 
         # iFlyTek Credentials
         self.iflytek_appid = os.getenv("IFLYTEK_APPID")
         self.iflytek_api_secret = os.getenv("IFLYTEK_API_SECRET")
         self.iflytek_api_key = os.getenv("IFLYTEK_API_KEY")
 
-    def start_recording(self):
-        """Request to start recording."""
-        if not self._is_recording_active:
-            self._request_start = True
-            self._request_stop = False
-
-    def stop_recording(self):
-        """Request to stop recording and finalize."""
-        if self._is_recording_active:
-            self._request_stop = True
-            self._request_start = False
-
-    def stop(self):
-        """Stop worker thread completely."""
-        self._is_running = False
-        self.wait()
-
-    def run(self):
-        """Main thread loop."""
-        if not pyaudio or not websocket:
-            self.recognition_failed.emit("Missing dependencies: pyaudio or websocket-client")
+    def start(self):
+        """Open the microphone; sessions start on start_recording()."""
+        if not pyaudio or not connect:
+            self.recognition_failed.emit("Missing dependencies: pyaudio or websockets")
             return
 
         self._init_audio()
@@ -80,13 +80,21 @@ class ASRWorker(QThread):
 
         logger.info("ASRWorker (iFlyTek) 准备就绪. 等待录音指令...")
 
-        while self._is_running:
-            if self._request_start:
-                self._request_start = False
-                self._run_session()
-            else:
-                time.sleep(0.01)
+    def start_recording(self):
+        """Request to start recording."""
+        if self.audio_stream and (self._session is None or self._session.done()):
+            self._session = runtime.submit(self._run_session())
+
+    def stop_recording(self, trace: Optional[TurnTrace] = None):
+        """Request to stop recording and finalize."""
+        if self._is_recording_active:
+            self.trace = trace
+            runtime.call_soon(self.audio_queue.put_nowait, _STOP)
 
+    def stop(self):
+        """Cancel the running session and release the microphone."""
+        if self._session is not None:
+            self._session.cancel()
         self._cleanup()
 
     def _init_audio(self):
@@ -97,22 +105,31 @@ class ASRWorker(QThread):
                 channels=1,
                 format=pyaudio.paInt16,
                 input=True,
-                frames_per_buffer=self.frames_per_buffer
+                frames_per_buffer=self.frames_per_buffer,
+                stream_callback=self._audio_callback
             )
         except Exception as e:
             logger.error(f"Audio Init Error: {e}")
             self.audio_stream = None
 
+    def _audio_callback(self, in_data, frame_count, time_info, status):
+        """PyAudio 回调，运行在 PortAudio 的线程中：录音时把数据块投递到会话队列"""
+        if self._is_recording_active:
+            self._loop.call_soon_threadsafe(self.audio_queue.put_nowait, in_data)
+        return None, pyaudio.paContinue
+
     def _cleanup(self):
         if self.audio_stream:
             try:
                 self.audio_stream.stop_stream()
                 self.audio_stream.close()
             except: pass
+            self.audio_stream = None
         if self.pa:
             try:
                 self.pa.terminate()
             except: pass
+            self.pa = None
 
     def _create_iflytek_url(self):
         """Generate auth URL."""
@@ -137,116 +154,119 @@ class ASRWorker(QThread):
         }
         return url + '?' + urlencode(v)
 
-    def _run_session(self):
+    async def _run_session(self):
         """Run one recording session."""
         if not self.iflytek_appid or not self.iflytek_api_key or not self.iflytek_api_secret:
             self.recognition_failed.emit("Missing iFlyTek credentials in .env")
             return
 
+        self._loop = asyncio.get_running_loop()
+        self.audio_queue = asyncio.Queue()
         self._is_recording_active = True
         self.recording_started.emit()
 
         ws_url = self._create_iflytek_url()
-        ws = None
         try:
-            ws = websocket.create_connection(ws_url, timeout=5)
+            ws = await connect(ws_url, open_timeout=5)
         except Exception as e:
             logger.error(f"WS Connect Failed: {e}")
+            self._is_recording_active = False
             self.recording_stopped.emit()
             self.recognition_failed.emit(f"Connection Error: {e}")
-            self._is_recording_active = False
-
             return
 
         logger.info("iFlyTek Connected. Streaming...")
 
-        status = 0 # 0=first, 1=middle, 2=last
         final_parts = []
+        full_text = None
+        # 识别结果在推流的同时接收，直到服务端返回最后一帧 (status=2) 或出错
+        receiver = asyncio.ensure_future(self._receive_results(ws, final_parts))
 
         try:
-            while self._is_recording_active and self._is_running:
-                # 1. Check if user requested stop
-                if self._request_stop:
+            status = 0 # 0=first, 1=middle, 2=last
+            while status != 2:
+                chunk = await self.audio_queue.get()
+                if chunk is _STOP:
+                    # 停止录音: 先发完已采集的音频，再发送空的最后一帧
+                    self._is_recording_active = False
+                    pending = []
+                    while not self.audio_queue.empty():
+                        item = self.audio_queue.get_nowait()
+                        if item is not _STOP:
+                            pending.append(item)
+                    for item in pending:
+                        await ws.send(json.dumps(self._frame(status, item)))
+                        status = 1
                     status = 2
+                    chunk = b""
 
-                # 2. Read Audio
-                try:
-                    # Blocking read
-                    chunk = self.audio_stream.read(self.frames_per_buffer, exception_on_overflow=False)
-                except Exception as e:
-                    logger.error(f"Audio Read Error: {e}")
-                    break
-
-                # 3. Send to WS
-                data = {
-                    "data": {
-                        "status": status,
-                        "format": "audio/L16;rate=16000",
-                        "encoding": "raw",
-                        "audio": base64.b64encode(chunk).decode('utf-8')
-                    }
-                }
-
-                # First frame needs common/business args
-                if status == 0:
-                    data = {
-                        "common": {"app_id": self.iflytek_appid},
-                        "business": {
-                            "domain": "iat",
-                            "language": "zh_cn",
-                            "accent": "mandarin",
-                            "vad_eos": 10000
-                        },
-                        "data": data["data"]
-                    }
-
-                ws.send(json.dumps(data))
-
+                await ws.send(json.dumps(self._frame(status, chunk)))
                 if status == 0:
                     status = 1
 
-                # If we sent status=2, we break loop and wait for result
-                if status == 2:
-                    break
-
-                # 4. Try to receive partial results (non-blockingish)
-                try:
-                    ws.settimeout(0.01)
-                    resp = ws.recv()
-                    txt = self._parse_result(resp)
-                    if txt: final_parts.append(txt)
-                except websocket.WebSocketTimeoutException:
-                    pass
-
-            # 5. Flush / Wait for final
-            ws.settimeout(2.0)
-            while True:
-                try:
-                    resp = ws.recv()
-                    txt = self._parse_result(resp)
-                    if txt: final_parts.append(txt)
-
-                    # Check for server end signal
-                    d = json.loads(resp)
-                    if d.get("code") != 0 or d.get("data", {}).get("status") == 2:
-                        break
-                except (websocket.WebSocketTimeoutException, Exception):
-                    break
+            if self.trace:
+                self.trace.mark("asr.eof_sent")
+
+            # Wait for final
+            try:
+                await asyncio.wait_for(asyncio.shield(receiver), RESULT_TIMEOUT)
+            except asyncio.TimeoutError:
+                logger.warning("iFlyTek final result timed out")
+
+            full_text = "".join(final_parts)
+            if self.trace:
+                self.trace.mark("asr.result")
 
         except Exception as e:
             logger.error(f"Session Error: {e}")
             self.recognition_failed.emit(str(e))
         finally:
-            if ws:
-                ws.close()
+            receiver.cancel()
+            self.trace = None
+            await ws.close()
             self._is_recording_active = False
             self.recording_stopped.emit()
 
-            # Emit final full text
-            full_text = "".join(final_parts)
+        # Emit final full text: 只在正常结束时发出；出错时已发出 recognition_failed，
+        # 关闭时被取消 (CancelledError) 会在 finally 之后直接向上抛出，不会触发新的回合
+        if full_text is not None:
             logger.info(f"Recognition Result: {full_text}")
             self.speech_recognized.emit(full_text)
 
+    def _frame(self, status: int, chunk: bytes) -> dict:
+        data = {
+            "data": {
+                "status": status,
+                "format": "audio/L16;rate=16000",
+                "encoding": "raw",
+                "audio": base64.b64encode(chunk).decode('utf-8')
+            }
+        }
+
+        # First frame needs common/business args
+        if status == 0:
+            data = {
+                "common": {"app_id": self.iflytek_appid},
+                "business": {
+                    "domain": "iat",
+                    "language": "zh_cn",
+                    "accent": "mandarin",
+                    "vad_eos": 10000
+                },
+                "data": data["data"]
+            }
+        return data
+
+    async def _receive_results(self, ws, final_parts: list):
+        async for resp in ws:
+            txt = self._parse_result(resp)
+            if txt: final_parts.append(txt)
+
+            # Check for server end signal
+            d = json.loads(resp)
+            if d.get("code") != 0 or d.get("data", {}).get("status") == 2:
+                break
+
     def _parse_result(self, json_str):
         try:
             data = json.loads(json_str)
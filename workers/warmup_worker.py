@@ -0,0 +1,48 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from utils.logger_setup import get_logger
+from utils.startup import timeline
+
+logger = get_logger("WarmupWorker")
+
+
+class WarmupWorker(QThread):
+    """
+    启动阶段的并行预热线程。
+    传入 {名称: 无参可调用对象}，各任务在线程池中同时执行 (如建立 LLM/TTS/ASR 连接、预读模型文件)，
+    单个任务失败只记录日志，不影响其他任务。每个任务的耗时会写入启动时间线。
+    """
+    task_finished = pyqtSignal(str, bool, float)  # 名称, 是否成功, 耗时(秒)
+    all_finished = pyqtSignal()
+
+    def __init__(self, tasks: dict[str, Callable[[], object]], parent=None):
+        super().__init__(parent)
+        self.tasks = tasks
+        timeline.expect(*tasks)
+
+    def run(self):
+        if not self.tasks:
+            self.all_finished.emit()
+            return
+        with ThreadPoolExecutor(max_workers=len(self.tasks), thread_name_prefix="warmup") as pool:
+            futures = {pool.submit(self._run_task, name, task): name for name, task in self.tasks.items()}
+            for future in as_completed(futures):
+                name = futures[future]
+                ok, duration = future.result()
+                timeline.done(name, duration, ok)
+                self.task_finished.emit(name, ok, duration)
+        self.all_finished.emit()
+
+    @staticmethod
+    def _run_task(name: str, task: Callable[[], object]) -> tuple[bool, float]:
+        start = time.perf_counter()
+        try:
+            task()
+            return True, time.perf_counter() - start
+        except Exception as e:
+            logger.warning(f"Warmup '{name}' failed: {e}")
+            return False, time.perf_counter() - start